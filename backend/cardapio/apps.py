@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CardapioConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cardapio'
+
+    def ready(self):
+        # Registra a invalidação do snapshot público do cardápio.
+        from . import signals  # noqa: F401
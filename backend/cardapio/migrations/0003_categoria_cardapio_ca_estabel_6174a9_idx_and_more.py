@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cardapio', '0002_itemcardapio'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='categoria',
+            index=models.Index(fields=['estabelecimento', 'data_atualizacao'], name='cardapio_ca_estabel_6174a9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='itemcardapio',
+            index=models.Index(fields=['estabelecimento', 'data_atualizacao'], name='cardapio_it_estabel_1a41b9_idx'),
+        ),
+    ]
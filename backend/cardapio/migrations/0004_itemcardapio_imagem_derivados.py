@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cardapio', '0003_categoria_cardapio_ca_estabel_6174a9_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itemcardapio',
+            name='imagem_derivados',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
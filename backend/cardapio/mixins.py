@@ -1,8 +1,17 @@
 # backend/cardapio/mixins.py
 
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.response import Response
 from configuracao.models import Estabelecimento 
 from core.mixins import EstablishmentFilteredViewSet 
+from core.tenant import get_tenant
+from .snapshot import invalidate_menu_snapshot
 
 
 class CardapioEstablishmentMixin:
@@ -14,50 +23,273 @@ class CardapioEstablishmentMixin:
 
     def get_queryset(self):
         # Lógica para superusuários e usuários comuns.
-        if not self.request.user.is_authenticated:
+        tenant = get_tenant(self.request)
+
+        if not tenant.is_authenticated:
             raise PermissionDenied("Usuário não autenticado.")
 
-        if self.request.user.is_superuser:
+        if tenant.is_superuser:
             # Superusuários veem todos os objetos do modelo deste ViewSet.
             # Eles podem usar o Django Admin para gerenciar estabelecimentos.
-            return super(EstablishmentFilteredViewSet, self).get_queryset()
-        
-        # Usuários regulares (gerentes)
-        if not hasattr(self.request.user, 'perfil') or not self.request.user.perfil.estabelecimento:
-            raise PermissionDenied("Seu perfil de usuário não está vinculado a um estabelecimento.")
-        
-        # Usuário regular (gestor) vê apenas os objetos do seu estabelecimento.
-        return super(EstablishmentFilteredViewSet, self).get_queryset().filter(estabelecimento=self.request.user.perfil.estabelecimento)
+            queryset = super(EstablishmentFilteredViewSet, self).get_queryset()
+        else:
+            # Usuários regulares (gerentes)
+            if not tenant.has_estabelecimento:
+                raise PermissionDenied("Seu perfil de usuário não está vinculado a um estabelecimento.")
+
+            # Usuário regular (gestor) vê apenas os objetos do seu estabelecimento.
+            queryset = super(EstablishmentFilteredViewSet, self).get_queryset().filter(estabelecimento_id=tenant.estabelecimento_id)
+
+        # Evita N+1: o serializer informa quais relações precisa (select_related/prefetch_related).
+        return self.get_serializer_class().setup_eager_loading(queryset)
 
     def perform_create(self, serializer):
         # O estabelecimento será SEMPRE o do perfil do usuário logado,
         # simplificando a lógica de criação.
-        if not self.request.user.is_authenticated:
+        tenant = get_tenant(self.request)
+
+        if not tenant.is_authenticated:
             raise PermissionDenied("Usuário não autenticado para criar.")
 
-        if not hasattr(self.request.user, 'perfil') or not self.request.user.perfil.estabelecimento:
+        if not tenant.has_estabelecimento:
             raise ValidationError({"detail": "Seu perfil de usuário não está vinculado a um estabelecimento."})
-            
-        final_establishment = self.request.user.perfil.estabelecimento
         
-        serializer.save(estabelecimento=final_establishment)
+        serializer.save(estabelecimento_id=tenant.estabelecimento_id)
 
     def perform_update(self, serializer):
         # A atualização garante que o objeto pertence ao estabelecimento do usuário logado.
-        instance = self.get_object() 
+        # O objeto já foi carregado por get_object() em update(); não buscamos de novo.
+        instance = serializer.instance
+        tenant = get_tenant(self.request)
 
-        if not self.request.user.is_superuser:
+        if not tenant.is_superuser:
             # Usuários comuns NÃO podem alterar o campo 'estabelecimento' do objeto.
             # Essa validação já foi reforçada no perform_update anterior.
             if 'estabelecimento' in serializer.validated_data and \
-               serializer.validated_data['estabelecimento'] != instance.estabelecimento:
+               serializer.validated_data['estabelecimento'].pk != instance.estabelecimento_id:
                 raise PermissionDenied("Você não tem permissão para alterar o estabelecimento de um objeto.")
             
             # E garantimos que o objeto que está sendo atualizado pertence ao estabelecimento do usuário.
-            if instance.estabelecimento != self.request.user.perfil.estabelecimento:
+            if instance.estabelecimento_id != tenant.estabelecimento_id:
                 raise PermissionDenied("Você não tem permissão para atualizar um objeto que não pertence ao seu estabelecimento.")
         
         # Se for superusuário, ele pode alterar o campo estabelecimento,
         # mas como definimos que ele não usará essa funcionalidade pelo frontend,
         # a lógica se torna mais simples.
-        serializer.save()
\ No newline at end of file
+        serializer.save()
+
+
+class CardapioBulkMixin:
+    """
+    Operações em lote para os ViewSets do cardápio, no endpoint <recurso>/bulk/:
+    - POST   [{...}, ...]              cria vários objetos;
+    - PATCH  [{"id": ..., ...}, ...]   atualiza parcialmente vários objetos;
+    - DELETE {"ids": [...]}            exclui vários objetos;
+    - POST   reorder/ {"ids": [...]}   reescreve 'ordem' conforme a posição de cada ID.
+
+    O lote inteiro é validado antes de qualquer escrita, com consultas por conjunto
+    (categorias do estabelecimento e nomes já existentes em uma consulta cada), e
+    gravado com bulk_create/bulk_update em uma única transação. Se alguma linha for
+    inválida nada é gravado e a resposta 400 traz uma lista de erros alinhada à entrada
+    ({} para as linhas válidas), no mesmo formato do DRF para many=True.
+
+    bulk_create/bulk_update não disparam sinais: o snapshot do cardápio público é
+    invalidado uma única vez, ao final da transação.
+    """
+    # Campos que, junto com o estabelecimento, formam o unique_together do modelo.
+    bulk_unique_fields = ('nome',)
+    bulk_unique_message = "Já existe um registro com este nome neste estabelecimento."
+    bulk_max_size = 2000
+    bulk_batch_size = 500
+
+    def get_bulk_serializer_context(self, estabelecimento_id):
+        """ Contexto compartilhado por todas as linhas do lote (ver CategoriaField). """
+        return self.get_serializer_context()
+
+    def _bulk_estabelecimento_id(self):
+        tenant = get_tenant(self.request)
+        if not tenant.has_estabelecimento:
+            raise ValidationError({"detail": "Seu perfil de usuário não está vinculado a um estabelecimento."})
+        return tenant.estabelecimento_id
+
+    def _bulk_ids(self, data):
+        ids = data.get('ids') if isinstance(data, dict) else None
+        if not isinstance(ids, list) or not ids:
+            raise ValidationError({"ids": "Envie uma lista não vazia de IDs."})
+        if len(ids) > self.bulk_max_size:
+            raise ValidationError({"ids": f"No máximo {self.bulk_max_size} IDs por requisição."})
+        return ids
+
+    def _bulk_rows(self, data):
+        if not isinstance(data, list) or not data:
+            raise ValidationError({"detail": "Envie uma lista não vazia de objetos."})
+        if len(data) > self.bulk_max_size:
+            raise ValidationError({"detail": f"No máximo {self.bulk_max_size} objetos por requisição."})
+        return data
+
+    def _unique_key(self, values):
+        return tuple(getattr(values[field], 'pk', values[field]) for field in self.bulk_unique_fields)
+
+    def _check_bulk_unique(self, estabelecimento_id, keyed_rows, errors):
+        """
+        Confere o unique_together para as linhas (indice, chave, pk) de uma vez:
+        duplicatas dentro do próprio lote e conflitos com registros já gravados.
+        """
+        model = self.get_queryset().model
+        vistos = {}
+        for index, key, pk in keyed_rows:
+            if key in vistos:
+                errors[index] = {'non_field_errors': [self.bulk_unique_message]}
+            vistos[key] = index
+
+        attnames = [model._meta.get_field(field).attname for field in self.bulk_unique_fields]
+        primeiro = self.bulk_unique_fields[0]
+        existentes = {
+            tuple(row[:-1]): row[-1]
+            for row in model.objects.filter(
+                estabelecimento_id=estabelecimento_id,
+                **{f'{primeiro}__in': {key[0] for key in vistos}},
+            ).values_list(*attnames, 'pk')
+        }
+        for index, key, pk in keyed_rows:
+            if key in existentes and existentes[key] != pk:
+                errors[index] = {'non_field_errors': [self.bulk_unique_message]}
+
+    def _bulk_response(self, objs, status_code):
+        # Relê os objetos gravados com o eager loading do serializer (consultas constantes).
+        queryset = self.get_queryset().filter(pk__in=[obj.pk for obj in objs])
+        return Response(self.get_serializer(queryset, many=True).data, status=status_code)
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request, *args, **kwargs):
+        estabelecimento_id = self._bulk_estabelecimento_id()
+        rows = self._bulk_rows(request.data)
+        context = self.get_bulk_serializer_context(estabelecimento_id)
+        serializer_class = self.get_serializer_class()
+
+        serializers = [serializer_class(data=row, context=context) for row in rows]
+        errors = [{} if serializer.is_valid() else serializer.errors for serializer in serializers]
+        self._check_bulk_unique(estabelecimento_id, [
+            (index, self._unique_key(serializer.validated_data), None)
+            for index, serializer in enumerate(serializers) if not errors[index]
+        ], errors)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        model = serializer_class.Meta.model
+        objs = [model(estabelecimento_id=estabelecimento_id, **serializer.validated_data) for serializer in serializers]
+        with transaction.atomic():
+            model.objects.bulk_create(objs, batch_size=self.bulk_batch_size)
+            transaction.on_commit(lambda: invalidate_menu_snapshot(estabelecimento_id))
+        return self._bulk_response(objs, status.HTTP_201_CREATED)
+
+    @bulk.mapping.patch
+    def bulk_update(self, request, *args, **kwargs):
+        estabelecimento_id = self._bulk_estabelecimento_id()
+        rows = self._bulk_rows(request.data)
+        context = self.get_bulk_serializer_context(estabelecimento_id)
+        serializer_class = self.get_serializer_class()
+        model = serializer_class.Meta.model
+
+        ids = []
+        for row in rows:
+            try:
+                ids.append(model._meta.pk.to_python(row['id']))
+            except (KeyError, TypeError, DjangoValidationError):
+                ids.append(None)
+        # Uma consulta, já restrita ao estabelecimento: IDs de outro tenant simplesmente não aparecem.
+        instancias = model.objects.filter(estabelecimento_id=estabelecimento_id).in_bulk(
+            [pk for pk in ids if pk is not None]
+        )
+
+        errors, serializers = [], []
+        for row, pk in zip(rows, ids):
+            instance = instancias.get(pk)
+            if instance is None:
+                errors.append({'id': ["Objeto não encontrado neste estabelecimento."]})
+                serializers.append(None)
+                continue
+            serializer = serializer_class(instance, data=row, partial=True, context=context)
+            errors.append({} if serializer.is_valid() else serializer.errors)
+            serializers.append(serializer)
+        vistos = set()
+        for index, pk in enumerate(ids):
+            if pk is not None and pk in vistos:
+                errors[index] = {'id': ["Objeto repetido no lote."]}
+            vistos.add(pk)
+
+        # Valores atuais pelo attname (categoria_id): não carrega a FK de cada linha.
+        attnames = {field: model._meta.get_field(field).attname for field in self.bulk_unique_fields}
+        self._check_bulk_unique(estabelecimento_id, [
+            (index, self._unique_key({
+                field: serializer.validated_data.get(field, getattr(serializer.instance, attnames[field]))
+                for field in self.bulk_unique_fields
+            }), serializer.instance.pk)
+            for index, serializer in enumerate(serializers) if not errors[index]
+        ], errors)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # bulk_update não aplica auto_now: data_atualizacao é preenchida aqui
+        # (ETag e ?since= dependem dela).
+        agora = timezone.now()
+        campos = {'data_atualizacao'}
+        objs = []
+        for serializer in serializers:
+            instance = serializer.instance
+            for field, value in serializer.validated_data.items():
+                setattr(instance, field, value)
+                campos.add(field)
+            instance.data_atualizacao = agora
+            objs.append(instance)
+
+        with transaction.atomic():
+            model.objects.bulk_update(objs, sorted(campos), batch_size=self.bulk_batch_size)
+            transaction.on_commit(lambda: invalidate_menu_snapshot(estabelecimento_id))
+        return self._bulk_response(objs, status.HTTP_200_OK)
+
+    @bulk.mapping.delete
+    def bulk_destroy(self, request, *args, **kwargs):
+        estabelecimento_id = self._bulk_estabelecimento_id()
+        ids = self._bulk_ids(request.data)
+
+        model = self.get_serializer_class().Meta.model
+        # A exclusão passa pelo Collector do Django: cascatas, tombstones (?since=)
+        # e invalidação do snapshot continuam valendo para cada objeto.
+        with transaction.atomic():
+            _, por_modelo = model.objects.filter(estabelecimento_id=estabelecimento_id, pk__in=ids).delete()
+        return Response({'excluidos': por_modelo.get(model._meta.label, 0)}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'])
+    def reorder(self, request, *args, **kwargs):
+        """
+        Recebe {"ids": [...]} na ordem desejada e grava ordem = posição (0, 1, 2...)
+        com um único UPDATE ... SET ordem = CASE id WHEN ... END, depois de conferir
+        em uma consulta que todos os IDs pertencem ao estabelecimento.
+        """
+        estabelecimento_id = self._bulk_estabelecimento_id()
+        model = self.get_serializer_class().Meta.model
+        try:
+            ids = [model._meta.pk.to_python(pk) for pk in self._bulk_ids(request.data)]
+        except (TypeError, DjangoValidationError):
+            raise ValidationError({"ids": "IDs inválidos."})
+        if len(set(ids)) != len(ids):
+            raise ValidationError({"ids": "A lista contém IDs repetidos."})
+
+        queryset = model.objects.filter(estabelecimento_id=estabelecimento_id, pk__in=ids)
+        with transaction.atomic():
+            encontrados = set(queryset.select_for_update().values_list('pk', flat=True))
+            faltando = [pk for pk in ids if pk not in encontrados]
+            if faltando:
+                raise ValidationError({"ids": f"Objetos não encontrados neste estabelecimento: {faltando}"})
+
+            queryset.update(
+                ordem=Case(
+                    *[When(pk=pk, then=Value(posicao)) for posicao, pk in enumerate(ids)],
+                    output_field=IntegerField(),
+                ),
+                # update() não aplica auto_now; ETag e ?since= dependem de data_atualizacao.
+                data_atualizacao=timezone.now(),
+            )
+            transaction.on_commit(lambda: invalidate_menu_snapshot(estabelecimento_id))
+        return Response({'ids': ids}, status=status.HTTP_200_OK)
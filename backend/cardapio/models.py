@@ -22,6 +22,8 @@ class Categoria(models.Model):
         verbose_name_plural = "Categorias do Cardápio"
         unique_together = ('nome', 'estabelecimento')
         ordering = ['ordem', 'nome']
+        # Sincronização incremental e GET condicional filtram por estabelecimento + data_atualizacao
+        indexes = [models.Index(fields=['estabelecimento', 'data_atualizacao'])]
 
     def __str__(self):
         return f"{self.nome} ({self.estabelecimento.nome})"
@@ -47,6 +49,8 @@ class ItemCardapio(models.Model):
     preco = models.DecimalField(max_digits=10, decimal_places=2)
     disponivel = models.BooleanField(default=True)
     imagem = models.ImageField(upload_to='itens_cardapio/', blank=True, null=True)
+    # Miniaturas WebP geradas em segundo plano (ver core.images): {'origem': <arquivo>, <tamanho>: <arquivo>}
+    imagem_derivados = models.JSONField(default=dict, blank=True, editable=False)
     ordem = models.IntegerField(default=0, help_text="Ordem de exibição do item na categoria")
     data_criacao = models.DateTimeField(auto_now_add=True)
     data_atualizacao = models.DateTimeField(auto_now=True)
@@ -57,6 +61,7 @@ class ItemCardapio(models.Model):
         # Garante que a combinação de nome E estabelecimento E categoria seja única
         unique_together = ('nome', 'estabelecimento', 'categoria')
         ordering = ['ordem', 'nome']
+        indexes = [models.Index(fields=['estabelecimento', 'data_atualizacao'])]
 
     def __str__(self):
         return f"{self.nome} ({self.categoria.nome} - {self.estabelecimento.nome})"
@@ -64,7 +69,8 @@ class ItemCardapio(models.Model):
     # Adicionar validação customizada para garantir que categoria e item pertençam ao mesmo estabelecimento
     def clean(self):
         # Garante que a categoria selecionada pertence ao mesmo estabelecimento do item
-        if self.categoria and self.estabelecimento and self.categoria.estabelecimento != self.estabelecimento:
+        # Compara pelos IDs para não carregar os dois estabelecimentos.
+        if self.categoria_id and self.estabelecimento_id and self.categoria.estabelecimento_id != self.estabelecimento_id:
             from django.core.exceptions import ValidationError
             raise ValidationError(
                 {'categoria': 'A categoria deve pertencer ao mesmo estabelecimento do item.'}
@@ -1,8 +1,31 @@
 # backend/cardapio/serializers.py
+from django.db.models import Prefetch
 from rest_framework import serializers
+from core.serializers import ImageDerivativesField, SparseFieldsetSerializerMixin, TimedSerializerMixin
 from .models import Categoria, ItemCardapio
 
-class CategoriaSerializer(serializers.ModelSerializer):
+class CategoriaField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField de Categoria que, quando o contexto traz 'categorias_por_id'
+    (operações em lote, ver CardapioBulkMixin), resolve o ID nesse dicionário em vez de
+    fazer uma consulta por linha. O dicionário contém só as categorias do estabelecimento,
+    então uma categoria de outro tenant é tratada como inexistente.
+    """
+
+    def to_internal_value(self, data):
+        categorias_por_id = self.context.get('categorias_por_id')
+        if categorias_por_id is None:
+            return super().to_internal_value(data)
+        try:
+            categoria = categorias_por_id.get(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if categoria is None:
+            self.fail('does_not_exist', pk_value=data)
+        return categoria
+
+
+class CategoriaSerializer(TimedSerializerMixin, SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     estabelecimento_nome = serializers.StringRelatedField(source='estabelecimento.nome', read_only=True)
     itens = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
 
@@ -22,13 +45,23 @@ class CategoriaSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['data_criacao', 'data_atualizacao', 'estabelecimento']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Carrega de antemão as relações renderizadas pelo serializer:
+        'estabelecimento_nome' via JOIN e 'itens' em uma única consulta extra (só os IDs).
+        """
+        return queryset.select_related('estabelecimento').prefetch_related(
+            Prefetch('itens', queryset=ItemCardapio.objects.only('id', 'categoria_id'))
+        )
 
-class ItemCardapioSerializer(serializers.ModelSerializer):
+
+class ItemCardapioSerializer(TimedSerializerMixin, SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     # Campo 'categoria' agora sempre lida com o ID da Primary Key,
     # tanto para escrita (write_only=True) quanto para leitura (se fosse read_only=False).
     # Removendo explicitamente categoria_id e usando apenas 'categoria' como PrimaryKeyRelatedField
     # Isso garante que ele retorne o UUID para leitura.
-    categoria = serializers.PrimaryKeyRelatedField(
+    categoria = CategoriaField(
         queryset=Categoria.objects.all(),
         # Não precisa de 'source' se o nome do campo for o mesmo do modelo.
         # Caso queira que ele seja write_only para enviar, mas apareça o ID para leitura:
@@ -37,6 +70,7 @@ class ItemCardapioSerializer(serializers.ModelSerializer):
     
     categoria_nome = serializers.StringRelatedField(source='categoria.nome', read_only=True)
     estabelecimento_nome = serializers.StringRelatedField(source='estabelecimento.nome', read_only=True) 
+    imagem_derivados = ImageDerivativesField('imagem')
 
     class Meta:
         model = ItemCardapio
@@ -51,8 +85,14 @@ class ItemCardapioSerializer(serializers.ModelSerializer):
             'preco',
             'disponivel',
             'imagem',
+            'imagem_derivados',
             'ordem',
             'data_criacao',
             'data_atualizacao'
         ]
-        read_only_fields = ['data_criacao', 'data_atualizacao', 'estabelecimento']
\ No newline at end of file
+        read_only_fields = ['data_criacao', 'data_atualizacao', 'estabelecimento']
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """ 'categoria_nome' e 'estabelecimento_nome' vêm no mesmo SELECT via JOIN. """
+        return queryset.select_related('categoria', 'estabelecimento')
\ No newline at end of file
@@ -0,0 +1,40 @@
+# backend/cardapio/signals.py
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from configuracao.models import Estabelecimento
+from .models import Categoria, ItemCardapio
+from core.images import derivatives_ready, track_image_derivatives
+from core.sync import track_deletions
+from .snapshot import invalidate_menu_snapshot
+
+# Exclusões geram Tombstones para a sincronização incremental (?since=).
+track_deletions(Categoria)
+track_deletions(ItemCardapio)
+
+# Uploads de imagem geram miniaturas WebP em segundo plano.
+track_image_derivatives(ItemCardapio, 'imagem')
+
+
+@receiver([post_save, post_delete], sender=Categoria)
+@receiver([post_save, post_delete], sender=ItemCardapio)
+def invalidate_menu_on_cardapio_change(sender, instance, **kwargs):
+    # Só após o commit: antes dele, uma leitura concorrente remontaria o snapshot com os
+    # dados antigos e o guardaria sob a versão nova.
+    transaction.on_commit(partial(invalidate_menu_snapshot, instance.estabelecimento_id))
+
+
+@receiver([post_save, post_delete], sender=Estabelecimento)
+def invalidate_menu_on_estabelecimento_change(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_menu_snapshot, instance.pk))
+
+
+@receiver(derivatives_ready, sender=ItemCardapio)
+def invalidate_menu_on_derivatives_ready(sender, pk, **kwargs):
+    estabelecimento_id = ItemCardapio.objects.filter(pk=pk).values_list('estabelecimento_id', flat=True).first()
+    if estabelecimento_id is not None:
+        invalidate_menu_snapshot(estabelecimento_id)
@@ -0,0 +1,130 @@
+# backend/cardapio/snapshot.py
+
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+
+from configuracao.models import Estabelecimento
+from core.images import derivative_urls
+from .models import Categoria, ItemCardapio
+
+# O cardápio público é guardado como um blob JSON já renderizado, sob uma chave
+# versionada: invalidar significa apenas incrementar a versão (após o commit, ver
+# cardapio.signals), de modo que um snapshot montado concorrentemente com uma
+# alteração fica sob a versão antiga e nunca é servido. Versão e blobs expiram
+# (MENU_SNAPSHOT_TIMEOUT), então blobs de versões antigas não se acumulam.
+_VERSION_KEY = 'cardapio:snapshot:{estabelecimento_id}:versao'
+_BLOB_KEY = 'cardapio:snapshot:{estabelecimento_id}:{versao}'
+
+
+def _get_cache():
+    return caches[getattr(settings, 'MENU_SNAPSHOT_CACHE_ALIAS', 'default')]
+
+
+def _get_timeout():
+    # Sempre finito: a URL pública é anônima e as chaves não podem crescer sem limite.
+    return getattr(settings, 'MENU_SNAPSHOT_TIMEOUT', None) or 60 * 60 * 24
+
+
+def _new_version():
+    # Versão inicial baseada no relógio: se a chave de versão for descartada pelo
+    # backend de cache, a nova versão nunca coincide com um blob antigo ainda guardado.
+    return time.time_ns()
+
+
+def _current_version(cache, estabelecimento_id):
+    version_key = _VERSION_KEY.format(estabelecimento_id=estabelecimento_id)
+    versao = cache.get(version_key)
+    if versao is None:
+        cache.add(version_key, _new_version(), timeout=_get_timeout())
+        versao = cache.get(version_key)
+    return versao
+
+
+def build_menu_snapshot(estabelecimento_id):
+    """
+    Monta o JSON (bytes) do cardápio ativo do estabelecimento: categorias ativas em
+    ordem de 'ordem' com seus itens disponíveis. Retorna None se o estabelecimento
+    não existir ou estiver inativo.
+    """
+    estabelecimento = Estabelecimento.objects.filter(pk=estabelecimento_id, ativo=True).only(
+        'id', 'nome', 'logotipo_url', 'cor_primaria', 'cor_secundaria'
+    ).first()
+    if estabelecimento is None:
+        return None
+
+    itens_disponiveis = ItemCardapio.objects.filter(disponivel=True).only(
+        'id', 'categoria_id', 'nome', 'descricao', 'preco', 'imagem', 'imagem_derivados', 'ordem'
+    )
+    categorias = Categoria.objects.filter(estabelecimento_id=estabelecimento.id, ativa=True).only(
+        'id', 'nome', 'descricao', 'ordem'
+    ).prefetch_related(Prefetch('itens', queryset=itens_disponiveis))
+
+    payload = {
+        'estabelecimento': {
+            'id': estabelecimento.id,
+            'nome': estabelecimento.nome,
+            'logotipo_url': estabelecimento.logotipo_url,
+            'cor_primaria': estabelecimento.cor_primaria,
+            'cor_secundaria': estabelecimento.cor_secundaria,
+        },
+        'categorias': [
+            {
+                'id': categoria.id,
+                'nome': categoria.nome,
+                'descricao': categoria.descricao,
+                'ordem': categoria.ordem,
+                'itens': [
+                    {
+                        'id': item.id,
+                        'nome': item.nome,
+                        'descricao': item.descricao,
+                        'preco': item.preco,
+                        'imagem': item.imagem.url if item.imagem else None,
+                        'imagem_derivados': derivative_urls(item.imagem, item.imagem_derivados),
+                        'ordem': item.ordem,
+                    }
+                    for item in categoria.itens.all()
+                ],
+            }
+            for categoria in categorias
+        ],
+    }
+    return json.dumps(payload, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def get_menu_snapshot(estabelecimento_id):
+    """
+    Retorna o snapshot do cardápio a partir do cache, reconstruindo-o apenas
+    se tiver sido marcado como desatualizado (ver invalidate_menu_snapshot).
+    """
+    cache = _get_cache()
+    if cache.get(_VERSION_KEY.format(estabelecimento_id=estabelecimento_id)) is None:
+        # Sem versão (primeiro acesso ou expirada): só cria chaves para um estabelecimento
+        # ativo, para que UUIDs arbitrários na URL pública não ocupem o cache.
+        if not Estabelecimento.objects.filter(pk=estabelecimento_id, ativo=True).exists():
+            return None
+    versao = _current_version(cache, estabelecimento_id)
+    blob_key = _BLOB_KEY.format(estabelecimento_id=estabelecimento_id, versao=versao)
+
+    blob = cache.get(blob_key)
+    if blob is None:
+        blob = build_menu_snapshot(estabelecimento_id)
+        if blob is not None:
+            cache.set(blob_key, blob, timeout=_get_timeout())
+    return blob
+
+
+def invalidate_menu_snapshot(estabelecimento_id):
+    """ Marca o snapshot do estabelecimento como desatualizado. """
+    cache = _get_cache()
+    version_key = _VERSION_KEY.format(estabelecimento_id=estabelecimento_id)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        # Versão ainda não existe (ou expirou): começa uma nova.
+        cache.add(version_key, _new_version(), timeout=_get_timeout())
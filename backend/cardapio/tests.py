@@ -1,3 +1,289 @@
-from django.test import TestCase
+import io
+import json
+import shutil
+import tempfile
+import uuid
+from decimal import Decimal
 
-# Create your tests here.
+from PIL import Image
+
+from django.core.management import call_command
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from configuracao.models import Estabelecimento
+from core.testing import TenantAPITestCase
+
+from .models import Categoria, ItemCardapio
+from .serializers import CategoriaSerializer, ItemCardapioSerializer
+
+
+class CardapioQueryCountTests(TenantAPITestCase):
+    """ 500 itens em 30 categorias: o número de consultas não depende do volume. """
+    nome_estabelecimento = "Karibu Cardápio"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        categorias = Categoria.objects.bulk_create(
+            Categoria(estabelecimento=cls.estabelecimento, nome=f"Categoria {i}", ordem=i) for i in range(30)
+        )
+        ItemCardapio.objects.bulk_create(
+            ItemCardapio(
+                estabelecimento=cls.estabelecimento,
+                categoria=categorias[i % 30],
+                nome=f"Item {i}",
+                preco=Decimal("10.00"),
+            )
+            for i in range(500)
+        )
+
+    def test_categorias_endpoint(self):
+        self.client.get('/api/cardapio/categorias/')
+        # ETag (MAX+COUNT) + COUNT + SELECT com JOIN do estabelecimento + prefetch dos itens
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/cardapio/categorias/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_itens_endpoint(self):
+        self.client.get('/api/cardapio/itens/')
+        # ETag (MAX+COUNT) + COUNT + SELECT com JOIN de categoria e estabelecimento
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/cardapio/itens/')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(SYNC_OVERLAP_SECONDS=0)
+    def test_streaming_export_with_sparse_fields_and_since(self):
+        self.client.get('/api/cardapio/itens/', {'fields': 'id'})
+        # ETag (MAX+COUNT) + um SELECT só com as colunas de ?fields=, sem COUNT de paginação
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get('/api/cardapio/itens/', {'stream': 'ndjson', 'fields': 'id,nome'})
+            linhas = b''.join(response.streaming_content).decode().splitlines()
+        self.assertTrue(response.streaming)
+        self.assertEqual(len(linhas), 500)
+        self.assertEqual(set(json.loads(linhas[0])), {'id', 'nome'})
+        self.assertEqual(len(consultas), 2)
+        self.assertNotIn('"preco"', consultas[1]['sql'])
+
+        # Com ?since=, DeltaSyncMixin (antes na MRO) responde o delta e ignora ?stream=.
+        token = response['X-Sync-Token']
+        ItemCardapio.objects.filter(nome="Item 7").update(nome="Item 7b", data_atualizacao=timezone.now())
+        response = self.client.get('/api/cardapio/itens/', {'stream': '1', 'since': token, 'fields': 'id,nome'})
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.data['changed'], [{'id': ItemCardapio.objects.get(nome="Item 7b").id, 'nome': "Item 7b"}])
+
+    def test_full_menu_serialization_is_constant(self):
+        categorias = CategoriaSerializer.setup_eager_loading(Categoria.objects.all())
+        with self.assertNumQueries(2):
+            data = CategoriaSerializer(categorias, many=True).data
+        self.assertEqual(sum(len(c['itens']) for c in data), 500)
+
+        itens = ItemCardapioSerializer.setup_eager_loading(ItemCardapio.objects.all())
+        with self.assertNumQueries(1):
+            data = ItemCardapioSerializer(itens, many=True).data
+        self.assertEqual(len(data), 500)
+
+
+class CardapioPublicoSnapshotTests(TestCase):
+    """ Snapshot público: servido do cache e reconstruído só após alterações. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.estabelecimento = Estabelecimento.objects.create(nome="Karibu Público")
+        cls.categoria = Categoria.objects.create(estabelecimento=cls.estabelecimento, nome="Bebidas")
+        cls.item = ItemCardapio.objects.create(
+            estabelecimento=cls.estabelecimento, categoria=cls.categoria, nome="Suco", preco=Decimal("8.50")
+        )
+        ItemCardapio.objects.create(
+            estabelecimento=cls.estabelecimento, categoria=cls.categoria, nome="Café", preco=Decimal("5.00"),
+            disponivel=False,
+        )
+
+    def setUp(self):
+        # O cache não participa do rollback das transações de teste.
+        cache.clear()
+        self.url = f'/api/cardapio/publico/{self.estabelecimento.id}/'
+
+    def test_snapshot_is_served_from_cache(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        itens = response.json()['categorias'][0]['itens']
+        self.assertEqual([item['nome'] for item in itens], ["Suco"])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).content, response.content)
+
+    def test_snapshot_is_rebuilt_after_change(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.preco = Decimal("9.00")
+            self.item.save()
+            # Antes do commit a versão não muda: nada é remontado com dados não confirmados.
+            with self.assertNumQueries(0):
+                self.client.get(self.url)
+        itens = self.client.get(self.url).json()['categorias'][0]['itens']
+        self.assertEqual(itens[0]['preco'], "9.00")
+
+    def test_inactive_estabelecimento_returns_404(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.estabelecimento.ativo = False
+            self.estabelecimento.save()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_unknown_estabelecimento_writes_nothing_to_cache(self):
+        desconhecido = uuid.uuid4()
+        self.assertEqual(self.client.get(f'/api/cardapio/publico/{desconhecido}/').status_code, 404)
+        self.assertIsNone(cache.get(f'cardapio:snapshot:{desconhecido}:versao'))
+
+
+class CardapioBulkTests(TenantAPITestCase):
+    """ Operações em lote: validação por conjunto, tudo-ou-nada e consultas constantes. """
+    nome_estabelecimento = "Karibu Lote"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.outro = Estabelecimento.objects.create(nome="Outro")
+        cls.categoria = Categoria.objects.create(estabelecimento=cls.estabelecimento, nome="Pratos")
+        cls.categoria_alheia = Categoria.objects.create(estabelecimento=cls.outro, nome="Pratos")
+
+    def setUp(self):
+        super().setUp()
+        self.url = '/api/cardapio/itens/bulk/'
+
+    def test_bulk_create_uses_constant_queries(self):
+        linhas = [{'categoria': self.categoria.id, 'nome': f"Item {i}", 'preco': "12.50"} for i in range(1000)]
+        self.client.get('/api/cardapio/itens/')
+        # categorias + nomes existentes + INSERTs em lote + releitura; o tamanho de cada
+        # INSERT depende do backend (o SQLite limita o número de parâmetros).
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, linhas, format='json')
+        self.assertLess(len(queries), 20)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 1000)
+        self.assertEqual(ItemCardapio.objects.filter(estabelecimento=self.estabelecimento).count(), 1000)
+
+    def test_bulk_create_reports_row_errors_and_writes_nothing(self):
+        ItemCardapio.objects.create(
+            estabelecimento=self.estabelecimento, categoria=self.categoria, nome="Existente", preco="1.00"
+        )
+        response = self.client.post(self.url, [
+            {'categoria': self.categoria.id, 'nome': "Novo", 'preco': "5.00"},
+            {'categoria': self.categoria_alheia.id, 'nome': "Alheio", 'preco': "5.00"},
+            {'categoria': self.categoria.id, 'nome': "Existente", 'preco': "5.00"},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('categoria', response.data[1])
+        self.assertIn('non_field_errors', response.data[2])
+        self.assertFalse(ItemCardapio.objects.filter(nome="Novo").exists())
+
+    def test_bulk_update_and_delete(self):
+        itens = ItemCardapio.objects.bulk_create(
+            ItemCardapio(estabelecimento=self.estabelecimento, categoria=self.categoria, nome=f"Item {i}", preco="1.00")
+            for i in range(12)
+        )
+        self.client.get('/api/cardapio/itens/')
+        # Número de consultas independente do tamanho do lote (nenhuma FK carregada por linha).
+        with self.assertNumQueries(7):
+            response = self.client.patch(self.url, [{'id': item.id, 'preco': "2.00"} for item in itens], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({item['preco'] for item in response.data}, {"2.00"})
+
+        response = self.client.patch(self.url, [{'id': "não é um id", 'preco': "2.00"}, "linha inválida"], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('id', response.data[0])
+
+        response = self.client.delete(self.url, {'ids': [item.id for item in itens]}, format='json')
+        self.assertEqual(response.data, {'excluidos': 12})
+        self.assertFalse(ItemCardapio.objects.filter(estabelecimento=self.estabelecimento).exists())
+
+    def test_reorder_rewrites_ordem_in_one_update(self):
+        outra = Categoria.objects.create(estabelecimento=self.estabelecimento, nome="Bebidas", ordem=5)
+        url = '/api/cardapio/categorias/reorder/'
+        self.client.get('/api/cardapio/categorias/')
+        # verificação de posse + UPDATE com CASE, dentro de uma transação
+        with self.assertNumQueries(4):
+            response = self.client.post(url, {'ids': [outra.id, self.categoria.id]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(Categoria.objects.filter(estabelecimento=self.estabelecimento).values_list('nome', 'ordem')),
+            [("Bebidas", 0), ("Pratos", 1)],
+        )
+
+        response = self.client.post(url, {'ids': [self.categoria_alheia.id]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class ImagemDerivadosTests(TenantAPITestCase):
+    """ Upload responde sem processar a imagem; as miniaturas WebP saem depois do commit. """
+    nome_estabelecimento = "Karibu Imagens"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.categoria = Categoria.objects.create(estabelecimento=cls.estabelecimento, nome="Pratos")
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=media_root, IMAGE_DERIVATIVES_ASYNC=False)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    @staticmethod
+    def foto(nome, cor=(200, 80, 20)):
+        conteudo = io.BytesIO()
+        Image.new('RGB', (1200, 800), cor).save(conteudo, 'JPEG')
+        return SimpleUploadedFile(nome, conteudo.getvalue(), content_type='image/jpeg')
+
+    def enviar(self, nome, cor=(200, 80, 20)):
+        return self.client.post('/api/cardapio/itens/', {
+            'categoria': self.categoria.id, 'nome': nome, 'preco': "30.00", 'disponivel': True, 'imagem': self.foto(f"{nome}.jpg", cor),
+        }, format='multipart')
+
+    def test_derivatives_are_generated_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.enviar("Moqueca")
+            self.assertEqual(response.status_code, 201, response.data)
+            urls = response.data['imagem_derivados']
+            self.assertTrue(urls['pendente'])
+            self.assertEqual(urls['pequena'], urls['original'])
+
+        item = ItemCardapio.objects.get(nome="Moqueca")
+        urls = self.client.get(f'/api/cardapio/itens/{item.id}/').data['imagem_derivados']
+        self.assertFalse(urls['pendente'])
+        self.assertTrue(urls['pequena'].endswith('_v1_q80_160.webp'))
+        with default_storage.open(item.imagem_derivados['grande']) as arquivo, Image.open(arquivo) as imagem:
+            self.assertEqual((imagem.format, imagem.size), ('WEBP', (1024, 683)))
+
+        # Mesmo conteúdo em outro upload: os derivados existentes são reaproveitados.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.enviar("Bobó")
+        self.assertEqual(ItemCardapio.objects.get(nome="Bobó").imagem_derivados['pequena'], item.imagem_derivados['pequena'])
+
+        menu = self.client.get(f'/api/cardapio/publico/{self.estabelecimento.id}/').json()
+        self.assertFalse(menu['categorias'][0]['itens'][0]['imagem_derivados']['pendente'])
+
+    def test_quality_change_regenerates_and_oversized_images_are_refused(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.enviar("Moqueca")
+        item = ItemCardapio.objects.get(nome="Moqueca")
+        anterior = item.imagem_derivados['pequena']
+
+        with override_settings(IMAGE_DERIVATIVE_QUALITY=60):
+            call_command('generate_image_derivatives', '--todos', stdout=io.StringIO())
+        item.refresh_from_db()
+        self.assertNotEqual(item.imagem_derivados['pequena'], anterior)
+        self.assertTrue(item.imagem_derivados['pequena'].endswith('_q60_160.webp'))
+
+        with override_settings(IMAGE_MAX_PIXELS=1000), self.assertLogs('core.images', 'ERROR'):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.enviar("Bobó", cor=(20, 80, 200))
+        self.assertEqual(ItemCardapio.objects.get(nome="Bobó").imagem_derivados['erro'], True)
@@ -2,12 +2,14 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CategoriaViewSet, ItemCardapioViewSet # Importar o novo ViewSet
+from .views import CategoriaViewSet, ItemCardapioViewSet, CardapioPublicoView # Importar o novo ViewSet
 
 router = DefaultRouter()
 router.register(r'categorias', CategoriaViewSet)
 router.register(r'itens', ItemCardapioViewSet) # Registrar o ItemCardapioViewSet
 
 urlpatterns = [
+    # Cardápio público pré-renderizado (QR Code da mesa), sem autenticação
+    path('publico/<uuid:estabelecimento_id>/', CardapioPublicoView.as_view(), name='cardapio-publico'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,50 +1,91 @@
 # backend/cardapio/views.py
+from django.http import Http404, HttpResponse
 from rest_framework import viewsets, status
+from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.exceptions import ValidationError, PermissionDenied
 from .models import Categoria, ItemCardapio
 from .serializers import CategoriaSerializer, ItemCardapioSerializer
-from core.mixins import EstablishmentFilteredViewSet 
-from .mixins import CardapioEstablishmentMixin 
+from core.mixins import ConditionalGetMixin, DeltaSyncMixin, EstablishmentFilteredViewSet, IdempotencyMixin, SparseFieldsetMixin, StreamingListMixin 
+from core.authentication import StatelessTenantJWTAuthentication
+from core.tenant import get_tenant
+from .mixins import CardapioBulkMixin, CardapioEstablishmentMixin 
+from .snapshot import get_menu_snapshot
 
 
-class CategoriaViewSet(CardapioEstablishmentMixin, EstablishmentFilteredViewSet, viewsets.ModelViewSet):
+class CategoriaViewSet(IdempotencyMixin, SparseFieldsetMixin, ConditionalGetMixin, DeltaSyncMixin, CardapioBulkMixin, CardapioEstablishmentMixin, EstablishmentFilteredViewSet, viewsets.ModelViewSet):
     queryset = Categoria.objects.all()
     serializer_class = CategoriaSerializer
+    bulk_unique_message = "Já existe uma categoria com este nome neste estabelecimento."
+    # estabelecimento_nome e a lista de itens entram no ETag.
+    conditional_related_fields = ('estabelecimento', 'itens')
+    # Endpoints do cardápio são os mais lidos: autenticação pelas claims do token, sem consultar o usuário.
+    authentication_classes = [StatelessTenantJWTAuthentication]
 
 
-class ItemCardapioViewSet(CardapioEstablishmentMixin, EstablishmentFilteredViewSet, viewsets.ModelViewSet):
+class ItemCardapioViewSet(IdempotencyMixin, SparseFieldsetMixin, ConditionalGetMixin, DeltaSyncMixin, StreamingListMixin, CardapioBulkMixin, CardapioEstablishmentMixin, EstablishmentFilteredViewSet, viewsets.ModelViewSet):
     queryset = ItemCardapio.objects.all()
     serializer_class = ItemCardapioSerializer
+    authentication_classes = [StatelessTenantJWTAuthentication]
+    bulk_unique_fields = ('nome', 'categoria')
+    # categoria_nome e estabelecimento_nome entram no ETag.
+    conditional_related_fields = ('categoria', 'estabelecimento')
+    bulk_unique_message = "Já existe um item com este nome nesta categoria."
+
+    def get_bulk_serializer_context(self, estabelecimento_id):
+        # Todas as categorias do estabelecimento em uma consulta; o CategoriaField
+        # resolve cada linha nesse dicionário (e recusa categorias de outro tenant).
+        context = super().get_bulk_serializer_context(estabelecimento_id)
+        context['categorias_por_id'] = Categoria.objects.filter(estabelecimento_id=estabelecimento_id).in_bulk()
+        return context
 
     def perform_create(self, serializer):
         # O CardapioEstablishmentMixin já adiciona o 'estabelecimento' ao serializer.
         # Pegamos o estabelecimento que será salvo para o Item.
-        estabelecimento_do_item = self.request.user.perfil.estabelecimento
+        estabelecimento_do_item_id = get_tenant(self.request).estabelecimento_id
 
         # Validamos se a categoria escolhida pertence ao estabelecimento do usuário.
         categoria_obj = serializer.validated_data.get('categoria')
         if not categoria_obj:
             raise ValidationError({"categoria_id": "A categoria é obrigatória."})
 
-        if categoria_obj.estabelecimento != estabelecimento_do_item:
+        if categoria_obj.estabelecimento_id != estabelecimento_do_item_id:
             raise ValidationError(
                 {"categoria_id": "A categoria selecionada não pertence ao seu estabelecimento."}
             )
         
-        serializer.save(estabelecimento=estabelecimento_do_item) # Garante que o estabelecimento está correto
+        serializer.save(estabelecimento_id=estabelecimento_do_item_id) # Garante que o estabelecimento está correto
 
     def perform_update(self, serializer):
-        instance = self.get_object() 
+        instance = serializer.instance
         
         # O CardapioEstablishmentMixin já validou que o usuário só pode atualizar objetos
         # que pertencem ao seu estabelecimento.
         
         # Agora, validamos se a nova categoria (se alterada) pertence ao estabelecimento do item.
         nova_categoria_obj = serializer.validated_data.get('categoria')
-        if nova_categoria_obj and nova_categoria_obj.estabelecimento != instance.estabelecimento:
+        if nova_categoria_obj and nova_categoria_obj.estabelecimento_id != instance.estabelecimento_id:
             raise ValidationError(
                 {"categoria_id": "A categoria selecionada não pertence ao estabelecimento atual do item."}
             )
         
-        serializer.save() # Chama o save normal, o mixin já cuida do estabelecimento
\ No newline at end of file
+        serializer.save() # Chama o save normal, o mixin já cuida do estabelecimento
+
+
+
+class CardapioPublicoView(APIView):
+    """
+    Cardápio público (somente leitura) acessado pelo QR Code da mesa.
+    Devolve o snapshot JSON pré-renderizado mantido em cache (ver cardapio.snapshot),
+    sem passar pelos serializers do DRF nem pela autenticação.
+    Endpoint: /api/cardapio/publico/<estabelecimento_id>/
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, estabelecimento_id):
+        blob = get_menu_snapshot(estabelecimento_id)
+        if blob is None:
+            raise Http404("Cardápio não encontrado.")
+        return HttpResponse(blob, content_type='application/json')
@@ -0,0 +1,16 @@
+# backend/chamada/permissions.py
+
+from core.permissions import IsAuthenticatedAndBelongsToEstablishment
+from core.tenant import get_tenant
+
+
+class IsGarcomOrGestor(IsAuthenticatedAndBelongsToEstablishment):
+    """ Apenas garçons e gestores (ou superusuários) acompanham e atendem chamadas. """
+    message = "Apenas garçons e gestores podem acompanhar e atender chamadas."
+
+    def has_permission(self, request, view):
+        if not super().has_permission(request, view):
+            return False
+
+        tenant = get_tenant(request)
+        return tenant.is_superuser or tenant.is_garcom or tenant.is_gestor
@@ -0,0 +1,142 @@
+# backend/chamada/registry.py
+
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache
+
+from mesa.models import Mesa
+
+GARCOM = 'GARCOM'
+CONTA = 'CONTA'
+TIPOS = (GARCOM, CONTA)
+
+
+@dataclass
+class Chamada:
+    id: str
+    estabelecimento_id: str
+    mesa_id: int
+    mesa_numero: str
+    tipo: str
+    criada_em: float
+    ultima_solicitacao: float
+    # Quantos toques foram agrupados nesta chamada.
+    solicitacoes: int = 1
+    # Instante do último aviso enviado às telas (o primeiro ou um lembrete).
+    notificada_em: float = field(default=0.0)
+
+    def as_event(self):
+        dados = asdict(self)
+        dados.pop('notificada_em')
+        dados['estabelecimento_id'] = str(self.estabelecimento_id)
+        return dados
+
+
+class ChamadaRegistry:
+    """
+    Chamadas em aberto, guardadas no cache compartilhado (CACHES['default']) para valer
+    entre todos os workers. Cada (estabelecimento, mesa, tipo) tem uma geração; a chamada
+    em aberto fica em 'chamada:<estabelecimento>:<mesa>:<tipo>:<geração>'.
+    Um toque repetido da mesma mesa e tipo nunca cria outra chamada (a criação é um
+    cache.add); dentro de CHAMADA_COALESCE_SECONDS ele é apenas contado, depois disso
+    vira um lembrete. Atender também é um cache.add, então só um garçom consegue atendê-la;
+    quem atende avança a geração. Toques simultâneos em workers diferentes podem perder
+    um incremento de 'solicitacoes', nunca criar chamadas em dobro.
+    Nada disso toca o banco, exceto abertas(), que lista as mesas do estabelecimento.
+    Com o LocMemCache padrão o cache é por processo: com vários workers use um cache
+    compartilhado (Redis/Memcached).
+    """
+
+    @property
+    def janela(self):
+        return getattr(settings, 'CHAMADA_COALESCE_SECONDS', 60)
+
+    @property
+    def validade(self):
+        return getattr(settings, 'CHAMADA_TTL_SECONDS', 30 * 60)
+
+    @staticmethod
+    def _base(estabelecimento_id, mesa_id, tipo):
+        return f'chamada:{estabelecimento_id}:{mesa_id}:{tipo}'
+
+    @staticmethod
+    def _chave_id(estabelecimento_id, chamada_id):
+        return f'chamada-id:{estabelecimento_id}:{chamada_id}'
+
+    def _ler(self, base):
+        geracao = cache.get(f'{base}:geracao', 0)
+        dados = cache.get(f'{base}:{geracao}')
+        return geracao, Chamada(**dados) if dados is not None else None
+
+    def pendente(self, estabelecimento_id, mesa_id, tipo):
+        """ Chamada em aberto para a mesa e tipo, sem alterá-la (ou None). """
+        return self._ler(self._base(estabelecimento_id, mesa_id, tipo))[1]
+
+    def solicitar(self, estabelecimento_id, mesa_id, mesa_numero, tipo):
+        """
+        Registra um toque. Retorna (chamada, evento), onde evento é 'chamada.nova',
+        'chamada.lembrete' ou None (toque agrupado, nada a avisar).
+        """
+        agora = time.time()
+        base = self._base(estabelecimento_id, mesa_id, tipo)
+        while True:
+            geracao, chamada = self._ler(base)
+            if chamada is not None:
+                break
+            chamada = Chamada(
+                id=uuid.uuid4().hex, estabelecimento_id=str(estabelecimento_id),
+                mesa_id=mesa_id, mesa_numero=mesa_numero, tipo=tipo,
+                criada_em=agora, ultima_solicitacao=agora, notificada_em=agora,
+            )
+            if cache.add(f'{base}:{geracao}', asdict(chamada), self.validade):
+                cache.set(self._chave_id(estabelecimento_id, chamada.id), (mesa_id, tipo, geracao), self.validade)
+                return chamada, 'chamada.nova'
+            # Outro worker criou a chamada entre a leitura e o add: conta o toque nela.
+
+        chamada.solicitacoes += 1
+        chamada.ultima_solicitacao = agora
+        evento = None
+        # O lembrete de cada janela também é reivindicado com add: só um worker o envia.
+        if agora - chamada.notificada_em >= self.janela and cache.add(
+            f'{base}:{geracao}:lembrete:{chamada.notificada_em}', True, self.janela
+        ):
+            chamada.notificada_em = agora
+            evento = 'chamada.lembrete'
+        cache.set_many({
+            f'{base}:{geracao}': asdict(chamada),
+            self._chave_id(estabelecimento_id, chamada.id): (mesa_id, tipo, geracao),
+        }, self.validade)
+        return chamada, evento
+
+    def atender(self, estabelecimento_id, chamada_id):
+        """ Remove e retorna a chamada; None se já foi atendida (ou não existe). """
+        alvo = cache.get(self._chave_id(estabelecimento_id, chamada_id))
+        if alvo is None:
+            return None
+        mesa_id, tipo, geracao = alvo
+        base = self._base(estabelecimento_id, mesa_id, tipo)
+        dados = cache.get(f'{base}:{geracao}')
+        if dados is None or not cache.add(f'{base}:{geracao}:atendida', True, self.validade):
+            return None
+        # Um toque concorrente ainda pode regravar a geração antiga; ela não é mais lida.
+        cache.set(f'{base}:geracao', geracao + 1, None)
+        cache.delete_many([f'{base}:{geracao}', self._chave_id(estabelecimento_id, chamada_id)])
+        return Chamada(**dados)
+
+    def abertas(self, estabelecimento_id):
+        """ Chamadas em aberto do estabelecimento, das mais antigas às mais novas (uma consulta). """
+        bases = [
+            self._base(estabelecimento_id, mesa_id, tipo)
+            for mesa_id in Mesa.objects.filter(estabelecimento_id=estabelecimento_id).values_list('id', flat=True)
+            for tipo in TIPOS
+        ]
+        geracoes = cache.get_many([f'{base}:geracao' for base in bases])
+        chaves = [f"{base}:{geracoes.get(f'{base}:geracao', 0)}" for base in bases]
+        chamadas = [Chamada(**dados) for dados in cache.get_many(chaves).values()]
+        return sorted(chamadas, key=lambda chamada: chamada.criada_em)
+
+
+registro = ChamadaRegistry()
@@ -1,3 +1,87 @@
-from django.test import TestCase
+from datetime import date
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from configuracao.models import AssinaturaEstabelecimento, Estabelecimento
+from mesa.models import Mesa
+from usuarios.models import Perfil
+from usuarios.views import MyTokenObtainPairSerializer
+
+from .registry import ChamadaRegistry
+
+User = get_user_model()
+
+
+class ChamadaTests(TestCase):
+    """ Chamadas no cache: toques agrupados, atendimento único e nenhuma escrita no banco. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.estabelecimento = Estabelecimento.objects.create(nome="Karibu Chamadas")
+        AssinaturaEstabelecimento.objects.create(estabelecimento=cls.estabelecimento, data_ativacao=date.today(), estado='ATIVA')
+        cls.mesa = Mesa.objects.create(estabelecimento=cls.estabelecimento, numero="3")
+        cls.garcons = []
+        for nome in ("garcom1", "garcom2"):
+            user = User.objects.create_user(username=nome, password="senha-forte-123")
+            Perfil.objects.create(user=user, estabelecimento=cls.estabelecimento, papel=Perfil.GARCOM)
+            cls.garcons.append(user)
+
+    def setUp(self):
+        cache.clear()
+        self.url = f'/api/chamadas/publico/{self.estabelecimento.id}/'
+
+    def garcom_client(self, user):
+        client = APIClient()
+        token = MyTokenObtainPairSerializer.get_token(user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return client
+
+    def test_repeated_taps_are_coalesced(self):
+        response = self.client.post(self.url, {'mesa': self.mesa.id, 'tipo': 'CONTA'})
+        self.assertEqual(response.status_code, 201)
+        with self.assertNumQueries(0):
+            for _ in range(5):
+                repetida = self.client.post(self.url, {'mesa': self.mesa.id, 'tipo': 'CONTA'})
+        self.assertEqual(repetida.status_code, 200)
+        self.assertEqual(repetida.data['id'], response.data['id'])
+        self.assertEqual(repetida.data['solicitacoes'], 6)
+
+        abertas = self.garcom_client(self.garcons[0]).get('/api/chamadas/').data
+        self.assertEqual(len(abertas), 1)
+
+    def test_only_one_waiter_can_acknowledge(self):
+        chamada_id = self.client.post(self.url, {'mesa': self.mesa.id, 'tipo': 'GARCOM'}).data['id']
+        url = f'/api/chamadas/{chamada_id}/atender/'
+        self.assertEqual(self.garcom_client(self.garcons[0]).post(url).status_code, 200)
+        self.assertEqual(self.garcom_client(self.garcons[1]).post(url).status_code, 409)
+
+    def test_unknown_table_is_rejected(self):
+        response = self.client.post(self.url, {'mesa': self.mesa.id + 100, 'tipo': 'GARCOM'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_state_is_shared_between_workers(self):
+        # Dois registros (como em dois workers) sobre o mesmo cache.
+        worker1, worker2 = ChamadaRegistry(), ChamadaRegistry()
+        chamada, evento = worker1.solicitar(self.estabelecimento.id, self.mesa.id, "3", 'GARCOM')
+        self.assertEqual(evento, 'chamada.nova')
+
+        repetida, evento = worker2.solicitar(self.estabelecimento.id, self.mesa.id, "3", 'GARCOM')
+        self.assertEqual((repetida.id, repetida.solicitacoes, evento), (chamada.id, 2, None))
+        self.assertEqual([aberta.id for aberta in worker1.abertas(self.estabelecimento.id)], [chamada.id])
+
+        self.assertIsNotNone(worker2.atender(self.estabelecimento.id, chamada.id))
+        self.assertIsNone(worker1.atender(self.estabelecimento.id, chamada.id))
+        self.assertEqual(worker1.abertas(self.estabelecimento.id), [])
+
+        nova, evento = worker1.solicitar(self.estabelecimento.id, self.mesa.id, "3", 'GARCOM')
+        self.assertEqual(evento, 'chamada.nova')
+        self.assertNotEqual(nova.id, chamada.id)
+
+    @override_settings(CHAMADA_PUBLICA_THROTTLE_RATE='3/min')
+    def test_public_endpoint_is_throttled(self):
+        for _ in range(3):
+            self.assertIn(self.client.post(self.url, {'mesa': self.mesa.id, 'tipo': 'GARCOM'}).status_code, (200, 201))
+        self.assertEqual(self.client.post(self.url, {'mesa': self.mesa.id, 'tipo': 'GARCOM'}).status_code, 429)
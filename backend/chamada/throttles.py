@@ -0,0 +1,20 @@
+# backend/chamada/throttles.py
+
+from django.conf import settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class ChamadaPublicaThrottle(SimpleRateThrottle):
+    """
+    Limita as chamadas públicas (sem login, a partir do QR Code) por IP e estabelecimento,
+    à taxa de CHAMADA_PUBLICA_THROTTLE_RATE. Toques repetidos já são agrupados pelo
+    registro; o limite protege o cache e a consulta de mesas de um cliente abusivo.
+    """
+    scope = 'chamada_publica'
+
+    def get_rate(self):
+        return getattr(settings, 'CHAMADA_PUBLICA_THROTTLE_RATE', '30/min')
+
+    def get_cache_key(self, request, view):
+        ident = f"{self.get_ident(request)}:{view.kwargs.get('estabelecimento_id')}"
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
@@ -0,0 +1,12 @@
+# backend/chamada/urls.py
+
+from django.urls import path
+from .views import AtenderChamadaView, ChamadasAbertasView, SolicitarChamadaView, chamadas_eventos
+
+urlpatterns = [
+    path('', ChamadasAbertasView.as_view(), name='chamadas-abertas'),
+    path('publico/<uuid:estabelecimento_id>/', SolicitarChamadaView.as_view(), name='chamada-solicitar'),
+    path('<str:chamada_id>/atender/', AtenderChamadaView.as_view(), name='chamada-atender'),
+    # Fluxo SSE das chamadas (requer ASGI, ver karibu/asgi.py)
+    path('<uuid:estabelecimento_id>/eventos/', chamadas_eventos, name='chamadas-eventos'),
+]
@@ -1,3 +1,109 @@
-from django.shortcuts import render
+# backend/chamada/views.py
 
-# Create your views here.
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework import serializers, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.pubsub import publish
+from core.streams import authenticate_stream, event_stream_response
+from core.tenant import get_tenant
+from mesa.models import Mesa
+from .permissions import IsGarcomOrGestor
+from .registry import CONTA, GARCOM, registro
+from .throttles import ChamadaPublicaThrottle
+
+
+def canal_chamadas(estabelecimento_id):
+    return f'chamadas:{estabelecimento_id}'
+
+
+class SolicitarChamadaSerializer(serializers.Serializer):
+    mesa = serializers.IntegerField()
+    tipo = serializers.ChoiceField(choices=[(GARCOM, 'Chamar garçom'), (CONTA, 'Pedir a conta')])
+
+
+class SolicitarChamadaView(APIView):
+    """
+    Cliente na mesa chama o garçom ou pede a conta (público, a partir do QR Code):
+        POST /api/chamadas/publico/<estabelecimento_id>/  {"mesa": <id>, "tipo": "GARCOM" | "CONTA"}
+    Toques repetidos viram a mesma chamada (200); só o primeiro consulta a mesa no banco.
+    Limitado a CHAMADA_PUBLICA_THROTTLE_RATE por IP e estabelecimento.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    throttle_classes = [ChamadaPublicaThrottle]
+
+    def post(self, request, estabelecimento_id):
+        serializer = SolicitarChamadaSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        mesa_id, tipo = serializer.validated_data['mesa'], serializer.validated_data['tipo']
+
+        pendente = registro.pendente(estabelecimento_id, mesa_id, tipo)
+        if pendente is not None:
+            mesa_numero = pendente.mesa_numero
+        else:
+            mesa_numero = Mesa.objects.filter(
+                pk=mesa_id, estabelecimento_id=estabelecimento_id, estabelecimento__ativo=True
+            ).values_list('numero', flat=True).first()
+            if mesa_numero is None:
+                raise ValidationError({"mesa": "Mesa não encontrada."})
+
+        chamada, evento = registro.solicitar(estabelecimento_id, mesa_id, mesa_numero, tipo)
+        if evento is not None:
+            publish(canal_chamadas(estabelecimento_id), evento, chamada.as_event())
+        return Response(
+            chamada.as_event(),
+            status=status.HTTP_201_CREATED if evento == 'chamada.nova' else status.HTTP_200_OK,
+        )
+
+
+class ChamadasAbertasView(APIView):
+    """ Chamadas em aberto do estabelecimento do garçom: GET /api/chamadas/ """
+    permission_classes = [IsGarcomOrGestor]
+
+    def get(self, request):
+        tenant = get_tenant(request)
+        return Response([chamada.as_event() for chamada in registro.abertas(tenant.estabelecimento_id)])
+
+
+class AtenderChamadaView(APIView):
+    """
+    Garçom assume a chamada: POST /api/chamadas/<id>/atender/
+    Se outro garçom já a atendeu, a resposta é 409.
+    """
+    permission_classes = [IsGarcomOrGestor]
+
+    def post(self, request, chamada_id):
+        tenant = get_tenant(request)
+        chamada = registro.atender(tenant.estabelecimento_id, chamada_id)
+        if chamada is None:
+            return Response({"detail": "Esta chamada já foi atendida."}, status=status.HTTP_409_CONFLICT)
+
+        dados = {**chamada.as_event(), 'atendida_por': tenant.user_id}
+        publish(canal_chamadas(tenant.estabelecimento_id), 'chamada.atendida', dados)
+        return Response(dados)
+
+
+async def chamadas_eventos(request, estabelecimento_id):
+    """
+    Chamadas em tempo real (Server-Sent Events) para garçons e gestores:
+        GET /api/chamadas/<estabelecimento_id>/eventos/?token=<access token>
+    O 'snapshot' inicial vem do registro no cache (uma consulta, pelas mesas).
+    """
+    tenant = await authenticate_stream(request)
+    if tenant is None:
+        return JsonResponse({"detail": "Token de acesso inválido ou ausente."}, status=401)
+    if not tenant.is_superuser and (
+        tenant.estabelecimento_id != estabelecimento_id or not (tenant.is_garcom or tenant.is_gestor)
+    ):
+        return JsonResponse({"detail": "Apenas garçons e gestores deste estabelecimento podem acompanhar as chamadas."}, status=403)
+
+    @sync_to_async
+    def abertas():
+        return [chamada.as_event() for chamada in registro.abertas(estabelecimento_id)]
+
+    return await event_stream_response(canal_chamadas(estabelecimento_id), snapshot=abertas, dedupe_key='id')
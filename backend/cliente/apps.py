@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class ClienteConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cliente'
+
+    def ready(self):
+        from core.images import track_image_derivatives
+        from core.sync import track_deletions
+        from .models import Cliente
+
+        # A API identifica clientes pelo celular (lookup_field), não pela PK.
+        track_deletions(Cliente, key_field='celular')
+        # Fotos enviadas geram miniaturas WebP em segundo plano.
+        track_image_derivatives(Cliente, 'foto_cliente')
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cliente', '0002_cliente_id_alter_cliente_bairro_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['estabelecimento', 'data_atualizacao'], name='cliente_cli_estabel_fda871_idx'),
+        ),
+    ]
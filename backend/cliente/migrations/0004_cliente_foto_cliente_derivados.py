@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cliente', '0003_cliente_cliente_cli_estabel_fda871_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='foto_cliente_derivados',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
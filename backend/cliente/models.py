@@ -18,6 +18,8 @@ class Cliente(models.Model):
     estado = models.CharField(max_length=2, null=True, blank=True)
     cep = models.CharField(max_length=9, null=True, blank=True)
     foto_cliente = models.ImageField(upload_to='clientes/fotos/', null=True, blank=True)
+    # Miniaturas WebP geradas em segundo plano (ver core.images)
+    foto_cliente_derivados = models.JSONField(default=dict, blank=True, editable=False)
     data_cadastro = models.DateTimeField(auto_now_add=True)
     data_atualizacao = models.DateTimeField(auto_now=True)
     # Relação com Estabelecimento
@@ -33,6 +35,8 @@ class Cliente(models.Model):
         verbose_name = _("Cliente")
         verbose_name_plural = _("Clientes")
         ordering = ['nome_completo']
+        # Sincronização incremental e GET condicional filtram por estabelecimento + data_atualizacao
+        indexes = [models.Index(fields=['estabelecimento', 'data_atualizacao'])]
 
     def __str__(self):
         return f"{self.nome_completo} ({self.celular})"
@@ -1,5 +1,6 @@
 # backend/cliente/permissions.py
 from rest_framework import permissions
+from core.tenant import get_tenant
 
 class IsOwnerOrManager(permissions.BasePermission):
     """
@@ -8,21 +9,23 @@ class IsOwnerOrManager(permissions.BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
+        tenant = get_tenant(request)
+
         # Permissões de leitura são permitidas para qualquer solicitação GET, HEAD ou OPTIONS.
         if request.method in permissions.SAFE_METHODS:
             # Se a requisição for de leitura, um cliente só pode ver o seu próprio perfil.
             # Um gestor/superusuário pode ver qualquer perfil.
-            if hasattr(request.user, 'perfil') and request.user.perfil.is_gestor:
+            if tenant.is_gestor:
                 return True # Gestores podem ver todos
             return obj.celular == request.user.username # Assumindo que o username do usuário é o celular
 
         # Permissões de escrita (PUT, PATCH, DELETE) são permitidas apenas para o proprietário do objeto
         # ou para gestores/superusuários.
-        if request.user.is_superuser:
+        if tenant.is_superuser:
             return True # Superusuários têm acesso total
 
         # Verifica se o usuário logado tem um perfil e se ele é um gestor
-        if hasattr(request.user, 'perfil') and request.user.perfil.is_gestor:
+        if tenant.is_gestor:
             return True # Gestores podem editar/deletar clientes
 
         # Se não for gestor nem superusuário, o usuário deve ser o próprio cliente do objeto
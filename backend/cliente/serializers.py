@@ -8,21 +8,23 @@ from django.utils.translation import gettext_lazy as _
 # Importações ABSOLUTAS corrigidas:
 from usuarios.models import Perfil
 from configuracao.models import Estabelecimento # Certifique-se de que este caminho está correto para seu modelo Estabelecimento
+from core.serializers import ImageDerivativesField, SparseFieldsetSerializerMixin, TimedSerializerMixin
 from .models import Cliente
 
 User = get_user_model()
 
-class ClienteSerializer(serializers.ModelSerializer):
+class ClienteSerializer(TimedSerializerMixin, SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
     # Garante que o UUID recebido é convertido para um objeto Estabelecimento
     estabelecimento = serializers.PrimaryKeyRelatedField(queryset=Estabelecimento.objects.all())
+    foto_cliente_derivados = ImageDerivativesField('foto_cliente')
 
     class Meta:
         model = Cliente
         fields = [
             'celular', 'password', 'nome_completo', 'data_nascimento',
             'logradouro', 'numero', 'bairro', 'cidade', 'estado', 'cep',
-            'foto_cliente', 'estabelecimento'
+            'foto_cliente', 'foto_cliente_derivados', 'estabelecimento'
         ]
         # Adicione campos somente leitura ou outros extras se necessário
         extra_kwargs = {
@@ -1,16 +1,20 @@
 # backend/cliente/views.py
+import logging
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from .models import Cliente
 from .serializers import ClienteSerializer
 from .permissions import IsOwnerOrManager
+from core.mixins import ConditionalGetMixin, DeltaSyncMixin, IdempotencyMixin, SparseFieldsetMixin, StreamingListMixin
+from core.tenant import get_tenant
 from rest_framework.permissions import IsAuthenticated
 from django.db import transaction # Import para garantir atomicidade
 from django.contrib.auth import get_user_model # Importa o modelo de usuário ativo
 
 User = get_user_model() # Obtém o modelo de usuário customizado ou padrão
+logger = logging.getLogger(__name__)
 
-class ClienteViewSet(viewsets.ModelViewSet):
+class ClienteViewSet(IdempotencyMixin, SparseFieldsetMixin, ConditionalGetMixin, DeltaSyncMixin, StreamingListMixin, viewsets.ModelViewSet):
     queryset = Cliente.objects.all()
     serializer_class = ClienteSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrManager]
@@ -19,16 +23,24 @@ class ClienteViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         # Filtrar clientes com base na permissão IsOwnerOrManager
         user = self.request.user
-        if user.is_authenticated:
+        tenant = get_tenant(self.request)
+        if tenant.is_authenticated:
             # Verifica se o usuário tem um perfil e se é gestor
-            if hasattr(user, 'perfil') and user.perfil.is_gestor:
+            if tenant.is_gestor:
                 # Gestor vê clientes do seu estabelecimento
-                return Cliente.objects.filter(estabelecimento=user.perfil.estabelecimento)
+                return Cliente.objects.filter(estabelecimento_id=tenant.estabelecimento_id)
             else:
                 # Cliente normal só vê o próprio perfil
                 return Cliente.objects.filter(celular=user.username)
         return Cliente.objects.none() # Não autenticado não vê nada
 
+    def get_tombstone_queryset(self):
+        # Clientes comuns só enxergam o próprio cadastro; exclusões de outros não lhes dizem respeito.
+        tenant = get_tenant(self.request)
+        if not (tenant.is_superuser or tenant.is_gestor):
+            return super().get_tombstone_queryset().none()
+        return super().get_tombstone_queryset()
+
     # NOVO MÉTODO OU MÉTODO ATUALIZADO PARA LIDAR COM A EXCLUSÃO
     def perform_destroy(self, instance):
         """
@@ -48,7 +60,7 @@ class ClienteViewSet(viewsets.ModelViewSet):
                 # Se não tiver, precisaria deletar Perfil.objects.filter(user=user_to_delete).delete()
             except User.DoesNotExist:
                 # Logar um aviso se o User não for encontrado, mas não impedir a deleção do Cliente
-                print(f"Aviso: Usuário associado para o celular {user_celular} não encontrado ao deletar Cliente.")
-            except Exception as e:
+                logger.warning("cliente_excluido_sem_usuario celular=%s", user_celular)
+            except Exception:
                 # Logar qualquer outro erro inesperado
-                print(f"Erro ao deletar usuário associado {user_celular}: {e}")
\ No newline at end of file
+                logger.exception("cliente_excluido_erro_usuario celular=%s", user_celular)
\ No newline at end of file
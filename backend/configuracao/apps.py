@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ConfiguracaoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'configuracao'
+
+    def ready(self):
+        # Alterações no estabelecimento ou na assinatura descartam o que está em cache.
+        from . import signals  # noqa: F401
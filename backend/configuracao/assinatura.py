@@ -0,0 +1,92 @@
+# backend/configuracao/assinatura.py
+
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import AssinaturaEstabelecimento
+
+# Estado da assinatura vigente de cada estabelecimento, consultado no login
+# (MyTokenObtainPairSerializer) e a cada requisição (configuracao.middleware).
+# Invalidado por configuracao.signals; o TTL limita a defasagem causada por
+# alterações que não disparam sinais (UPDATEs em massa).
+ASSINATURA_CACHE_KEY = 'configuracao:assinatura:{estabelecimento_id}'
+
+ESTADOS_BLOQUEADOS = ('CANCELADA', 'SUSPENSA')
+_ESTADO_DISPLAY = dict(AssinaturaEstabelecimento.ESTADO_CHOICES)
+
+
+def _get_cache():
+    return caches[getattr(settings, 'SUBSCRIPTION_CACHE_ALIAS', 'default')]
+
+
+def _cache_key(estabelecimento_id):
+    return ASSINATURA_CACHE_KEY.format(estabelecimento_id=estabelecimento_id)
+
+
+def load_subscription_state(estabelecimento_id):
+    """
+    Assinatura vigente (a mais recente não finalizada) em uma consulta, servida pelo
+    índice (estabelecimento, estado, data_ativacao). {'estado': None} se não houver.
+    """
+    assinatura = AssinaturaEstabelecimento.objects.filter(
+        estabelecimento_id=estabelecimento_id
+    ).exclude(
+        estado='FINALIZADA'
+    ).order_by('-data_ativacao').values('estado', 'data_desativacao', 'estabelecimento__nome').first()
+
+    if assinatura is None:
+        return {'estado': None}
+    return {
+        'estado': assinatura['estado'],
+        'data_desativacao': assinatura['data_desativacao'],
+        'estabelecimento_nome': assinatura['estabelecimento__nome'],
+    }
+
+
+def get_subscription_state(estabelecimento_id):
+    """ Estado da assinatura vigente do estabelecimento, do cache quando possível. """
+    cache = _get_cache()
+    estado = cache.get(_cache_key(estabelecimento_id))
+    if estado is None:
+        estado = load_subscription_state(estabelecimento_id)
+        cache.set(_cache_key(estabelecimento_id), estado, timeout=getattr(settings, 'SUBSCRIPTION_CACHE_TTL', 600))
+    return estado
+
+
+def warm_subscription_cache(estabelecimento_ids):
+    """ Recarrega o estado de vários estabelecimentos (ex.: após UPDATEs em massa). """
+    cache = _get_cache()
+    timeout = getattr(settings, 'SUBSCRIPTION_CACHE_TTL', 600)
+    cache.set_many(
+        {_cache_key(estabelecimento_id): load_subscription_state(estabelecimento_id) for estabelecimento_id in estabelecimento_ids},
+        timeout=timeout,
+    )
+
+
+def invalidate_subscription_state(estabelecimento_id):
+    _get_cache().delete(_cache_key(estabelecimento_id))
+
+
+def subscription_denial(estado, hoje=None):
+    """
+    Motivo pelo qual a assinatura não permite acesso (mensagem para o usuário),
+    ou None se o acesso é permitido. A expiração é avaliada aqui, e não no cache,
+    para que uma entrada guardada ontem não libere o acesso hoje.
+    """
+    if estado['estado'] is None:
+        return "Nenhuma assinatura ativa encontrada para este estabelecimento. Contate o suporte."
+
+    nome = estado['estabelecimento_nome']
+    if estado['estado'] in ESTADOS_BLOQUEADOS:
+        display = _ESTADO_DISPLAY[estado['estado']].lower()
+        return f"A assinatura do estabelecimento '{nome}' está {display}. Acesso negado. Contate o suporte."
+
+    data_desativacao = estado['data_desativacao']
+    if data_desativacao and data_desativacao < (hoje or date.today()):
+        return (
+            f"A assinatura do estabelecimento '{nome}' expirou em {data_desativacao.strftime('%d/%m/%Y')}. "
+            "Acesso negado. Contate o suporte."
+        )
+    return None
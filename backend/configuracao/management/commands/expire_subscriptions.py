@@ -0,0 +1,97 @@
+# backend/configuracao/management/commands/expire_subscriptions.py
+
+from datetime import date
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+
+from cardapio.snapshot import invalidate_menu_snapshot
+from configuracao.assinatura import warm_subscription_cache
+from configuracao.models import AssinaturaEstabelecimento, Estabelecimento
+from configuracao.signals import ESTABELECIMENTO_CACHE_KEY
+
+# Estados que ainda dão acesso (ou podem voltar a dar) e, portanto, expiram por data.
+ESTADOS_VIGENTES = ('ATIVA', 'TESTE', 'SUSPENSA')
+
+
+class Command(BaseCommand):
+    help = (
+        "Finaliza (estado FINALIZADA) as assinaturas com data de desativação vencida, em lotes de "
+        "UPDATEs, e recarrega o cache de assinaturas. Agende diariamente, ex. no cron: "
+        "'5 0 * * * python manage.py expire_subscriptions --desativar-estabelecimentos'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--data', help="Data de referência (AAAA-MM-DD); padrão: hoje.")
+        parser.add_argument('--lote', type=int, default=500, help="Assinaturas por UPDATE (padrão: 500).")
+        parser.add_argument(
+            '--desativar-estabelecimentos', action='store_true',
+            help="Marca ativo=False nos estabelecimentos que ficaram sem assinatura vigente.",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Só mostra o que seria alterado.")
+
+    def handle(self, *args, **options):
+        try:
+            hoje = date.fromisoformat(options['data']) if options['data'] else date.today()
+        except ValueError:
+            raise CommandError("Data inválida; use o formato AAAA-MM-DD.")
+        if options['lote'] < 1:
+            raise CommandError("--lote deve ser positivo.")
+
+        vencidas = AssinaturaEstabelecimento.objects.filter(
+            estado__in=ESTADOS_VIGENTES, data_desativacao__lt=hoje
+        )
+        if options['dry_run']:
+            por_estado = dict(vencidas.values_list('estado').annotate(total=Count('id')).order_by())
+            self.stdout.write(f"[dry-run] {sum(por_estado.values())} assinatura(s) seriam finalizadas: {por_estado}")
+            return
+
+        finalizadas, afetados = self.finalize_in_batches(vencidas, options['lote'])
+
+        desativados = 0
+        if options['desativar_estabelecimentos'] and afetados:
+            desativados = self.deactivate_establishments(afetados, hoje)
+
+        # UPDATEs em massa não disparam sinais: recarrega o estado dos afetados.
+        warm_subscription_cache(afetados)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{finalizadas} assinatura(s) finalizada(s) em {len(afetados)} estabelecimento(s); "
+            f"{desativados} estabelecimento(s) desativado(s)."
+        ))
+        saude = AssinaturaEstabelecimento.objects.values_list('estado').annotate(total=Count('id')).order_by('estado')
+        self.stdout.write("Assinaturas por estado: " + ", ".join(f"{estado}={total}" for estado, total in saude))
+
+    @staticmethod
+    def finalize_in_batches(vencidas, tamanho):
+        """ UPDATEs de até `tamanho` linhas; cada lote em sua transação, sem travar a tabela toda. """
+        finalizadas, afetados = 0, set()
+        while True:
+            with transaction.atomic():
+                lote = list(vencidas.select_for_update().values_list('pk', 'estabelecimento_id')[:tamanho])
+                if not lote:
+                    break
+                finalizadas += AssinaturaEstabelecimento.objects.filter(
+                    pk__in=[pk for pk, _ in lote]
+                ).update(estado='FINALIZADA')
+            afetados.update(estabelecimento_id for _, estabelecimento_id in lote)
+        return finalizadas, afetados
+
+    @staticmethod
+    def deactivate_establishments(afetados, hoje):
+        """ Desativa, em um UPDATE, os estabelecimentos afetados sem nenhuma assinatura ainda vigente. """
+        vigente = AssinaturaEstabelecimento.objects.filter(
+            Q(data_desativacao__isnull=True) | Q(data_desativacao__gte=hoje),
+            estabelecimento=OuterRef('pk'),
+            estado__in=ESTADOS_VIGENTES,
+        )
+        sem_assinatura = Estabelecimento.objects.filter(pk__in=afetados, ativo=True).exclude(Exists(vigente))
+        with transaction.atomic():
+            ids = list(sem_assinatura.select_for_update().values_list('pk', flat=True))
+            Estabelecimento.objects.filter(pk__in=ids).update(ativo=False)
+        for estabelecimento_id in ids:
+            cache.delete(ESTABELECIMENTO_CACHE_KEY.format(estabelecimento_id=estabelecimento_id))
+            invalidate_menu_snapshot(estabelecimento_id)
+        return len(ids)
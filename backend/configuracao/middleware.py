@@ -0,0 +1,67 @@
+# backend/configuracao/middleware.py
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.http import JsonResponse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .assinatura import get_subscription_state, subscription_denial
+
+
+def _token_establishment_id(request):
+    """
+    Claim 'establishment_id' do access token da requisição (cabeçalho Bearer ou ?token=,
+    como nas conexões SSE), ou None. Só valida assinatura e validade do JWT, sem consultar
+    o banco; tokens inválidos seguem adiante e a autenticação do DRF responde 401.
+    """
+    header = request.META.get('HTTP_AUTHORIZATION', '').split()
+    raw_token = header[1] if len(header) == 2 and header[0] == 'Bearer' else request.GET.get('token')
+    if not raw_token:
+        return None
+    try:
+        validated_token = JWTAuthentication().get_validated_token(raw_token.encode('utf-8'))
+    except (InvalidToken, TokenError):
+        return None
+    return validated_token.get('establishment_id')
+
+
+def _denial_response(estabelecimento_id):
+    motivo = subscription_denial(get_subscription_state(estabelecimento_id))
+    if motivo is None:
+        return None
+    return JsonResponse({'detail': motivo, 'code': 'subscription_inactive'}, status=403)
+
+
+class SubscriptionMiddleware:
+    """
+    Recusa (403) requisições autenticadas de estabelecimentos cuja assinatura foi
+    cancelada, suspensa ou expirou, sem esperar o token vencer. O estado vem do cache
+    de configuracao.assinatura: em regime, custa uma verificação de JWT e uma leitura
+    de cache. Superusuários (sem estabelecimento no token) e requisições anônimas passam direto.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        estabelecimento_id = _token_establishment_id(request)
+        if estabelecimento_id:
+            response = _denial_response(estabelecimento_id)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        estabelecimento_id = _token_establishment_id(request)
+        if estabelecimento_id:
+            response = await sync_to_async(_denial_response)(estabelecimento_id)
+            if response is not None:
+                return response
+        return await self.get_response(request)
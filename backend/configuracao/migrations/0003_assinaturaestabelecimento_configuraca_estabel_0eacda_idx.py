@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configuracao', '0002_assinaturaestabelecimento'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assinaturaestabelecimento',
+            index=models.Index(fields=['estabelecimento', 'estado', 'data_ativacao'], name='configuraca_estabel_0eacda_idx'),
+        ),
+    ]
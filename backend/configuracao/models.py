@@ -120,6 +120,8 @@ class AssinaturaEstabelecimento(models.Model):
     class Meta:
         verbose_name = 'Assinatura do Estabelecimento'
         verbose_name_plural = 'Assinaturas dos Estabelecimentos'
+        # Assinatura vigente (ver configuracao.assinatura): estado != FINALIZADA, mais recente primeiro
+        indexes = [models.Index(fields=['estabelecimento', 'estado', 'data_ativacao'])]
 
     def __str__(self):
         return f"Assinatura {self.get_estado_display()} para {self.estabelecimento.nome} ({self.data_ativacao} - {self.data_desativacao if self.data_desativacao else 'Atual'})"
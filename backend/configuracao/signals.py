@@ -0,0 +1,22 @@
+# backend/configuracao/signals.py
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .assinatura import invalidate_subscription_state
+from .models import AssinaturaEstabelecimento, Estabelecimento
+
+ESTABELECIMENTO_CACHE_KEY = 'configuracao:estabelecimento:{estabelecimento_id}'
+
+
+@receiver([post_save, post_delete], sender=Estabelecimento)
+def invalidate_estabelecimento_cache(sender, instance, **kwargs):
+    cache.delete(ESTABELECIMENTO_CACHE_KEY.format(estabelecimento_id=instance.pk))
+    # O estado da assinatura em cache carrega o nome do estabelecimento.
+    invalidate_subscription_state(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=AssinaturaEstabelecimento)
+def invalidate_subscription_cache(sender, instance, **kwargs):
+    invalidate_subscription_state(instance.estabelecimento_id)
@@ -1,3 +1,86 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
 
-# Create your tests here.
+from core.testing import SENHA_TESTE, TenantAPITestCase
+
+from .assinatura import get_subscription_state
+from .models import AssinaturaEstabelecimento, Estabelecimento
+
+
+class AssinaturaTests(TenantAPITestCase):
+    """ Estado da assinatura em cache: conferido no login e em toda requisição autenticada. """
+    nome_estabelecimento = "Karibu Assinatura"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.assinatura.data_ativacao = date.today() - timedelta(days=30)
+        cls.assinatura.save()
+
+    def setUp(self):
+        super().setUp()
+        # Estes testes obtêm o token pelo login.
+        self.client.credentials()
+
+    def login(self):
+        return self.client.post('/api/token/', {'username': "gestor", 'password': SENHA_TESTE}, format='json')
+
+    def test_suspension_blocks_existing_tokens(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['subscription_status'], 'ATIVA')
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(self.client.get('/api/mesa/').status_code, 200)
+
+        self.assinatura.estado = 'SUSPENSA'
+        self.assinatura.save()
+        response = self.client.get('/api/mesa/')
+        self.assertEqual(response.status_code, 403)
+        self.assertIn("está suspensa", response.json()['detail'])
+        self.client.credentials()
+        self.assertEqual(self.login().status_code, 400)
+
+    def test_state_is_cached_and_expiry_is_checked_per_request(self):
+        self.login()
+        with self.assertNumQueries(0):
+            estado = get_subscription_state(self.estabelecimento.id)
+        self.assertEqual(estado['estado'], 'ATIVA')
+
+        AssinaturaEstabelecimento.objects.filter(pk=self.assinatura.pk).update(data_desativacao=date.today() - timedelta(days=1))
+        self.assertEqual(self.login().status_code, 200)  # UPDATE sem sinal: vale o cache até o TTL
+        self.assinatura.refresh_from_db()
+        self.assinatura.save()
+        self.assertIn("expirou", self.login().data['detail'][0])
+
+
+class ExpireSubscriptionsCommandTests(TestCase):
+    """ Expiração em lote: finaliza vencidas, desativa quem ficou sem assinatura e aquece o cache. """
+
+    def test_expires_in_batches_and_warms_cache(self):
+        ontem = date.today() - timedelta(days=1)
+        vencido = Estabelecimento.objects.create(nome="Vencido")
+        renovado = Estabelecimento.objects.create(nome="Renovado")
+        for estabelecimento in (vencido, renovado):
+            AssinaturaEstabelecimento.objects.bulk_create(
+                AssinaturaEstabelecimento(estabelecimento=estabelecimento, estado='ATIVA',
+                                          data_ativacao=ontem - timedelta(days=30 + i), data_desativacao=ontem)
+                for i in range(3)
+            )
+        AssinaturaEstabelecimento.objects.create(estabelecimento=renovado, estado='ATIVA', data_ativacao=date.today())
+        cache.clear()
+
+        saida = StringIO()
+        call_command('expire_subscriptions', '--lote', '2', '--desativar-estabelecimentos', stdout=saida)
+        self.assertIn("6 assinatura(s) finalizada(s) em 2 estabelecimento(s); 1 estabelecimento(s) desativado(s)", saida.getvalue())
+
+        self.assertEqual(AssinaturaEstabelecimento.objects.filter(estado='FINALIZADA').count(), 6)
+        vencido.refresh_from_db()
+        renovado.refresh_from_db()
+        self.assertEqual((vencido.ativo, renovado.ativo), (False, True))
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_subscription_state(vencido.id)['estado'])
+            self.assertEqual(get_subscription_state(renovado.id)['estado'], 'ATIVA')
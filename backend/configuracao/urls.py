@@ -2,11 +2,12 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import EstabelecimentoViewSet
+from .views import EstabelecimentoAtualView, EstabelecimentoViewSet
 
 router = DefaultRouter()
 router.register(r'estabelecimentos', EstabelecimentoViewSet)
 
 urlpatterns = [
+    path('estabelecimento-atual/', EstabelecimentoAtualView.as_view(), name='estabelecimento-atual'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
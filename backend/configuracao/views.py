@@ -1,8 +1,16 @@
 # backend/configuracao/views.py
 
+from django.core.cache import cache
 from rest_framework import viewsets, permissions
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from core.authentication import StatelessTenantJWTAuthentication
+from core.permissions import IsAuthenticatedAndBelongsToEstablishment
+from core.tenant import get_tenant
 from .models import Estabelecimento
 from .serializers import EstabelecimentoSerializer
+from .signals import ESTABELECIMENTO_CACHE_KEY
 
 class EstabelecimentoViewSet(viewsets.ModelViewSet):
     """
@@ -13,4 +21,31 @@ class EstabelecimentoViewSet(viewsets.ModelViewSet):
     queryset = Estabelecimento.objects.all()
     serializer_class = EstabelecimentoSerializer
     # Permissão para garantir que apenas superusuários possam gerenciar estabelecimentos.
-    permission_classes = [permissions.IsAdminUser]
\ No newline at end of file
+    permission_classes = [permissions.IsAdminUser]
+
+
+class EstabelecimentoAtualView(APIView):
+    """
+    Dados do estabelecimento do usuário logado, servidos do cache (invalidado por
+    configuracao.signals). Complementa o modo compacto das listagens, em que cada
+    linha traz apenas o ID do estabelecimento.
+    Endpoint: /api/configuracao/estabelecimento-atual/
+    Com a autenticação sem estado e os caches aquecidos, não consulta o banco.
+    """
+    authentication_classes = [StatelessTenantJWTAuthentication]
+    permission_classes = [IsAuthenticatedAndBelongsToEstablishment]
+
+    def get(self, request):
+        tenant = get_tenant(request)
+        if not tenant.has_estabelecimento:
+            raise NotFound("Seu perfil de usuário não está vinculado a um estabelecimento.")
+
+        chave = ESTABELECIMENTO_CACHE_KEY.format(estabelecimento_id=tenant.estabelecimento_id)
+        dados = cache.get(chave)
+        if dados is None:
+            estabelecimento = Estabelecimento.objects.filter(pk=tenant.estabelecimento_id).first()
+            if estabelecimento is None:
+                raise NotFound("Estabelecimento não encontrado.")
+            dados = EstabelecimentoSerializer(estabelecimento).data
+            cache.set(chave, dados, timeout=None)
+        return Response(dados)
@@ -0,0 +1,174 @@
+# backend/core/authentication.py
+
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .tenant import TenantContext
+
+
+class TenantJWTAuthentication(JWTAuthentication):
+    """
+    Autenticação JWT que carrega User, Perfil e Estabelecimento em UMA consulta (JOIN),
+    deixando o perfil em cache para que core.tenant.get_tenant() não faça nenhuma consulta.
+    Substitui o JWTAuthentication padrão, que busca apenas o User e deixa o resto
+    para consultas preguiçosas em cada permissão/mixin.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        try:
+            user = self.user_model.objects.select_related('perfil__estabelecimento').get(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+class TenantTokenUser(TokenUser):
+    """
+    Usuário "leve" construído apenas a partir das claims assinadas do token
+    (ver MyTokenObtainPairSerializer.get_token). Não possui representação no banco.
+    """
+
+    @cached_property
+    def tenant(self):
+        estabelecimento_id = self.token.get('establishment_id')
+        return TenantContext(
+            # A claim do id chega como string; normalizamos para o tipo da PK do User.
+            user_id=get_user_model()._meta.pk.to_python(self.id),
+            is_authenticated=True,
+            is_superuser=self.is_superuser,
+            papel=self.token.get('role'),
+            estabelecimento_id=uuid.UUID(estabelecimento_id) if estabelecimento_id else None,
+        )
+
+
+class _UserStateCache:
+    """
+    Cache em processo do estado atual de cada usuário (ativo, papel, estabelecimento).
+    Cada entrada vive no máximo TENANT_CLAIMS_CACHE_TTL segundos, limitando a janela
+    em que um token com claims desatualizadas (usuário desativado, papel ou senha alterados)
+    ainda é aceito. Sinais de User/Perfil descartam a entrada imediatamente (ver core.signals).
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'TENANT_CLAIMS_CACHE_TTL', 60)
+
+    # As chaves são sempre str(user_id): a claim do token chega como string,
+    # enquanto os sinais do modelo trazem a PK inteira.
+    def get(self, user_id):
+        entry = self._entries.get(str(user_id))
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, user_id, state):
+        with self._lock:
+            self._entries[str(user_id)] = (time.monotonic() + self.ttl, state)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_state_cache = _UserStateCache()
+
+
+def load_user_state(user_id):
+    """
+    Estado atual do usuário em UMA consulta, no mesmo formato de claims_state().
+    Com CHECK_REVOKE_TOKEN, o último item é o hash da senha que a claim de revogação
+    deve conter (senão None). Retorna None se o usuário não existir.
+    """
+    row = get_user_model().objects.filter(pk=user_id).values_list(
+        'is_active', 'is_superuser', 'perfil__papel', 'perfil__estabelecimento_id', 'password'
+    ).first()
+    if row is None:
+        return None
+    is_active, is_superuser, papel, estabelecimento_id, password = row
+    revoke = get_md5_hash_password(password) if api_settings.CHECK_REVOKE_TOKEN else None
+    return (is_active, is_superuser, papel, str(estabelecimento_id) if estabelecimento_id else None, revoke)
+
+
+def claims_state(validated_token):
+    """ Estado do usuário segundo as claims do token. """
+    return (
+        True,
+        validated_token.get('is_superuser', False),
+        validated_token.get('role'),
+        validated_token.get('establishment_id'),
+        validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) if api_settings.CHECK_REVOKE_TOKEN else None,
+    )
+
+
+class StatelessTenantJWTAuthentication(TenantJWTAuthentication):
+    """
+    Modo sem estado: confia nas claims assinadas (role, establishment_id, is_superuser)
+    e monta um TenantTokenUser sem consultar a tabela de usuários.
+    O estado real do usuário é conferido no máximo uma vez por TENANT_CLAIMS_CACHE_TTL;
+    se divergir das claims (usuário desativado, papel ou estabelecimento alterados ou,
+    com CHECK_REVOKE_TOKEN, senha trocada), o token é recusado e o cliente precisa
+    fazer login novamente.
+    Indicado para os endpoints de leitura mais acessados (cardápio, mesas).
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        state = user_state_cache.get(user_id)
+        if state is None:
+            state = load_user_state(user_id)
+            if state is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            user_state_cache.set(user_id, state)
+
+        if not state[0]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        claims = claims_state(validated_token)
+        if state[4] != claims[4]:
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        if state != claims:
+            raise AuthenticationFailed(
+                "As permissões deste usuário foram alteradas. Faça login novamente.",
+                code="stale_token_claims",
+            )
+
+        return TenantTokenUser(validated_token)
@@ -0,0 +1,424 @@
+# backend/core/benchmark.py
+
+"""
+Dados sintéticos multi-tenant e cenários de carga para os comandos seed_tenants e
+benchmark_api. Os mesmos cenários rodam no processo (APIClient do DRF, com contagem exata
+de consultas) ou contra servidores HTTP locais (vários workers, clientes concorrentes).
+"""
+
+import http.client
+import json
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import date, timedelta
+from decimal import Decimal
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connections, transaction
+from rest_framework.test import APIClient
+
+from cardapio.models import Categoria, ItemCardapio
+from cliente.models import Cliente
+from configuracao.models import AssinaturaEstabelecimento, Estabelecimento
+from mesa.models import Mesa
+from usuarios.models import Perfil
+
+from .metrics import RequestMetrics
+
+User = get_user_model()
+
+PREFIXO_PADRAO = 'bench'
+SENHA_PADRAO = 'karibu-bench-123'
+
+CATEGORIAS = (
+    "Entradas", "Saladas", "Pratos Principais", "Massas", "Grelhados", "Frutos do Mar",
+    "Porções", "Sobremesas", "Bebidas", "Sucos", "Cervejas", "Drinks",
+)
+PRATOS = (
+    "Bruschetta", "Carpaccio", "Risoto de Cogumelos", "Moqueca", "Feijoada", "Picanha",
+    "Lasanha", "Nhoque", "Salmão Grelhado", "Escondidinho", "Pudim", "Petit Gâteau",
+    "Caipirinha", "Limonada", "Chopp", "Bolinho de Bacalhau", "Frango à Parmegiana",
+)
+NOMES = ("Ana", "Bruno", "Carla", "Diego", "Eduarda", "Felipe", "Gabriela", "Heitor", "Isabela", "João")
+SOBRENOMES = ("Silva", "Souza", "Oliveira", "Santos", "Pereira", "Costa", "Almeida", "Ferreira", "Lima")
+BAIRROS = ("Centro", "Jardins", "Vila Nova", "Boa Vista", "Santa Cecília", "Liberdade")
+PAPEIS_EQUIPE = (Perfil.GARCOM, Perfil.GARCOM, Perfil.COZINHEIRO, Perfil.CAIXA)
+
+
+def estabelecimento_nome(prefixo, indice):
+    return f'{prefixo}-{indice:04d}'
+
+
+def gestor_username(prefixo, indice):
+    return f'{prefixo}-{indice:04d}-gestor'
+
+
+def _celular(prefixo, indice, numero):
+    """ Único entre estabelecimentos (é o username do cliente): 2 dígitos do prefixo + índices. """
+    return f'{zlib.crc32(prefixo.encode()) % 90 + 10}{indice:04d}{numero:05d}'
+
+
+def seeded_establishments(prefixo):
+    return Estabelecimento.objects.filter(nome__startswith=f'{prefixo}-').order_by('nome')
+
+
+def clear_tenants(prefixo):
+    """ Remove estabelecimentos gerados com o prefixo e os usuários (equipe e clientes) deles. """
+    estabelecimentos = seeded_establishments(prefixo)
+    with transaction.atomic():
+        User.objects.filter(perfil__estabelecimento__in=estabelecimentos).delete()
+        return estabelecimentos.delete()[1].get(Estabelecimento._meta.label, 0)
+
+
+def seed_tenants(quantidade, prefixo=PREFIXO_PADRAO, categorias=8, itens_por_categoria=10, mesas=25,
+                 clientes=300, equipe=5, senha=SENHA_PADRAO, semente=0, lote=1000):
+    """
+    Cria `quantidade` estabelecimentos com assinatura ativa, cardápio, mesas, clientes e equipe
+    (um gestor + `equipe` funcionários), tudo em bulk_create; sinais não disparam e a senha é
+    derivada uma única vez. A numeração continua a partir dos estabelecimentos já gerados com
+    o mesmo prefixo. Retorna a contagem de linhas criadas por modelo.
+    """
+    rng = random.Random(semente)
+    senha_hash = make_password(senha)
+    inicio = seeded_establishments(prefixo).count()
+    hoje = date.today()
+
+    estabelecimentos = [
+        Estabelecimento(
+            nome=estabelecimento_nome(prefixo, indice), telefone=f'11 3{indice:03d}-0000',
+            endereco=f"Rua {rng.choice(SOBRENOMES)}, {rng.randint(1, 2000)}",
+            email_contato=f'contato@{estabelecimento_nome(prefixo, indice)}.example.com',
+        )
+        for indice in range(inicio, inicio + quantidade)
+    ]
+    with transaction.atomic():
+        Estabelecimento.objects.bulk_create(estabelecimentos, batch_size=lote)
+        AssinaturaEstabelecimento.objects.bulk_create(
+            [
+                AssinaturaEstabelecimento(
+                    estabelecimento=estabelecimento, estado='ATIVA', forma_pagamento='PIX',
+                    data_ativacao=hoje - timedelta(days=rng.randint(1, 365)),
+                )
+                for estabelecimento in estabelecimentos
+            ],
+            batch_size=lote,
+        )
+
+        nomes_categorias = (CATEGORIAS * (categorias // len(CATEGORIAS) + 1))[:categorias]
+        lista_categorias = Categoria.objects.bulk_create(
+            [
+                Categoria(estabelecimento=estabelecimento, nome=f"{nome} {k + 1}" if k >= len(CATEGORIAS) else nome,
+                          ordem=k, descricao=f"{nome} da casa")
+                for estabelecimento in estabelecimentos
+                for k, nome in enumerate(nomes_categorias)
+            ],
+            batch_size=lote,
+        )
+        ItemCardapio.objects.bulk_create(
+            (
+                ItemCardapio(
+                    estabelecimento_id=categoria.estabelecimento_id, categoria=categoria,
+                    nome=f"{rng.choice(PRATOS)} {k + 1}", ordem=k, disponivel=rng.random() > 0.1,
+                    descricao="Preparado na hora com ingredientes da estação.",
+                    preco=Decimal(rng.randint(900, 14900)) / 100,
+                )
+                for categoria in lista_categorias
+                for k in range(itens_por_categoria)
+            ),
+            batch_size=lote,
+        )
+        Mesa.objects.bulk_create(
+            (
+                Mesa(estabelecimento=estabelecimento, numero=f"Mesa {k + 1}", capacidade=rng.choice((2, 2, 4, 4, 6, 8)),
+                     status=rng.choices(('LIVRE', 'OCUPADA', 'RESERVADA'), (6, 3, 1))[0])
+                for estabelecimento in estabelecimentos
+                for k in range(mesas)
+            ),
+            batch_size=lote,
+        )
+
+        # Equipe e clientes: User + Perfil (como nos serializers), Cliente com username = celular.
+        usuarios, estabelecimento_de = [], []
+        for indice, estabelecimento in enumerate(estabelecimentos, start=inicio):
+            equipe_local = [(gestor_username(prefixo, indice), Perfil.GESTOR)]
+            for k in range(equipe):
+                papel = PAPEIS_EQUIPE[k % len(PAPEIS_EQUIPE)]
+                equipe_local.append((f'{prefixo}-{indice:04d}-{papel}-{k + 1}', papel))
+            for username, papel in equipe_local:
+                usuarios.append(User(username=username, password=senha_hash, email=f'{username}@example.com'))
+                estabelecimento_de.append((estabelecimento, papel))
+            for k in range(clientes):
+                usuarios.append(User(username=_celular(prefixo, indice, k), password=senha_hash))
+                estabelecimento_de.append((estabelecimento, Perfil.GARCOM))
+        User.objects.bulk_create(usuarios, batch_size=lote)
+        Perfil.objects.bulk_create(
+            (
+                Perfil(user=usuario, estabelecimento=estabelecimento, papel=papel)
+                for usuario, (estabelecimento, papel) in zip(usuarios, estabelecimento_de)
+            ),
+            batch_size=lote,
+        )
+        Cliente.objects.bulk_create(
+            (
+                Cliente(
+                    estabelecimento=estabelecimento, celular=_celular(prefixo, indice, k),
+                    nome_completo=f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}",
+                    data_nascimento=date(rng.randint(1950, 2005), rng.randint(1, 12), rng.randint(1, 28)),
+                    logradouro=f"Rua {rng.choice(SOBRENOMES)}", numero=str(rng.randint(1, 3000)),
+                    bairro=rng.choice(BAIRROS), cidade="São Paulo", estado="SP", cep=f"0{rng.randint(1000, 9999)}-000",
+                )
+                for indice, estabelecimento in enumerate(estabelecimentos, start=inicio)
+                for k in range(clientes)
+            ),
+            batch_size=lote,
+        )
+
+    return {
+        'estabelecimentos': quantidade,
+        'categorias': quantidade * categorias,
+        'itens': quantidade * categorias * itens_por_categoria,
+        'mesas': quantidade * mesas,
+        'clientes': quantidade * clientes,
+        'usuarios': len(usuarios),
+    }
+
+
+# --- Cenários -------------------------------------------------------------------------------
+
+class Sessao:
+    """ Um estabelecimento gerado: credenciais do gestor, token e alguns celulares para busca. """
+
+    def __init__(self, estabelecimento, username, senha, celulares):
+        self.estabelecimento = estabelecimento
+        self.username = username
+        self.senha = senha
+        self.celulares = celulares
+        self.token = None
+
+
+def load_sessions(prefixo, quantidade, senha=SENHA_PADRAO, celulares=50):
+    sessoes = []
+    for estabelecimento in seeded_establishments(prefixo)[:quantidade]:
+        indice = int(estabelecimento.nome.rsplit('-', 1)[1])
+        numeros = list(
+            Cliente.objects.filter(estabelecimento=estabelecimento).values_list('celular', flat=True)[:celulares]
+        )
+        sessoes.append(Sessao(estabelecimento, gestor_username(prefixo, indice), senha, numeros))
+    return sessoes
+
+
+def _login(cliente, sessao):
+    status, corpo, _ = cliente.request(
+        'POST', '/api/token/', data={'username': sessao.username, 'password': sessao.senha}
+    )
+    if status != 200:
+        raise RuntimeError(f"Login de {sessao.username} falhou ({status}): {corpo}")
+    return corpo['access']
+
+
+def _usuarios_crud(cliente, sessao, rng, medir):
+    username = f'{sessao.username}-tmp-{rng.getrandbits(40):010x}'
+    status, corpo = medir('usuarios_criar', 'POST', '/api/usuarios/users/', {
+        'username': username, 'password': 'senha-temporaria-123',
+        'email': f'{username}@example.com', 'perfil': {'papel': Perfil.GARCOM},
+    })
+    if status != 201:
+        return
+    url = f"/api/usuarios/users/{corpo['id']}/"
+    medir('usuarios_detalhe', 'GET', url)
+    medir('usuarios_atualizar', 'PATCH', url, {'email': f'novo-{username}@example.com'})
+    medir('usuarios_excluir', 'DELETE', url)
+
+
+# nome -> (rotas medidas: (cenário, método, rota do /metrics), função(cliente, sessão, rng, medir))
+CENARIOS = {
+    'login': (
+        [('login', 'POST', 'token_obtain_pair')],
+        lambda cliente, sessao, rng, medir: medir(
+            'login', 'POST', '/api/token/', {'username': sessao.username, 'password': sessao.senha}, autenticar=False
+        ),
+    ),
+    'cardapio_itens': (
+        [('cardapio_itens', 'GET', 'itemcardapio-list')],
+        lambda cliente, sessao, rng, medir: medir('cardapio_itens', 'GET', '/api/cardapio/itens/'),
+    ),
+    'cardapio_categorias': (
+        [('cardapio_categorias', 'GET', 'categoria-list')],
+        lambda cliente, sessao, rng, medir: medir('cardapio_categorias', 'GET', '/api/cardapio/categorias/'),
+    ),
+    'mesas': (
+        [('mesas', 'GET', 'mesas-list')],
+        lambda cliente, sessao, rng, medir: medir('mesas', 'GET', '/api/mesa/'),
+    ),
+    'cliente_detalhe': (
+        [('cliente_detalhe', 'GET', 'clientes-detail')],
+        lambda cliente, sessao, rng, medir: medir(
+            'cliente_detalhe', 'GET', f'/api/clientes/{rng.choice(sessao.celulares)}/'
+        ),
+    ),
+    'usuarios': (
+        [
+            ('usuarios_criar', 'POST', 'user-list'), ('usuarios_detalhe', 'GET', 'user-detail'),
+            ('usuarios_atualizar', 'PATCH', 'user-detail'), ('usuarios_excluir', 'DELETE', 'user-detail'),
+        ],
+        _usuarios_crud,
+    ),
+}
+
+
+class Amostras:
+    """ Latências (s), status e consultas por requisição de um cenário. """
+
+    def __init__(self):
+        self.latencias = []
+        self.consultas = []
+        self.erros = 0
+
+    def add(self, latencia, status, consultas=None):
+        self.latencias.append(latencia)
+        if status >= 400:
+            self.erros += 1
+        if consultas is not None:
+            self.consultas.append(consultas)
+
+
+def percentile(ordenados, p):
+    """ Percentil por posto mais próximo (nearest-rank); `ordenados` em ordem crescente. """
+    if not ordenados:
+        return None
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def summarize(amostras):
+    ordenados = sorted(amostras.latencias)
+    total = len(ordenados)
+
+    def ms(valor):
+        return None if valor is None else round(valor * 1000, 3)
+
+    return {
+        'requisicoes': total,
+        'erros': amostras.erros,
+        'p50_ms': ms(percentile(ordenados, 50)),
+        'p95_ms': ms(percentile(ordenados, 95)),
+        'p99_ms': ms(percentile(ordenados, 99)),
+        'media_ms': ms(sum(ordenados) / total) if total else None,
+        'max_ms': ms(ordenados[-1]) if total else None,
+        'consultas_por_requisicao': (
+            round(sum(amostras.consultas) / len(amostras.consultas), 2) if amostras.consultas else None
+        ),
+    }
+
+
+# --- Clientes -------------------------------------------------------------------------------
+
+class InProcessClient:
+    """ APIClient do DRF no próprio processo; conta as consultas de cada requisição. """
+
+    def __init__(self):
+        self.client = APIClient()
+
+    def request(self, method, path, data=None, token=None):
+        metricas = RequestMetrics()
+        extra = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metricas))
+            response = self.client.generic(
+                method, path, json.dumps(data) if data is not None else '', content_type='application/json', **extra
+            )
+        corpo = response.json() if response.content and 'json' in response.get('Content-Type', '') else None
+        return response.status_code, corpo, metricas.queries
+
+
+class HTTPClient:
+    """ Cliente HTTP mínimo (http.client); uma conexão por requisição, como um navegador sem keep-alive. """
+
+    def __init__(self, base_url, timeout=30):
+        partes = urlsplit(base_url)
+        self.host, self.port, self.timeout = partes.hostname, partes.port or 80, timeout
+
+    def request(self, method, path, data=None, token=None):
+        conexao = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        try:
+            conexao.request(method, path, body=json.dumps(data) if data is not None else None, headers=headers)
+            response = conexao.getresponse()
+            conteudo = response.read()
+        finally:
+            conexao.close()
+        tipo = response.getheader('Content-Type') or ''
+        corpo = json.loads(conteudo) if conteudo and 'json' in tipo else None
+        return response.status, corpo, None
+
+
+_DB_QUERIES = re.compile(
+    r'^karibu_db_queries_per_request_(sum|count)\{method="([^"]+)",route="([^"]+)"\} (\S+)$', re.MULTILINE
+)
+
+
+def scrape_db_queries(cliente, token=None):
+    """ {(método, rota): [soma, contagem]} do histograma de consultas exposto em /metrics. """
+    conexao = http.client.HTTPConnection(cliente.host, cliente.port, timeout=cliente.timeout)
+    try:
+        conexao.request('GET', '/metrics', headers={'Authorization': f'Bearer {token}'} if token else {})
+        response = conexao.getresponse()
+        texto = response.read().decode()
+    finally:
+        conexao.close()
+    if response.status != 200:
+        return {}
+    series = {}
+    for tipo, metodo, rota, valor in _DB_QUERIES.findall(texto):
+        series.setdefault((metodo, rota), [0.0, 0.0])[0 if tipo == 'sum' else 1] = float(valor)
+    return series
+
+
+def run_scenario(nome, clientes, sessoes, operacoes, concorrencia=1, semente=0):
+    """
+    Executa `operacoes` vezes o cenário `nome`, alternando estabelecimentos e clientes.
+    Com concorrencia > 1 as operações são distribuídas num pool de threads (modo servidor).
+    Retorna ({nome medido: Amostras}, duração total em segundos).
+    """
+    _, funcao = CENARIOS[nome]
+    amostras = {}
+    lock = threading.Lock()
+
+    def operacao(numero):
+        rng = random.Random(semente * 1_000_003 + numero)
+        sessao = sessoes[numero % len(sessoes)]
+        cliente = clientes[numero % len(clientes)]
+
+        def medir(rotulo, method, path, data=None, autenticar=True):
+            inicio = time.perf_counter()
+            status, corpo, consultas = cliente.request(method, path, data, sessao.token if autenticar else None)
+            latencia = time.perf_counter() - inicio
+            with lock:
+                amostras.setdefault(rotulo, Amostras()).add(latencia, status, consultas)
+            return status, corpo
+
+        funcao(cliente, sessao, rng, medir)
+
+    inicio = time.perf_counter()
+    if concorrencia > 1:
+        with ThreadPoolExecutor(max_workers=concorrencia) as pool:
+            list(pool.map(operacao, range(operacoes)))
+    else:
+        for numero in range(operacoes):
+            operacao(numero)
+    return amostras, time.perf_counter() - inicio
+
+
+def authenticate(clientes, sessoes):
+    for numero, sessao in enumerate(sessoes):
+        sessao.token = _login(clientes[numero % len(clientes)], sessao)
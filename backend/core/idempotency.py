@@ -0,0 +1,115 @@
+# backend/core/idempotency.py
+
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import ChaveIdempotencia
+
+
+class IdempotencyKeyInUse(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Uma requisição com esta Idempotency-Key ainda está sendo processada."
+    default_code = 'idempotency_key_in_use'
+
+
+class IdempotencyKeyMismatch(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "Esta Idempotency-Key já foi usada com outra requisição."
+    default_code = 'idempotency_key_mismatch'
+
+
+def _ttl():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
+
+def _lock_timeout():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT', 60))
+
+
+def request_signature(request):
+    """
+    SHA-256 de método + caminho + corpo. Em uploads multipart o corpo bruto traz um boundary
+    diferente a cada envio: assina os campos já interpretados e o SHA-256 de cada arquivo.
+    """
+    django_request = request._request
+    digest = hashlib.sha256(f"{request.method} {django_request.get_full_path()}\n".encode('utf-8'))
+    if django_request.META.get('CONTENT_TYPE', '').startswith('multipart/'):
+        campos = sorted(request.POST.lists())
+        arquivos = [
+            (nome, [(arquivo.name, arquivo.size, _file_digest(arquivo)) for arquivo in lista])
+            for nome, lista in sorted(request.FILES.lists())
+        ]
+        digest.update(json.dumps([campos, arquivos], ensure_ascii=False).encode('utf-8'))
+    else:
+        digest.update(django_request.body)
+    return digest.hexdigest()
+
+
+def _file_digest(arquivo):
+    # Em blocos: o upload pode estar num arquivo temporário grande demais para a memória.
+    digest = hashlib.sha256()
+    for bloco in arquivo.chunks():
+        digest.update(bloco)
+    arquivo.seek(0)
+    return digest.hexdigest()
+
+
+def reserve(estabelecimento_id, chave, assinatura):
+    """
+    Uma consulta pelo índice (estabelecimento, chave). Retorna o registro concluído
+    (a resposta deve ser repetida) ou None depois de reservar a chave para esta requisição.
+    """
+    agora = timezone.now()
+    registro = ChaveIdempotencia.objects.filter(estabelecimento_id=estabelecimento_id, chave=chave).first()
+
+    if registro is not None:
+        abandonado = registro.status_code is None and registro.data_criacao < agora - _lock_timeout()
+        if registro.expira_em <= agora or abandonado:
+            registro.delete()
+            registro = None
+        elif registro.assinatura != assinatura:
+            raise IdempotencyKeyMismatch()
+        elif registro.status_code is None:
+            raise IdempotencyKeyInUse()
+        else:
+            return registro
+
+    try:
+        with transaction.atomic():
+            ChaveIdempotencia.objects.create(
+                estabelecimento_id=estabelecimento_id, chave=chave,
+                assinatura=assinatura, expira_em=agora + _ttl(),
+            )
+    except IntegrityError:
+        # Outra requisição com a mesma chave reservou-a entre a consulta e o INSERT.
+        raise IdempotencyKeyInUse()
+    return None
+
+
+def complete(estabelecimento_id, chave, response):
+    """ Guarda a resposta de sucesso; em caso de erro libera a chave para uma nova tentativa. """
+    registros = ChaveIdempotencia.objects.filter(estabelecimento_id=estabelecimento_id, chave=chave)
+    if status.is_success(response.status_code):
+        registros.update(
+            status_code=response.status_code,
+            resposta=json.dumps(getattr(response, 'data', None), cls=JSONEncoder),
+        )
+    else:
+        registros.delete()
+
+
+def release(estabelecimento_id, chave):
+    """ Libera a chave reservada para que o cliente possa tentar de novo. """
+    ChaveIdempotencia.objects.filter(estabelecimento_id=estabelecimento_id, chave=chave, status_code__isnull=True).delete()
+
+
+def stored_data(registro):
+    return json.loads(registro.resposta) if registro.resposta else None
@@ -0,0 +1,196 @@
+# backend/core/images.py
+
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.db.models import Q
+from django.db.models.signals import post_save
+from django.dispatch import Signal
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Enviado quando os derivados de uma imagem ficam prontos (sender = modelo, pk = objeto).
+# A gravação é um UPDATE direto, então post_save não dispara: quem mantém caches
+# derivados do objeto (ex.: snapshot do cardápio) escuta este sinal.
+derivatives_ready = Signal()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Incrementar quando a forma de gerar os derivados mudar (formato, reamostragem...).
+DERIVATIVE_FORMAT_VERSION = 1
+
+# (modelo, campo) registrados via track_image_derivatives; usado pelo comando generate_image_derivatives.
+_tracked = []
+
+
+def image_sizes():
+    """ {'pequena': 160, ...}: nome do tamanho -> lado máximo em pixels. """
+    return getattr(settings, 'IMAGE_DERIVATIVE_SIZES', {'pequena': 160, 'media': 480, 'grande': 1024})
+
+
+def derivatives_field_name(image_field):
+    """ JSONField que guarda os derivados de `image_field` (ex.: 'imagem' -> 'imagem_derivados'). """
+    return f'{image_field}_derivados'
+
+
+def derivative_name(digest, lado, qualidade):
+    """
+    Nome do arquivo derivado: hash do conteúdo original + versão do formato + qualidade + lado.
+    Uploads idênticos (mesmo conteúdo, qualquer nome ou estabelecimento) compartilham os
+    mesmos arquivos; mudar a qualidade ou DERIVATIVE_FORMAT_VERSION muda o nome, então
+    `generate_image_derivatives --todos` gera arquivos novos em vez de reaproveitar os antigos.
+    """
+    return f'derivados/{digest[:2]}/{digest}_v{DERIVATIVE_FORMAT_VERSION}_q{qualidade}_{lado}.webp'
+
+
+def derivative_urls(arquivo, derivados, build_url=None):
+    """
+    URLs por tamanho para o arquivo de um ImageField:
+        {'original': ..., 'pequena': ..., 'media': ..., 'grande': ..., 'pendente': False}
+    Enquanto os derivados do arquivo atual não existem (ou se a geração falhou), cada
+    tamanho aponta para o original. Retorna None se não houver imagem.
+    """
+    if not arquivo:
+        return None
+    build_url = build_url or (lambda url: url)
+    derivados = derivados or {}
+    prontos = derivados.get('origem') == arquivo.name
+    urls = {'original': build_url(arquivo.url)}
+    for tamanho in image_sizes():
+        nome = derivados.get(tamanho) if prontos else None
+        urls[tamanho] = build_url(arquivo.storage.url(nome)) if nome else urls['original']
+    urls['pendente'] = not prontos
+    return urls
+
+
+def _max_pixels():
+    return getattr(settings, 'IMAGE_MAX_PIXELS', 40_000_000)
+
+
+def _render_webp(conteudo, lado, qualidade):
+    limite = _max_pixels()
+    with Image.open(io.BytesIO(conteudo)) as imagem:
+        # Image.open só leu o cabeçalho: recusa antes de decodificar os pixels. O global
+        # Image.MAX_IMAGE_PIXELS não é alterado: ele vale para todo uso do Pillow no processo.
+        if imagem.width * imagem.height > limite:
+            raise ValueError(f"Imagem com {imagem.width}x{imagem.height} pixels excede IMAGE_MAX_PIXELS ({limite}).")
+        # Fotos de celular vêm giradas via EXIF; o WebP gerado não carrega EXIF.
+        imagem = ImageOps.exif_transpose(imagem)
+        if imagem.mode not in ('RGB', 'RGBA'):
+            transparente = 'A' in imagem.getbands() or 'transparency' in imagem.info
+            imagem = imagem.convert('RGBA' if transparente else 'RGB')
+        imagem.thumbnail((lado, lado), Image.Resampling.LANCZOS)
+        saida = io.BytesIO()
+        imagem.save(saida, 'WEBP', quality=qualidade, method=4)
+        return saida.getvalue()
+
+
+def generate_derivatives(model, pk, image_field, nome):
+    """
+    Gera os derivados WebP do arquivo `nome` e os grava no objeto, desde que ele ainda
+    aponte para esse arquivo (um upload mais novo pode ter chegado enquanto isso).
+    Arquivos derivados já existentes (mesmo conteúdo) são reaproveitados.
+    Retorna True se o objeto foi atualizado.
+    """
+    storage = model._meta.get_field(image_field).storage
+    derivados = {}
+    if nome:
+        derivados['origem'] = nome
+        try:
+            with storage.open(nome, 'rb') as arquivo:
+                conteudo = arquivo.read()
+            digest = hashlib.sha256(conteudo).hexdigest()
+            qualidade = getattr(settings, 'IMAGE_DERIVATIVE_QUALITY', 80)
+            for tamanho, lado in image_sizes().items():
+                destino = derivative_name(digest, lado, qualidade)
+                if not storage.exists(destino):
+                    # O nome vem do conteúdo original: o storage endereçado por conteúdo não deve rehasheá-lo.
+                    salvar = getattr(storage, 'save_derived', storage.save)
+                    destino = salvar(destino, ContentFile(_render_webp(conteudo, lado, qualidade)))
+                derivados[tamanho] = destino
+        except Exception:
+            # Arquivo ausente, que não é uma imagem válida ou grande demais: registra a tentativa para não
+            # repeti-la a cada save; a API continua servindo o original.
+            logger.exception("Falha ao gerar derivados de %s (%s pk=%s)", nome, model._meta.label, pk)
+            derivados = {'origem': nome, 'erro': True}
+
+    mesmo_arquivo = Q(**{image_field: nome}) if nome else Q(**{image_field: ''}) | Q(**{f'{image_field}__isnull': True})
+    atualizados = model._default_manager.filter(mesmo_arquivo, pk=pk).update(**{
+        derivatives_field_name(image_field): derivados,
+        'data_atualizacao': timezone.now(),
+    })
+    if atualizados:
+        derivatives_ready.send(sender=model, pk=pk)
+    return bool(atualizados)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', 2),
+                thread_name_prefix='karibu-imagens',
+            )
+    return _executor
+
+
+def _run_job(model, pk, image_field, nome):
+    try:
+        generate_derivatives(model, pk, image_field, nome)
+    except Exception:
+        logger.exception("Falha ao gravar derivados de %s pk=%s", model._meta.label, pk)
+    finally:
+        # Threads do pool abrem as próprias conexões; não as deixe penduradas.
+        connections.close_all()
+
+
+def schedule_derivatives(model, pk, image_field, nome):
+    """
+    Enfileira a geração no pool de threads do processo. Com IMAGE_DERIVATIVES_ASYNC = False
+    a geração roda na hora (testes, scripts). Jobs perdidos num reinício do processo são
+    recuperados por `manage.py generate_image_derivatives`.
+    """
+    if not getattr(settings, 'IMAGE_DERIVATIVES_ASYNC', True):
+        generate_derivatives(model, pk, image_field, nome)
+        return
+    _get_executor().submit(_run_job, model, pk, image_field, nome)
+
+
+def needs_derivatives(instance, image_field):
+    arquivo = getattr(instance, image_field)
+    derivados = getattr(instance, derivatives_field_name(image_field)) or {}
+    return derivados.get('origem', '') != (arquivo.name or '')
+
+
+def track_image_derivatives(model, image_field):
+    """
+    Gera derivados de `model.<image_field>` em segundo plano sempre que o arquivo muda.
+    O modelo precisa de um JSONField `<image_field>_derivados` e de `data_atualizacao`,
+    que é atualizado junto para que ETag e sincronização incremental percebam a mudança.
+    """
+    label = model._meta.label_lower
+
+    def enqueue(sender, instance, raw=False, **kwargs):
+        if raw or not needs_derivatives(instance, image_field):
+            return
+        nome = getattr(instance, image_field).name or ''
+        # Só depois do commit: a thread do pool usa outra conexão e precisa enxergar a linha.
+        transaction.on_commit(partial(schedule_derivatives, sender, instance.pk, image_field, nome))
+
+    post_save.connect(enqueue, sender=model, weak=False, dispatch_uid=f'derivados:{label}:{image_field}')
+    _tracked.append((model, image_field))
+
+
+def tracked_image_fields():
+    return list(_tracked)
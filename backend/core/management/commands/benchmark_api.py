@@ -0,0 +1,204 @@
+# backend/core/management/commands/benchmark_api.py
+
+import json
+import os
+import platform
+import secrets
+import socket
+import subprocess
+import sys
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from core.benchmark import (
+    CENARIOS, PREFIXO_PADRAO, SENHA_PADRAO, HTTPClient, InProcessClient, authenticate, load_sessions,
+    run_scenario, scrape_db_queries, summarize,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede os principais endpoints (login, cardápio, mesas, busca de cliente e CRUD de usuários) "
+        "sobre os dados do seed_tenants e emite p50/p95/p99, throughput e consultas por requisição "
+        "em JSON, para comparar commits. --modo processo usa o APIClient do DRF (sem rede, consultas "
+        "exatas); --modo servidor sobe --workers processos runserver (ou usa --url) e dispara "
+        "--concorrencia clientes HTTP simultâneos; as consultas vêm do /metrics de cada worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modo', choices=('processo', 'servidor'), default='processo')
+        parser.add_argument('--cenarios', nargs='+', choices=list(CENARIOS), default=list(CENARIOS))
+        parser.add_argument('--operacoes', type=int, default=200, help="Operações medidas por cenário (padrão: 200).")
+        parser.add_argument(
+            '--operacoes-login', type=int, default=20,
+            help="Operações do cenário login, dominado pelo hash de senha (padrão: 20).",
+        )
+        parser.add_argument('--aquecimento', type=int, default=5, help="Operações descartadas por cenário (padrão: 5).")
+        parser.add_argument('--prefixo', default=PREFIXO_PADRAO, help="Prefixo usado no seed_tenants.")
+        parser.add_argument('--senha', default=SENHA_PADRAO, help="Senha usada no seed_tenants.")
+        parser.add_argument('--estabelecimentos', type=int, default=10, help="Estabelecimentos alternados (padrão: 10).")
+        parser.add_argument('--workers', type=int, default=4, help="[servidor] Processos servidores (padrão: 4).")
+        parser.add_argument('--concorrencia', type=int, default=8, help="[servidor] Clientes simultâneos (padrão: 8).")
+        parser.add_argument('--porta', type=int, default=8765, help="[servidor] Primeira porta local (padrão: 8765).")
+        parser.add_argument(
+            '--url', action='append',
+            help="[servidor] Servidor já em execução (repetível); com ele nenhum processo é iniciado. "
+                 "Deve usar o mesmo banco deste comando.",
+        )
+        parser.add_argument('--semente', type=int, default=0, help="Semente das escolhas aleatórias (padrão: 0).")
+        parser.add_argument('--saida', help="Grava o JSON neste arquivo em vez da saída padrão.")
+
+    def handle(self, *args, **options):
+        for opcao in ('operacoes', 'operacoes_login', 'estabelecimentos', 'workers', 'concorrencia'):
+            if options[opcao] < 1:
+                raise CommandError(f"--{opcao.replace('_', '-')} deve ser positivo.")
+
+        sessoes = load_sessions(options['prefixo'], options['estabelecimentos'], options['senha'])
+        if not sessoes:
+            raise CommandError(
+                f"Nenhum estabelecimento '{options['prefixo']}-*' encontrado; rode antes "
+                f"'python manage.py seed_tenants 10 --prefixo {options['prefixo']}'."
+            )
+
+        if options['modo'] == 'processo':
+            # O APIClient usa o host 'testserver'.
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                cenarios = self.run_all([InProcessClient()], sessoes, options, concorrencia=1)
+            workers = concorrencia = 1
+        else:
+            processos = []
+            # /metrics exige METRICS_TOKEN fora do DEBUG: os servidores iniciados aqui recebem
+            # um token próprio quando as configurações não definem um.
+            metricas = getattr(settings, 'METRICS_TOKEN', None) or (None if options['url'] else secrets.token_urlsafe())
+            try:
+                urls = options['url'] or self.start_servers(options['workers'], options['porta'], processos, metricas)
+                clientes = [HTTPClient(url) for url in urls]
+                cenarios = self.run_all(clientes, sessoes, options, concorrencia=options['concorrencia'], metricas=metricas)
+            finally:
+                for processo in processos:
+                    processo.terminate()
+                for processo in processos:
+                    processo.wait(timeout=10)
+            workers, concorrencia = len(urls), options['concorrencia']
+
+        resultado = {
+            'versao': self.git_revision(),
+            'data': timezone.now().isoformat(),
+            'modo': options['modo'],
+            'ambiente': {
+                'python': platform.python_version(), 'django': django.get_version(),
+                'banco': connection.vendor, 'workers': workers, 'concorrencia': concorrencia,
+            },
+            'parametros': {
+                chave: options[chave]
+                for chave in ('operacoes', 'operacoes_login', 'aquecimento', 'estabelecimentos', 'prefixo', 'semente')
+            },
+            'cenarios': cenarios,
+        }
+        saida = json.dumps(resultado, indent=2, ensure_ascii=False)
+        if options['saida']:
+            with open(options['saida'], 'w', encoding='utf-8') as arquivo:
+                arquivo.write(saida + '\n')
+            self.stderr.write(f"Resultado gravado em {options['saida']}.")
+        else:
+            self.stdout.write(saida)
+
+    def run_all(self, clientes, sessoes, options, concorrencia, metricas=None):
+        authenticate(clientes, sessoes)
+        cenarios = {}
+        for nome in options['cenarios']:
+            operacoes = options['operacoes_login'] if nome == 'login' else options['operacoes']
+            if options['aquecimento']:
+                run_scenario(nome, clientes, sessoes, options['aquecimento'], concorrencia, semente=-1 - options['semente'])
+
+            antes = self.scrape(clientes, metricas)
+            amostras, duracao = run_scenario(nome, clientes, sessoes, operacoes, concorrencia, options['semente'])
+            depois = self.scrape(clientes, metricas)
+
+            requisicoes = {}
+            for rotulo, metodo, rota in CENARIOS[nome][0]:
+                if rotulo not in amostras:
+                    continue
+                resumo = requisicoes[rotulo] = summarize(amostras[rotulo])
+                if resumo['consultas_por_requisicao'] is None and antes is not None:
+                    resumo['consultas_por_requisicao'] = self.queries_delta(antes, depois, metodo, rota)
+            total = sum(resumo['requisicoes'] for resumo in requisicoes.values())
+            cenarios[nome] = {
+                'operacoes': operacoes,
+                'duracao_s': round(duracao, 3),
+                'throughput_rps': round(total / duracao, 2) if duracao > 0 else None,
+                'requisicoes': requisicoes,
+            }
+        return cenarios
+
+    @staticmethod
+    def scrape(clientes, token):
+        """ Soma das séries de consultas do /metrics de todos os servidores (None no modo processo). """
+        if not isinstance(clientes[0], HTTPClient):
+            return None
+        total = {}
+        for cliente in clientes:
+            for chave, (soma, contagem) in scrape_db_queries(cliente, token).items():
+                acumulado = total.setdefault(chave, [0.0, 0.0])
+                acumulado[0] += soma
+                acumulado[1] += contagem
+        return total
+
+    @staticmethod
+    def queries_delta(antes, depois, metodo, rota):
+        soma_antes, contagem_antes = antes.get((metodo, rota), (0.0, 0.0))
+        soma_depois, contagem_depois = depois.get((metodo, rota), (0.0, 0.0))
+        if contagem_depois <= contagem_antes:
+            return None
+        return round((soma_depois - soma_antes) / (contagem_depois - contagem_antes), 2)
+
+    def start_servers(self, workers, porta, processos, metricas=None):
+        """
+        Um 'runserver --noreload' por worker, cada um na sua porta: processos independentes,
+        com cache local e conexões próprias, como os workers de um servidor prefork.
+        """
+        manage = os.path.join(settings.BASE_DIR, 'manage.py')
+        ambiente = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'karibu.settings')}
+        if metricas:
+            ambiente['METRICS_TOKEN'] = metricas
+        urls = []
+        for numero in range(workers):
+            endereco = f'127.0.0.1:{porta + numero}'
+            processos.append(subprocess.Popen(
+                [sys.executable, manage, 'runserver', endereco, '--noreload', '--skip-checks'],
+                env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            ))
+            urls.append(f'http://{endereco}')
+        for processo, numero in zip(processos, range(workers)):
+            self.wait_for_port(processo, porta + numero)
+        return urls
+
+    @staticmethod
+    def wait_for_port(processo, porta, timeout=30):
+        limite = time.monotonic() + timeout
+        while time.monotonic() < limite:
+            if processo.poll() is not None:
+                raise CommandError(f"O servidor na porta {porta} terminou com código {processo.returncode}.")
+            try:
+                socket.create_connection(('127.0.0.1', porta), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"O servidor na porta {porta} não respondeu em {timeout}s.")
+
+    @staticmethod
+    def git_revision():
+        try:
+            resultado = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, timeout=5,
+            )
+        except (OSError, subprocess.SubprocessError):
+            return None
+        return resultado.stdout.strip() or None
@@ -0,0 +1,92 @@
+# backend/core/management/commands/benchmark_renderers.py
+
+import json
+import time
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from cardapio.models import Categoria, ItemCardapio
+from cardapio.serializers import ItemCardapioSerializer
+from cliente.models import Cliente
+from cliente.serializers import ClienteSerializer
+from configuracao.models import Estabelecimento
+from core.renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara o tempo de renderização e o tamanho das respostas do cardápio e de clientes "
+        "com o JSONRenderer do DRF, o FastJSONRenderer (orjson) e o MessagePackRenderer. "
+        "Usa objetos em memória: não acessa o banco."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=500, help="Objetos por payload (padrão: 500).")
+        parser.add_argument('--repeticoes', type=int, default=50, help="Renderizações por medição (padrão: 50).")
+        parser.add_argument('--json', action='store_true', help="Emite o resultado como JSON.")
+
+    def payloads(self, linhas):
+        agora = timezone.now()
+        estabelecimento = Estabelecimento(id=uuid.uuid4(), nome="Karibu Benchmark")
+        categoria = Categoria(id=1, estabelecimento=estabelecimento, nome="Pratos")
+        itens = [
+            ItemCardapio(
+                id=i, estabelecimento=estabelecimento, categoria=categoria, nome=f"Item {i}",
+                descricao="Arroz, feijão, farofa e salada " * 2, preco=Decimal("39.90") + i,
+                ordem=i, data_criacao=agora, data_atualizacao=agora,
+            )
+            for i in range(linhas)
+        ]
+        clientes = [
+            Cliente(
+                id=uuid.uuid4(), estabelecimento=estabelecimento, celular=f"1199{i:07d}",
+                nome_completo=f"Cliente {i}", data_nascimento=date(1990, 1, 1 + i % 28),
+                logradouro="Rua das Flores", numero=str(i), bairro="Centro", cidade="São Paulo",
+                estado="SP", cep="01000-000",
+            )
+            for i in range(linhas)
+        ]
+        return {
+            'cardapio': ItemCardapioSerializer(itens, many=True).data,
+            'cliente': ClienteSerializer(clientes, many=True).data,
+        }
+
+    def handle(self, *args, **options):
+        renderers = {'drf-json': JSONRenderer()}
+        if orjson is not None:
+            renderers['orjson'] = FastJSONRenderer()
+        if msgpack is not None:
+            renderers['msgpack'] = MessagePackRenderer()
+
+        resultados = []
+        for nome_payload, dados in self.payloads(options['linhas']).items():
+            for nome_renderer, renderer in renderers.items():
+                corpo = renderer.render(dados)
+                inicio = time.perf_counter()
+                for _ in range(options['repeticoes']):
+                    renderer.render(dados)
+                decorrido = (time.perf_counter() - inicio) / options['repeticoes']
+                resultados.append({
+                    'payload': nome_payload,
+                    'renderer': nome_renderer,
+                    'ms_por_resposta': round(decorrido * 1000, 3),
+                    'bytes': len(corpo),
+                })
+
+        if options['json']:
+            self.stdout.write(json.dumps(resultados, indent=2))
+            return
+
+        self.stdout.write(f"{'payload':<10} {'renderer':<10} {'ms/resposta':>12} {'bytes':>10}")
+        for resultado in resultados:
+            self.stdout.write(
+                f"{resultado['payload']:<10} {resultado['renderer']:<10} "
+                f"{resultado['ms_por_resposta']:>12} {resultado['bytes']:>10}"
+            )
+        if msgpack is None:
+            self.stdout.write(self.style.WARNING("msgpack não instalado: MessagePack não foi medido."))
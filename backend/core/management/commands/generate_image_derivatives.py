@@ -0,0 +1,25 @@
+# backend/core/management/commands/generate_image_derivatives.py
+
+from django.core.management.base import BaseCommand
+
+from core.images import derivatives_field_name, generate_derivatives, needs_derivatives, tracked_image_fields
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera as miniaturas WebP que faltam (imagens anteriores ao pipeline ou jobs perdidos "
+        "num reinício do processo). Roda de forma síncrona."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--todos', action='store_true', help="Regera também os derivados já existentes.")
+
+    def handle(self, *args, **options):
+        for model, image_field in tracked_image_fields():
+            objetos = model._default_manager.exclude(**{f'{image_field}__isnull': True}).exclude(**{image_field: ''})
+            objetos = objetos.only('pk', image_field, derivatives_field_name(image_field))
+            gerados = 0
+            for objeto in objetos.iterator():
+                if options['todos'] or needs_derivatives(objeto, image_field):
+                    gerados += generate_derivatives(model, objeto.pk, image_field, getattr(objeto, image_field).name)
+            self.stdout.write(self.style.SUCCESS(f"{model._meta.label}.{image_field}: {gerados} imagem(ns) processada(s)."))
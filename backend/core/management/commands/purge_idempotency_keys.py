@@ -0,0 +1,14 @@
+# backend/core/management/commands/purge_idempotency_keys.py
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import ChaveIdempotencia
+
+
+class Command(BaseCommand):
+    help = "Remove chaves de idempotência expiradas (ver IDEMPOTENCY_KEY_TTL)."
+
+    def handle(self, *args, **options):
+        removidas, _ = ChaveIdempotencia.objects.filter(expira_em__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f"{removidas} chave(s) de idempotência removida(s)."))
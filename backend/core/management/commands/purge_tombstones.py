@@ -0,0 +1,14 @@
+# backend/core/management/commands/purge_tombstones.py
+
+from django.core.management.base import BaseCommand
+
+from core.models import Tombstone
+from core.sync import tombstone_retention_start
+
+
+class Command(BaseCommand):
+    help = "Remove registros de exclusão (Tombstones) mais antigos que SYNC_TOMBSTONE_RETENTION_DAYS."
+
+    def handle(self, *args, **options):
+        removidos, _ = Tombstone.objects.filter(data_exclusao__lt=tombstone_retention_start()).delete()
+        self.stdout.write(self.style.SUCCESS(f"{removidos} tombstone(s) removido(s)."))
@@ -0,0 +1,55 @@
+# backend/core/management/commands/seed_tenants.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import PREFIXO_PADRAO, SENHA_PADRAO, clear_tenants, seed_tenants
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera estabelecimentos sintéticos (assinatura ativa, categorias, itens, mesas, clientes e "
+        "equipe) em bulk_create, para testes de carga e para o benchmark_api. Os dados são "
+        "reproduzíveis pela --semente; o gestor de cada um é '<prefixo>-NNNN-gestor'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('quantidade', type=int, help="Número de estabelecimentos a gerar.")
+        parser.add_argument('--prefixo', default=PREFIXO_PADRAO, help=f"Prefixo de nomes e usernames (padrão: {PREFIXO_PADRAO}).")
+        parser.add_argument('--categorias', type=int, default=8, help="Categorias por estabelecimento (padrão: 8).")
+        parser.add_argument('--itens-por-categoria', type=int, default=10, help="Itens por categoria (padrão: 10).")
+        parser.add_argument('--mesas', type=int, default=25, help="Mesas por estabelecimento (padrão: 25).")
+        parser.add_argument('--clientes', type=int, default=300, help="Clientes por estabelecimento (padrão: 300).")
+        parser.add_argument('--equipe', type=int, default=5, help="Funcionários além do gestor (padrão: 5).")
+        parser.add_argument('--senha', default=SENHA_PADRAO, help="Senha de todos os usuários gerados.")
+        parser.add_argument('--semente', type=int, default=0, help="Semente do gerador aleatório (padrão: 0).")
+        parser.add_argument('--lote', type=int, default=1000, help="Linhas por INSERT (padrão: 1000).")
+        parser.add_argument(
+            '--limpar', action='store_true',
+            help="Remove antes os estabelecimentos (e usuários) já gerados com o mesmo prefixo.",
+        )
+
+    def handle(self, *args, **options):
+        if options['quantidade'] < 1 or options['lote'] < 1:
+            raise CommandError("quantidade e --lote devem ser positivos.")
+        if '-' in options['prefixo']:
+            raise CommandError("O prefixo não pode conter '-'.")
+
+        if options['limpar']:
+            removidos = clear_tenants(options['prefixo'])
+            self.stdout.write(f"{removidos} estabelecimento(s) '{options['prefixo']}-*' removido(s).")
+
+        inicio = time.perf_counter()
+        criados = seed_tenants(
+            options['quantidade'], prefixo=options['prefixo'], categorias=options['categorias'],
+            itens_por_categoria=options['itens_por_categoria'], mesas=options['mesas'],
+            clientes=options['clientes'], equipe=options['equipe'], senha=options['senha'],
+            semente=options['semente'], lote=options['lote'],
+        )
+        decorrido = time.perf_counter() - inicio
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Gerado em {decorrido:.1f}s: " + ", ".join(f"{total} {modelo}" for modelo, total in criados.items()) + "."
+        ))
+        self.stdout.write(f"Gestores: {options['prefixo']}-NNNN-gestor (senha de --senha).")
@@ -0,0 +1,233 @@
+# backend/core/metrics.py
+
+import bisect
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+# Uma linha logfmt por requisição amostrada (ou lenta), ex.:
+#   metodo=GET rota=mesa-list status=200 duracao_ms=12.4 consultas=3 db_ms=1.9 bytes=2310 serializer_ms=0.7
+request_logger = logging.getLogger('karibu.requests')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Medições da requisição em andamento (contextvar: segue a requisição também sob ASGI).
+_current = ContextVar('karibu_request_metrics', default=None)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=''):
+    pares = [f'{nome}="{_escape(valor)}"' for nome, valor in zip(names, values)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+class Counter:
+    def __init__(self, name, documentation, labels=()):
+        self.name, self.documentation, self.labels = name, documentation, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        linhas = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            valores = sorted(self._values.items())
+        linhas += [f'{self.name}{_format_labels(self.labels, labels)} {valor}' for labels, valor in valores]
+        return linhas
+
+
+class Histogram:
+    """ Histograma no formato do Prometheus (buckets cumulativos na exposição). """
+
+    def __init__(self, name, documentation, buckets, labels=()):
+        self.name, self.documentation, self.labels = name, documentation, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [contagens por bucket (+Inf no fim), soma]
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        posicao = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            serie = self._series.get(label_values)
+            if serie is None:
+                serie = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][posicao] += 1
+            serie[1] += value
+
+    def render(self):
+        linhas = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, list(contagens), soma) for labels, (contagens, soma) in self._series.items())
+        for labels, contagens, soma in series:
+            acumulado = 0
+            for limite, contagem in zip(self.buckets + ('+Inf',), contagens):
+                acumulado += contagem
+                le = f'le="{limite}"'
+                linhas.append(f'{self.name}_bucket{_format_labels(self.labels, labels, le)} {acumulado}')
+            linhas.append(f'{self.name}_sum{_format_labels(self.labels, labels)} {soma}')
+            linhas.append(f'{self.name}_count{_format_labels(self.labels, labels)} {acumulado}')
+        return linhas
+
+
+# Métricas por processo: com vários workers, cada um expõe as próprias séries
+# (o Prometheus agrega; ou use um scrape por worker).
+REQUESTS = Counter('karibu_http_requests_total', "Requisições por rota e status.", ('method', 'route', 'status'))
+LATENCY = Histogram('karibu_http_request_duration_seconds', "Latência por rota.", LATENCY_BUCKETS, ('method', 'route'))
+DB_QUERIES = Histogram('karibu_db_queries_per_request', "Consultas SQL por requisição.", QUERY_BUCKETS, ('method', 'route'))
+DB_TIME = Histogram('karibu_db_duration_seconds', "Tempo em SQL por requisição.", LATENCY_BUCKETS, ('method', 'route'))
+SERIALIZER_TIME = Histogram(
+    'karibu_serializer_duration_seconds', "Tempo serializando a resposta.", LATENCY_BUCKETS, ('method', 'route')
+)
+RESPONSE_SIZE = Histogram('karibu_http_response_size_bytes', "Tamanho do corpo da resposta.", SIZE_BUCKETS, ('method', 'route'))
+
+ALL_METRICS = (REQUESTS, LATENCY, DB_QUERIES, DB_TIME, SERIALIZER_TIME, RESPONSE_SIZE)
+
+
+def render_metrics():
+    """ Todas as métricas no formato texto do Prometheus (text/plain; version=0.0.4). """
+    linhas = []
+    for metrica in ALL_METRICS:
+        linhas += metrica.render()
+    return '\n'.join(linhas) + '\n'
+
+
+class RequestMetrics:
+    """ Acumula as medições de uma requisição; também é o execute_wrapper das conexões. """
+    __slots__ = ('queries', 'db_time', 'serializer_time', 'serializer_depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - inicio
+            self.queries += 1
+
+
+class serializer_timer:
+    """
+    Context manager que soma ao tempo de serialização da requisição em andamento.
+    Serializers aninhados não contam duas vezes (só o nível mais externo mede).
+    """
+    __slots__ = ('metrics', 'inicio')
+
+    def __enter__(self):
+        self.metrics = _current.get()
+        if self.metrics is not None:
+            self.metrics.serializer_depth += 1
+            if self.metrics.serializer_depth == 1:
+                self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.metrics is not None:
+            self.metrics.serializer_depth -= 1
+            if self.metrics.serializer_depth == 0:
+                self.metrics.serializer_time += time.perf_counter() - self.inicio
+        return False
+
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'desconhecida'
+    return match.view_name or match.route
+
+
+def _record(request, response, duracao, metricas):
+    method, route = request.method, _route(request)
+    labels = (method, route)
+    REQUESTS.inc((method, route, str(response.status_code)))
+    LATENCY.observe(labels, duracao)
+    tamanho = None if response.streaming else len(response.content)
+    if tamanho is not None:
+        RESPONSE_SIZE.observe(labels, tamanho)
+    if metricas is not None:
+        DB_QUERIES.observe(labels, metricas.queries)
+        DB_TIME.observe(labels, metricas.db_time)
+        SERIALIZER_TIME.observe(labels, metricas.serializer_time)
+
+    duracao_ms = duracao * 1000
+    lenta = duracao_ms >= getattr(settings, 'METRICS_SLOW_REQUEST_MS', 500)
+    if lenta or random.random() < getattr(settings, 'METRICS_LOG_SAMPLE_RATE', 0.01):
+        campos = [
+            ('metodo', method), ('rota', route), ('status', response.status_code),
+            ('duracao_ms', f'{duracao_ms:.1f}'),
+        ]
+        if metricas is not None:
+            campos += [
+                ('consultas', metricas.queries), ('db_ms', f'{metricas.db_time * 1000:.1f}'),
+                ('serializer_ms', f'{metricas.serializer_time * 1000:.1f}'),
+            ]
+        campos.append(('bytes', tamanho if tamanho is not None else 'stream'))
+        request_logger.log(
+            logging.WARNING if lenta else logging.INFO,
+            ' '.join(f'{chave}={valor}' for chave, valor in campos),
+        )
+
+
+class MetricsMiddleware:
+    """
+    Mede cada requisição: latência, consultas SQL e tempo em SQL (connection.execute_wrapper),
+    tempo de serialização (ver core.serializers.TimedSerializerMixin) e tamanho da resposta.
+    Alimenta os histogramas expostos em /metrics e registra uma linha em 'karibu.requests'
+    para uma amostra das requisições (METRICS_LOG_SAMPLE_RATE) e para todas as lentas
+    (METRICS_SLOW_REQUEST_MS). Em views assíncronas (SSE) só a latência é medida, pois as
+    consultas rodam em outras threads. Desligado com METRICS_ENABLED = False.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metricas = RequestMetrics()
+        token = _current.set(metricas)
+        inicio = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metricas))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        _record(request, response, time.perf_counter() - inicio, metricas)
+        return response
+
+    async def __acall__(self, request):
+        inicio = time.perf_counter()
+        response = await self.get_response(request)
+        _record(request, response, time.perf_counter() - inicio, None)
+        return response
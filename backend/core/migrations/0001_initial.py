@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('configuracao', '0002_assinaturaestabelecimento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(help_text="Rótulo do modelo excluído (ex: 'mesa.mesa')", max_length=100)),
+                ('objeto_id', models.CharField(help_text='Identificador do objeto excluído, como exposto pela API', max_length=255)),
+                ('data_exclusao', models.DateTimeField(auto_now_add=True)),
+                ('estabelecimento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tombstones', to='configuracao.estabelecimento', verbose_name='Estabelecimento')),
+            ],
+            options={
+                'verbose_name': 'Registro de Exclusão',
+                'verbose_name_plural': 'Registros de Exclusão',
+                'indexes': [models.Index(fields=['estabelecimento', 'modelo', 'data_exclusao'], name='core_tombst_estabel_552004_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configuracao', '0002_assinaturaestabelecimento'),
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChaveIdempotencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=255)),
+                ('assinatura', models.CharField(max_length=64)),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('resposta', models.TextField(blank=True, default='')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True)),
+                ('expira_em', models.DateTimeField(db_index=True)),
+                ('estabelecimento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chaves_idempotencia', to='configuracao.estabelecimento', verbose_name='Estabelecimento')),
+            ],
+            options={
+                'verbose_name': 'Chave de Idempotência',
+                'verbose_name_plural': 'Chaves de Idempotência',
+                'unique_together': {('estabelecimento', 'chave')},
+            },
+        ),
+    ]
@@ -1,6 +1,268 @@
-from rest_framework import status
+import hashlib
+from itertools import islice
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Count, Max
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+from . import idempotency
+from .models import Tombstone
+from .sync import make_sync_token, next_sync_point, parse_since, tombstone_retention_start
+from .tenant import get_tenant
+
+
+class ConditionalGetMixin:
+    """
+    Mixin para ViewSets que responde GETs condicionais (ETag).
+    A listagem calcula apenas MAX(data_atualizacao) + COUNT(*) sobre o queryset filtrado,
+    mais MAX/COUNT das relações renderizadas pelo serializer (conditional_related_fields),
+    tudo em uma consulta; se o cliente já tem a versão atual, devolve 304 sem paginar nem
+    serializar nada. No detalhe, usa o data_atualizacao do próprio objeto (e das relações).
+    Não envia Last-Modified: só o MAX não percebe exclusões (nem alterações em relações),
+    então a revalidação é sempre pelo ETag, que inclui as contagens.
+    """
+    # Campo (ou caminho com '__') usado como carimbo de última alteração.
+    conditional_timestamp_field = 'data_atualizacao'
+    # Relações exibidas na resposta (ex.: 'categoria' para categoria_nome, 'itens'): o
+    # data_atualizacao delas e a contagem entram no ETag.
+    conditional_related_fields = ()
+
+    def _conditional_state(self, queryset):
+        """ Uma consulta: MAX/COUNT do modelo e de cada relação em conditional_related_fields. """
+        agregados = {
+            'ultima_alteracao': Max(self.conditional_timestamp_field),
+            # Relações reversas multiplicam as linhas do JOIN: conta PKs distintas.
+            'total': Count('pk', distinct=bool(self.conditional_related_fields)),
+        }
+        for indice, relacao in enumerate(self.conditional_related_fields):
+            agregados[f'relacao{indice}_alteracao'] = Max(f'{relacao}__data_atualizacao')
+            agregados[f'relacao{indice}_total'] = Count(relacao, distinct=True)
+        resumo = queryset.order_by().aggregate(**agregados)
+        return '|'.join(
+            valor.isoformat() if hasattr(valor, 'isoformat') else str(valor)
+            for _, valor in sorted(resumo.items())
+        )
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self._conditional_response(
+            request, self._conditional_state(queryset),
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        if self.conditional_related_fields:
+            estado = self._conditional_state(self.get_queryset().filter(pk=instance.pk))
+        else:
+            ultima_alteracao = instance
+            for attr in self.conditional_timestamp_field.split('__'):
+                ultima_alteracao = getattr(ultima_alteracao, attr, None)
+            estado = f"{ultima_alteracao.isoformat() if ultima_alteracao else ''}|{instance.pk}"
+        return self._conditional_response(
+            request, estado, lambda: Response(self.get_serializer(instance).data),
+        )
+
+    def _conditional_response(self, request, estado, build_response):
+        tenant = get_tenant(request)
+        # O ETag depende da URL (filtros/página), do usuário e do formato negociado,
+        # além do estado dos dados (últimas alterações + contagens/PK).
+        chave = '|'.join(str(parte) for parte in (
+            request.get_full_path(),
+            tenant.user_id,
+            getattr(request, 'accepted_media_type', ''),
+            estado,
+        ))
+        etag = quote_etag(hashlib.md5(chave.encode('utf-8')).hexdigest())
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = build_response()
+
+        response['ETag'] = etag
+        # Clientes podem guardar a resposta, mas devem sempre revalidar.
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+class DeltaSyncMixin:
+    """
+    Mixin para ViewSets que suporta sincronização incremental (tablets offline).
+    Toda listagem devolve o cabeçalho X-Sync-Token. Com ?since=<token ou ISO 8601>,
+    a resposta traz apenas o que mudou desde então, sem paginação:
+        {"sync_token": "...", "changed": [...], "deleted": ["<id>", ...]}
+    'deleted' vem dos Tombstones (core.sync.track_deletions); o cliente deve aplicar
+    as exclusões antes das alterações.
+    """
+    sync_timestamp_field = 'data_atualizacao'
+
+    def get_tombstone_queryset(self):
+        tenant = get_tenant(self.request)
+        queryset = Tombstone.objects.filter(modelo=self.get_queryset().model._meta.label_lower)
+        if not tenant.is_superuser:
+            queryset = queryset.filter(estabelecimento_id=tenant.estabelecimento_id)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        # O ponto de sincronização é tomado ANTES da consulta (ver core.sync.next_sync_point).
+        sync_token = make_sync_token(next_sync_point())
+        since_param = request.query_params.get('since')
+
+        if since_param is None:
+            response = super().list(request, *args, **kwargs)
+            response['X-Sync-Token'] = sync_token
+            return response
+
+        since = parse_since(since_param)
+        if since is None:
+            raise ValidationError({"since": "Token de sincronização ou data inválidos."})
+        if since < tombstone_retention_start():
+            return Response(
+                {"detail": "Token de sincronização expirado. Faça uma sincronização completa."},
+                status=status.HTTP_410_GONE,
+            )
+
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            **{f'{self.sync_timestamp_field}__gte': since}
+        )
+        deleted = self.get_tombstone_queryset().filter(data_exclusao__gte=since).values_list('objeto_id', flat=True)
+        response = Response({
+            'sync_token': sync_token,
+            'changed': self.get_serializer(queryset, many=True).data,
+            'deleted': list(deleted),
+        })
+        response['X-Sync-Token'] = sync_token
+        return response
+
+
+class StreamingListMixin:
+    """
+    Mixin para ViewSets com exportação em streaming da listagem completa.
+    ?stream=1 devolve um array JSON e ?stream=ndjson um objeto JSON por linha;
+    o queryset é percorrido com .iterator() e serializado em blocos de
+    stream_chunk_size linhas, então a memória do worker não cresce com o resultado.
+    """
+    stream_query_param = 'stream'
+    stream_chunk_size = 500
+
+    def list(self, request, *args, **kwargs):
+        modo = request.query_params.get(self.stream_query_param, '').lower()
+        if modo in ('', '0', 'false', 'no'):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if modo == 'ndjson':
+            return StreamingHttpResponse(self._stream_ndjson(queryset), content_type='application/x-ndjson')
+        return StreamingHttpResponse(self._stream_json_array(queryset), content_type='application/json')
+
+    def _stream_chunks(self, queryset):
+        linhas = queryset.iterator(chunk_size=self.stream_chunk_size)
+        while True:
+            bloco = list(islice(linhas, self.stream_chunk_size))
+            if not bloco:
+                return
+            yield self.get_serializer(bloco, many=True).data
+
+    def _stream_json_array(self, queryset):
+        encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+        yield '['
+        primeiro = True
+        for dados in self._stream_chunks(queryset):
+            # Cada bloco é um array; removemos os colchetes para emendá-los em um só.
+            corpo = encoder.encode(dados)[1:-1]
+            if not corpo:
+                continue
+            yield corpo if primeiro else ',' + corpo
+            primeiro = False
+        yield ']'
+
+    def _stream_ndjson(self, queryset):
+        encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+        for dados in self._stream_chunks(queryset):
+            yield ''.join(encoder.encode(linha) + '\n' for linha in dados)
+
+
+class SparseFieldsetMixin:
+    """
+    Mixin para ViewSets cujo serializer usa core.serializers.SparseFieldsetSerializerMixin:
+    com ?fields= / ?omit= em leituras, o queryset passa a buscar só as colunas e relações
+    dos campos pedidos. O recorte é aplicado em filter_queryset, que listagem, detalhe,
+    GET condicional, ?since= e exportação em streaming já usam.
+    """
+    # Sempre carregados quando existirem no modelo: usados por permissões, lookup e ETag.
+    sparse_always_fields = ('estabelecimento',)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        # Mesmo serializer (e contexto) que a listagem vai usar, já com os campos recortados.
+        serializer = self.get_serializer()
+        if not getattr(serializer, 'is_sparse', False):
+            return queryset
+
+        extra = []
+        for nome in (*self.sparse_always_fields, self.lookup_field, getattr(self, 'conditional_timestamp_field', '')):
+            try:
+                queryset.model._meta.get_field(nome)
+            except FieldDoesNotExist:
+                continue
+            extra.append(nome)
+        return serializer.restrict_queryset(queryset, extra=extra)
+
+
+class IdempotencyMixin:
+    """
+    Mixin para ViewSets que honra o cabeçalho Idempotency-Key em toda escrita
+    (POST/PUT/PATCH/DELETE, inclusive @actions). A primeira requisição com a chave
+    é executada e sua resposta de sucesso guardada por IDEMPOTENCY_KEY_TTL segundos,
+    por estabelecimento; reenvios recebem a mesma resposta (com Idempotent-Replayed: true)
+    ao custo de uma consulta indexada, sem repetir a escrita. Erros liberam a chave.
+    """
+    idempotency_header = 'HTTP_IDEMPOTENCY_KEY'
+
+    def initial(self, request, *args, **kwargs):
+        # Autenticação e permissões primeiro: a chave é sempre do tenant já validado.
+        super().initial(request, *args, **kwargs)
+        self._idempotency_key = None
+
+        chave = request.META.get(self.idempotency_header, '').strip()
+        tenant = get_tenant(request)
+        if not chave or request.method in permissions.SAFE_METHODS or not tenant.has_estabelecimento:
+            return
+        if len(chave) > 255:
+            raise ValidationError({"Idempotency-Key": "A chave deve ter no máximo 255 caracteres."})
+
+        registro = idempotency.reserve(tenant.estabelecimento_id, chave, idempotency.request_signature(request))
+        if registro is None:
+            self._idempotency_key = (tenant.estabelecimento_id, chave)
+            return
+
+        # Requisição repetida: troca o handler do método por um que devolve a resposta guardada.
+        replay = Response(idempotency.stored_data(registro), status=registro.status_code)
+        replay['Idempotent-Replayed'] = 'true'
+        setattr(self, request.method.lower(), lambda *args, **kwargs: replay)
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            # Exceções que o DRF não converte em resposta (erro 500) não passam por
+            # finalize_response: sem isto a chave ficaria presa até IDEMPOTENCY_LOCK_TIMEOUT.
+            chave = getattr(self, '_idempotency_key', None)
+            if chave is not None:
+                self._idempotency_key = None
+                idempotency.release(*chave)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        chave = getattr(self, '_idempotency_key', None)
+        if chave is not None:
+            self._idempotency_key = None
+            idempotency.complete(*chave, response)
+        return super().finalize_response(request, response, *args, **kwargs)
+
 
 class EstablishmentFilteredViewSet:
     """
@@ -9,22 +271,24 @@ class EstablishmentFilteredViewSet:
     """
 
     def get_queryset(self):
+        tenant = get_tenant(self.request)
+
         # Garante que o usuário está autenticado e tem um perfil.
-        if not self.request.user.is_authenticated:
+        if not tenant.is_authenticated:
             raise PermissionDenied("Usuário não autenticado.")
 
         # Superusuários (admins) podem ver todos os dados de todos os estabelecimentos.
-        if self.request.user.is_superuser:
+        if tenant.is_superuser:
             return super().get_queryset()
 
         # Usuários regulares só podem ver dados do seu próprio estabelecimento.
-        if not hasattr(self.request.user, 'perfil') or not self.request.user.perfil.estabelecimento:
+        if not tenant.has_estabelecimento:
             raise PermissionDenied("Seu perfil de usuário não está vinculado a um estabelecimento.")
 
         # Assume que o modelo tem um campo 'estabelecimento' ForeignKey
         # para o modelo Estabelecimento (através do Perfil).
         queryset = super().get_queryset().filter(
-            perfil__estabelecimento=self.request.user.perfil.estabelecimento
+            perfil__estabelecimento_id=tenant.estabelecimento_id
         )
         return queryset
 
@@ -32,23 +296,23 @@ class EstablishmentFilteredViewSet:
         """
         Ao criar um objeto, garante que ele seja vinculado ao estabelecimento do usuário logado.
         """
-        if not self.request.user.is_authenticated:
+        tenant = get_tenant(self.request)
+
+        if not tenant.is_authenticated:
             raise PermissionDenied("Usuário não autenticado para criar.")
 
-        if not self.request.user.is_superuser:
-            if not hasattr(self.request.user, 'perfil') or not self.request.user.perfil.estabelecimento:
+        if not tenant.is_superuser:
+            if not tenant.has_estabelecimento:
                 raise ValidationError({"detail": "Seu perfil de usuário não está vinculado a um estabelecimento."})
-            
-            user_establishment = self.request.user.perfil.estabelecimento
 
             # Para o UserSerializer, precisamos injetar o estabelecimento DENTRO do perfil_data.
-            # É crucial passar a INSTÂNCIA do objeto Estabelecimento, não apenas o ID.
             if 'perfil' not in serializer.validated_data:
                 serializer.validated_data['perfil'] = {}
-            
-            # Garante que o estabelecimento no perfil do novo usuário seja o mesmo do gerente
-            # Passa a instância completa do objeto Estabelecimento
-            serializer.validated_data['perfil']['estabelecimento'] = user_establishment
+
+            # Garante que o estabelecimento no perfil do novo usuário seja o mesmo do gerente.
+            # Usamos o ID vindo do TenantContext, sem carregar a instância do Estabelecimento.
+            serializer.validated_data['perfil'].pop('estabelecimento', None)
+            serializer.validated_data['perfil']['estabelecimento_id'] = tenant.estabelecimento_id
             
         # Para superusuários, o serializer.save() será chamado sem argumentos adicionais,
         # e o campo 'estabelecimento' (se aplicável) deve vir diretamente do request.data
@@ -60,12 +324,14 @@ class EstablishmentFilteredViewSet:
         """
         Ao atualizar um objeto, garante que o usuário não mude o estabelecimento e que o objeto pertence ao seu estabelecimento (já garantido por get_queryset).
         """
+        tenant = get_tenant(self.request)
+
         # A lógica de get_queryset já impede que o usuário acesse objetos de outros estabelecimentos.
         # Aqui, podemos adicionar uma validação extra se o campo 'estabelecimento' for alterável
         # no serializer e não quisermos que ele seja alterado após a criação por usuários comuns.
         
         # A validação precisa comparar a instância do Estabelecimento.
-        if not self.request.user.is_superuser and \
+        if not tenant.is_superuser and \
            'perfil' in serializer.validated_data and \
            'estabelecimento' in serializer.validated_data['perfil']:
             
@@ -73,4 +339,9 @@ class EstablishmentFilteredViewSet:
             validated_establishment = serializer.validated_data['perfil']['estabelecimento']
             
             # Se for um PrimaryKeyRelatedField, validated_establishment já será a instância do objeto.
-            # Se for um UUIDField e o serializer permitir
\ No newline at end of file
+            # Se for um UUIDField e o serializer permitir IDs, comparamos o próprio valor.
+            validated_establishment_id = getattr(validated_establishment, 'pk', validated_establishment)
+            if validated_establishment_id != tenant.estabelecimento_id:
+                raise PermissionDenied("Você não tem permissão para alterar o estabelecimento deste objeto.")
+
+        serializer.save()
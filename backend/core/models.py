@@ -1,3 +1,61 @@
+# backend/core/models.py
+
 from django.db import models
+from configuracao.models import Estabelecimento
+
+
+class Tombstone(models.Model):
+    """
+    Registro leve de uma exclusão física, para que a sincronização incremental
+    (?since=, ver core.mixins.DeltaSyncMixin) consiga informar aos tablets
+    quais linhas deixaram de existir.
+    """
+    estabelecimento = models.ForeignKey(
+        Estabelecimento,
+        on_delete=models.CASCADE,
+        related_name='tombstones',
+        verbose_name='Estabelecimento'
+    )
+    modelo = models.CharField(max_length=100, help_text="Rótulo do modelo excluído (ex: 'mesa.mesa')")
+    objeto_id = models.CharField(max_length=255, help_text="Identificador do objeto excluído, como exposto pela API")
+    data_exclusao = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Registro de Exclusão"
+        verbose_name_plural = "Registros de Exclusão"
+        indexes = [
+            models.Index(fields=['estabelecimento', 'modelo', 'data_exclusao']),
+        ]
+
+    def __str__(self):
+        return f"{self.modelo}#{self.objeto_id} ({self.data_exclusao})"
+
+
+class ChaveIdempotencia(models.Model):
+    """
+    Resposta já produzida para um cabeçalho Idempotency-Key, por estabelecimento.
+    Reenvios da mesma requisição (tablets com Wi-Fi instável) recebem esta resposta
+    em vez de repetir a escrita (ver core.mixins.IdempotencyMixin).
+    status_code nulo indica que a requisição original ainda está em andamento.
+    """
+    estabelecimento = models.ForeignKey(
+        Estabelecimento,
+        on_delete=models.CASCADE,
+        related_name='chaves_idempotencia',
+        verbose_name='Estabelecimento'
+    )
+    chave = models.CharField(max_length=255)
+    # SHA-256 de método + caminho + corpo: a mesma chave com outra requisição é recusada.
+    assinatura = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    resposta = models.TextField(blank=True, default='')
+    data_criacao = models.DateTimeField(auto_now_add=True)
+    expira_em = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = "Chave de Idempotência"
+        verbose_name_plural = "Chaves de Idempotência"
+        unique_together = (('estabelecimento', 'chave'),)
 
-# Create your models here.
+    def __str__(self):
+        return f"{self.chave} ({self.status_code or 'em andamento'})"
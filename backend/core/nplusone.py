@@ -0,0 +1,143 @@
+# backend/core/nplusone.py
+
+import logging
+import os
+import re
+import sys
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.fields import Field
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_SPACES = re.compile(r'\s+')
+_COLUMNS = re.compile(r'^SELECT .*? FROM ')
+_DJANGO_DIRS = tuple(
+    os.path.dirname(os.path.abspath(modulo.__file__)) + os.sep
+    for modulo in (sys.modules['django'], sys.modules['rest_framework'])
+)
+
+
+class NPlusOneError(AssertionError):
+    """ Mesma consulta repetida muitas vezes numa requisição/bloco (ver detect_nplusone). """
+
+
+def query_shape(sql):
+    """ Forma da consulta: parâmetros já são %s; listas IN de qualquer tamanho viram 'IN (...)'. """
+    return _IN_LIST.sub('IN (...)', _SPACES.sub(' ', sql.strip()))
+
+
+def _locate():
+    """
+    Onde a consulta repetida nasceu: o campo de serializer sendo renderizado (se houver)
+    e a primeira linha de código do projeto na pilha (view, permissão, serializer...).
+    """
+    campo, codigo = None, None
+    frame = sys._getframe(2)
+    while frame is not None and (campo is None or codigo is None):
+        arquivo = frame.f_code.co_filename
+        if campo is None and frame.f_code.co_name == 'to_representation':
+            field, serializer = frame.f_locals.get('field'), frame.f_locals.get('self')
+            if isinstance(field, Field) and serializer is not None:
+                campo = f'{type(serializer).__name__}.{field.field_name}'
+        # Código do projeto fora da maquinaria de serializers (o campo já identifica esse caso).
+        if (
+            codigo is None and not isinstance(frame.f_locals.get('self'), Field)
+            and arquivo.startswith(str(settings.BASE_DIR))
+            and not arquivo.startswith(_DJANGO_DIRS) and arquivo != __file__ and 'site-packages' not in arquivo
+        ):
+            codigo = f'{os.path.relpath(arquivo, settings.BASE_DIR)}:{frame.f_lineno} em {frame.f_code.co_name}'
+        frame = frame.f_back
+    return ', '.join(parte for parte in (f'campo {campo}' if campo else None, codigo) if parte) or 'origem desconhecida'
+
+
+class NPlusOneDetector:
+    """
+    execute_wrapper que conta quantas vezes cada forma de SELECT roda. Ao atingir
+    NPLUSONE_THRESHOLD repetições, guarda de onde a consulta veio (ver _locate);
+    a pilha só é inspecionada nesse momento, então o custo normal é um dict lookup.
+    """
+
+    def __init__(self, threshold=None, ignore=None):
+        self.threshold = threshold or getattr(settings, 'NPLUSONE_THRESHOLD', 5)
+        padroes = getattr(settings, 'NPLUSONE_IGNORE_PATTERNS', ()) if ignore is None else ignore
+        self.ignore = [re.compile(padrao) for padrao in padroes]
+        self.contagens = {}
+        self.origens = {}
+        self._formas = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip()[:6].upper() == 'SELECT':
+            forma = self._formas.get(sql)
+            if forma is None:
+                forma = self._formas[sql] = query_shape(sql)
+            total = self.contagens[forma] = self.contagens.get(forma, 0) + 1
+            if total == self.threshold:
+                self.origens[forma] = _locate()
+        return execute(sql, params, many, context)
+
+    def violations(self):
+        return [
+            (forma, total, self.origens[forma])
+            for forma, total in self.contagens.items()
+            if total >= self.threshold and not any(padrao.search(forma) for padrao in self.ignore)
+        ]
+
+    def report(self, contexto):
+        linhas = [f"Possível N+1 em {contexto}:"]
+        linhas += [
+            f"  {total}x {_COLUMNS.sub('SELECT ... FROM ', forma)[:300]} ({origem})"
+            for forma, total, origem in self.violations()
+        ]
+        return '\n'.join(linhas)
+
+
+@contextmanager
+def detect_nplusone(contexto='bloco', mode='raise', threshold=None):
+    """
+    Observa as consultas do bloco em todas as conexões. Ao sair, se alguma forma de SELECT
+    se repetiu `threshold` vezes ou mais: mode='raise' levanta NPlusOneError (testes),
+    mode='log' registra um aviso (staging).
+        with detect_nplusone('listagem de itens'):
+            ItemCardapioSerializer(ItemCardapio.objects.all(), many=True).data
+    """
+    detector = NPlusOneDetector(threshold)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(detector))
+        yield detector
+    if detector.violations():
+        if mode == 'raise':
+            raise NPlusOneError(detector.report(contexto))
+        logger.warning(detector.report(contexto))
+
+
+class NPlusOneMiddleware:
+    """
+    Opt-in (NPLUSONE_DETECTOR = 'raise' ou 'log'): roda cada requisição dentro de
+    detect_nplusone. Com 'raise' (padrão na suíte de testes) a requisição com N+1 falha
+    com NPlusOneError; com 'log' (staging) só gera um aviso em 'core.nplusone'.
+    Views assíncronas passam direto. Desligado (None), o middleware nem é carregado.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.mode = getattr(settings, 'NPLUSONE_DETECTOR', None)
+        if self.mode not in ('raise', 'log'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.get_response(request)
+        with detect_nplusone(f'{request.method} {request.path}', mode=self.mode):
+            return self.get_response(request)
@@ -0,0 +1,181 @@
+# backend/core/pagination.py
+
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginação por cursor (keyset) sobre a ordenação padrão do modelo
+    (ex.: ['ordem', 'nome'], ['numero'], ['nome_completo']) com desempate pela PK.
+    Cada página é um "WHERE (a, b, pk) > (...) ORDER BY a, b, pk LIMIT n":
+    custo constante, independente da profundidade, sem OFFSET.
+
+    Parâmetros aceitos:
+    - ?page_size=<n>  tamanho da página escolhido pelo cliente (até max_page_size);
+    - ?cursor=<...>   cursor opaco devolvido em 'next'/'previous';
+    - ?count=0        omite o COUNT(*) (o campo 'count' não é enviado).
+    """
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = getattr(settings, 'KEYSET_PAGINATION_MAX_PAGE_SIZE', 200)
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = "Cursor inválido."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+
+        self.count = None
+        if self.include_count(request):
+            self.count = queryset.order_by().count()
+
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = bool(cursor and cursor['r'])
+        ordering = [self._flip(field) for field in self.ordering] if reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if cursor is not None:
+            queryset = queryset.filter(self._keyset_filter(ordering, cursor['v']))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Indo para frente: há página anterior se viemos de um cursor; há próxima se sobrou linha.
+        # Voltando: o inverso.
+        self.has_next = True if reverse else has_more
+        self.has_previous = has_more if reverse else cursor is not None
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        fields = []
+        if self.count is not None:
+            fields.append(('count', self.count))
+        fields += [
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]
+        return Response(OrderedDict(fields))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(requested, self.max_page_size))
+
+    def include_count(self, request):
+        return request.query_params.get(self.count_query_param, '1').lower() not in ('0', 'false', 'no')
+
+    def get_ordering(self, queryset):
+        """ Ordenação do queryset (ou do Meta do modelo), sempre terminando na PK. """
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        assert all(isinstance(field, str) for field in ordering), (
+            "KeysetPagination só suporta ordenação por nomes de campos."
+        )
+        pk_names = {'pk', queryset.model._meta.pk.name}
+        if not ordering or ordering[-1].lstrip('-') not in pk_names:
+            ordering.append('pk')
+        return ordering
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self.page[0], reverse=True)
+
+    def decode_cursor(self, request, model):
+        """
+        Cursor do cliente validado: {'v': [...], 'r': bool}, um valor por campo da ordenação,
+        cada um convertido pelo to_python do campo. Qualquer adulteração vira 404, nunca 500.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            cursor = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            if not isinstance(cursor, dict) or not isinstance(cursor.get('r'), bool):
+                raise ValueError
+            values = cursor.get('v')
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            values = [
+                self._field(model, field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, UnicodeError, ValidationError, FieldDoesNotExist):
+            raise NotFound(self.invalid_cursor_message)
+        return {'v': values, 'r': cursor['r']}
+
+    def _link(self, obj, reverse):
+        values = [self._value(obj, field.lstrip('-')) for field in self.ordering]
+        payload = json.dumps({'v': values, 'r': reverse}, cls=DjangoJSONEncoder, separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    @staticmethod
+    def _field(model, path):
+        """ Campo do modelo para um caminho da ordenação ('pk', 'nome', 'categoria__ordem'). """
+        *relacoes, nome = path.split('__')
+        for relacao in relacoes:
+            model = model._meta.get_field(relacao).related_model
+        return model._meta.pk if nome == 'pk' else model._meta.get_field(nome)
+
+    @staticmethod
+    def _value(obj, path):
+        for attr in path.split('__'):
+            obj = getattr(obj, attr)
+        return obj
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def _keyset_filter(ordering, values):
+        """ (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND pk > z), respeitando ASC/DESC. """
+        condition = Q()
+        for i, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            clause = Q(**{f'{name}__{lookup}': values[i]})
+            for previous_field, previous_value in zip(ordering[:i], values[:i]):
+                clause &= Q(**{previous_field.lstrip('-'): previous_value})
+            condition |= clause
+        return condition
@@ -0,0 +1,35 @@
+# backend/core/parsers.py
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from .renderers import msgpack, orjson
+
+
+class FastJSONParser(JSONParser):
+    """ JSONParser com orjson (ou o parser do DRF, se o orjson não estiver instalado). """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class MessagePackParser(BaseParser):
+    """ Corpo em MessagePack ('Content-Type: application/msgpack'). """
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        # unpackb() não tem limite de tamanho: o corpo é lido no máximo até DATA_UPLOAD_MAX_MEMORY_SIZE.
+        limite = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        corpo = stream.read() if limite is None else stream.read(limite + 1)
+        if limite is not None and len(corpo) > limite:
+            raise ParseError("MessagePack parse error - corpo maior que DATA_UPLOAD_MAX_MEMORY_SIZE.")
+        try:
+            return msgpack.unpackb(corpo, raw=False)
+        except (ValueError, TypeError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
@@ -2,6 +2,7 @@
 
 from rest_framework import permissions
 from rest_framework.exceptions import PermissionDenied
+from .tenant import get_tenant
 
 class IsAuthenticatedAndBelongsToEstablishment(permissions.BasePermission):
     """
@@ -12,17 +13,16 @@ class IsAuthenticatedAndBelongsToEstablishment(permissions.BasePermission):
     message = "Você não tem permissão para acessar este recurso, pois não está vinculado a um estabelecimento ou não tem um perfil válido."
 
     def has_permission(self, request, view):
+        # O contexto do tenant é resolvido uma única vez por requisição (ver core.tenant).
+        tenant = get_tenant(request)
+
         # Permite acesso para superusuários (administradores do sistema)
-        if request.user and request.user.is_superuser:
+        if tenant.is_superuser:
             return True
 
         # Exige que o usuário esteja autenticado
-        if not request.user or not request.user.is_authenticated:
+        if not tenant.is_authenticated:
             return False
 
         # Exige que o usuário tenha um perfil e que este perfil esteja vinculado a um estabelecimento
-        # 'perfil' é o related_name da OneToOneField no modelo Perfil
-        if hasattr(request.user, 'perfil') and request.user.perfil.estabelecimento:
-            return True
-
-        return False
\ No newline at end of file
+        return tenant.has_estabelecimento
@@ -0,0 +1,195 @@
+# backend/core/pubsub.py
+
+import asyncio
+import json
+import logging
+import threading
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class InProcessBroker:
+    """
+    Pub/sub em processo para os fluxos em tempo real (SSE) da cozinha e das chamadas.
+    Cada assinante é uma asyncio.Queue no loop do servidor ASGI; publish() pode ser
+    chamado de código síncrono (views em threads) e a mensagem, já serializada uma
+    única vez, é entregue a todas as filas do canal via call_soon_threadsafe.
+    Um assinante lento não segura os demais: com a fila cheia, a mensagem mais antiga é descartada.
+    """
+    queue_size = 100
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel, event, payload):
+        message = json.dumps({'evento': event, 'dados': payload}, cls=DjangoJSONEncoder, ensure_ascii=False)
+        self._deliver(channel, message)
+
+    def _deliver(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._put, queue, message)
+            except RuntimeError:
+                # Loop já encerrado; a entrada sai quando a assinatura for fechada.
+                pass
+
+    @staticmethod
+    def _put(queue, message):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+    def subscribe(self, channel, timeout=None):
+        """
+        Assinatura do canal, registrada já nesta chamada (não na primeira iteração): nada
+        publicado a partir daqui se perde, mesmo que o consumo comece depois (ex.: após
+        montar um snapshot). Iterável assíncrono com as mensagens (JSON); com `timeout`,
+        produz None quando nada chega nesse intervalo (para keep-alive). Feche com aclose().
+        Precisa ser chamado dentro do loop que vai consumi-la.
+        """
+        return Subscription(self, channel, timeout)
+
+    def _register(self, channel, entry):
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(entry)
+
+    def _unregister(self, channel, entry):
+        with self._lock:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(entry)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+
+class Subscription:
+    """ Assinatura de um canal do InProcessBroker (ver InProcessBroker.subscribe). """
+
+    def __init__(self, broker, channel, timeout=None):
+        self.broker, self.channel, self.timeout = broker, channel, timeout
+        self._entry = (asyncio.get_running_loop(), asyncio.Queue(maxsize=broker.queue_size))
+        self._closed = False
+        broker._register(channel, self._entry)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._closed:
+            raise StopAsyncIteration
+        try:
+            return await asyncio.wait_for(self._entry[1].get(), self.timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self.broker._unregister(self.channel, self._entry)
+
+    async def aclose(self):
+        self.close()
+
+
+class RedisBroker(InProcessBroker):
+    """
+    Variante para vários workers: publish() envia ao Redis (ou compatível) e cada
+    processo mantém UMA assinatura PSUBSCRIBE que repassa as mensagens às filas locais.
+    Requer o pacote opcional 'redis' e PUBSUB_REDIS_URL.
+    """
+    prefix = 'karibu:'
+
+    def __init__(self):
+        super().__init__()
+        try:
+            import redis
+            import redis.asyncio
+        except ImportError as exc:
+            raise ImproperlyConfigured("RedisBroker requer o pacote 'redis' (pip install redis).") from exc
+        self._url = getattr(settings, 'PUBSUB_REDIS_URL', 'redis://localhost:6379/0')
+        self._client = redis.Redis.from_url(self._url)
+        self._async_redis = redis.asyncio
+        self._listeners = {}
+
+    def _deliver(self, channel, message):
+        self._client.publish(self.prefix + channel, message)
+
+    async def _listen(self):
+        """
+        Repassa as mensagens do Redis às filas locais. Se a conexão cair, reconecta com
+        espera exponencial (até PUBSUB_RECONNECT_MAX_SECONDS); as mensagens publicadas
+        enquanto isso se perdem, como em qualquer pub/sub do Redis.
+        """
+        espera_maxima = getattr(settings, 'PUBSUB_RECONNECT_MAX_SECONDS', 30)
+        espera = 0.5
+        while True:
+            try:
+                client = self._async_redis.Redis.from_url(self._url)
+                async with client.pubsub() as pubsub:
+                    await pubsub.psubscribe(self.prefix + '*')
+                    espera = 0.5
+                    async for item in pubsub.listen():
+                        if item['type'] != 'pmessage':
+                            continue
+                        channel = item['channel'].decode('utf-8')[len(self.prefix):]
+                        super()._deliver(channel, item['data'].decode('utf-8'))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Assinatura do Redis interrompida; nova tentativa em %.1fs", espera)
+            else:
+                logger.warning("Assinatura do Redis encerrada; nova tentativa em %.1fs", espera)
+            await asyncio.sleep(espera)
+            espera = min(espera * 2, espera_maxima)
+
+    def _listener_done(self, loop, task):
+        # Encerrado de vez (loop fechando ou erro fora do laço): o próximo subscribe() recria.
+        with self._lock:
+            if self._listeners.get(loop) is task:
+                del self._listeners[loop]
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Ouvinte do Redis terminou com erro", exc_info=task.exception())
+
+    def subscribe(self, channel, timeout=None):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if loop not in self._listeners:
+                task = self._listeners[loop] = loop.create_task(self._listen())
+                task.add_done_callback(partial(self._listener_done, loop))
+        return super().subscribe(channel, timeout)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """ Instância única do broker configurado em PUBSUB_BACKEND. """
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                backend = getattr(settings, 'PUBSUB_BACKEND', 'core.pubsub.InProcessBroker')
+                _broker = import_string(backend)()
+    return _broker
+
+
+def publish(channel, event, payload):
+    """ Publica sem nunca derrubar a escrita que originou o evento. """
+    try:
+        get_broker().publish(channel, event, payload)
+    except Exception:
+        logger.exception("Falha ao publicar evento %s no canal %s", event, channel)
@@ -0,0 +1,61 @@
+# backend/core/renderers.py
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+# Dependências opcionais: sem elas, FastJSONRenderer se comporta como o JSONRenderer
+# do DRF e MessagePackRenderer não é habilitado (ver REST_FRAMEWORK em karibu/settings.py).
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+# Tipos que nem o orjson nem o msgpack conhecem (Decimal, strings preguiçosas,
+# QuerySets, UUID no msgpack...) são convertidos como no encoder padrão do DRF.
+_fallback_encoder = JSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer que serializa com orjson: UUID e datetimes aware (com 'Z' para UTC)
+    são tratados nativamente, Decimal e demais tipos passam pelo encoder do DRF.
+    A saída é compacta e UTF-8, como a do JSONRenderer com as configurações padrão,
+    inclusive o escape de U+2028/U+2029. Ficam com o renderer do DRF os pedidos com
+    indentação (?format=json; indent=4), as configurações STRICT_JSON, UNICODE_JSON ou
+    COMPACT_JSON fora do padrão e o que o orjson recusa (inteiros além de 64 bits).
+    Única diferença: NaN/Infinity saem como null, onde o DRF com STRICT_JSON levanta ValueError.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        fora_do_padrao = not (api_settings.STRICT_JSON and api_settings.UNICODE_JSON and api_settings.COMPACT_JSON)
+        if orjson is None or fora_do_padrao or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        try:
+            ret = orjson.dumps(data, default=_fallback_encoder.default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Válidos em JSON, mas não em JavaScript: escapados como faz o JSONRenderer.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    """ Resposta em MessagePack para clientes que enviam 'Accept: application/msgpack'. """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_fallback_encoder.default, use_bin_type=True)
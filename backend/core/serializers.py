@@ -0,0 +1,130 @@
+# backend/core/serializers.py
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+from .images import derivative_urls, derivatives_field_name
+from .metrics import serializer_timer
+
+
+def _parse_field_list(value):
+    return [nome.strip() for nome in value.split(',') if nome.strip()] if value else []
+
+
+class TimedSerializerMixin:
+    """ Soma o tempo gasto em to_representation ao da requisição (ver core.metrics.MetricsMiddleware). """
+
+    def to_representation(self, instance):
+        with serializer_timer():
+            return super().to_representation(instance)
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Mixin para ModelSerializers que recorta a saída conforme a requisição (somente leitura):
+        ?fields=id,nome,preco   apenas estes campos;
+        ?omit=descricao,imagem  todos menos estes.
+    Nomes desconhecidos são ignorados. Escritas (POST/PUT/PATCH) não são afetadas.
+    O ViewSet aplica o mesmo recorte ao queryset (ver core.mixins.SparseFieldsetMixin
+    e restrict_queryset), de modo que colunas e JOINs não usados nem sejam buscados.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        campos = self.sparse_fields(self.context.get('request'), self.fields.keys())
+        self.is_sparse = campos is not None
+        if campos is not None:
+            for nome in list(self.fields):
+                if nome not in campos:
+                    self.fields.pop(nome)
+
+    @staticmethod
+    def sparse_fields(request, disponiveis):
+        """ Campos mantidos para a requisição, ou None se ela não pede recorte. """
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return None
+        incluir = _parse_field_list(request.query_params.get('fields'))
+        omitir = set(_parse_field_list(request.query_params.get('omit')))
+        if incluir and not any(nome in incluir for nome in disponiveis):
+            # Só nomes desconhecidos em ?fields=: ignorá-los não pode virar objetos vazios.
+            incluir = []
+        if not incluir and not omitir:
+            return None
+        return [nome for nome in disponiveis if (not incluir or nome in incluir) and nome not in omitir]
+
+    def restrict_queryset(self, queryset, extra=()):
+        """
+        Reescreve o eager loading do queryset para os campos mantidos neste serializer: only() com as colunas
+        usadas (mais PK, ordenação e `extra`), select_related só das relações cujos atributos
+        são exibidos e apenas os prefetches das relações mantidas. Se algum campo depender de
+        algo que não sabemos mapear (métodos, source='*', relação reversa 1:1), devolve o
+        queryset original, sem recorte.
+        """
+        model = queryset.model
+        only = {model._meta.pk.name, *extra}
+        ordering = queryset.query.order_by or model._meta.ordering
+        only.update(campo.lstrip('-') for campo in ordering if isinstance(campo, str) and '__' not in campo)
+        selects, prefetches = set(), set()
+
+        for field in self.fields.values():
+            colunas = getattr(field, 'model_columns', None)
+            if colunas is not None:
+                only.update(colunas)
+                continue
+            if field.source == '*':
+                return queryset
+            partes = field.source.split('.')
+            try:
+                model_field = model._meta.get_field(partes[0])
+            except FieldDoesNotExist:
+                return queryset
+
+            if model_field.many_to_many or model_field.one_to_many:
+                prefetches.add(partes[0])
+            elif not model_field.concrete:
+                # Relação reversa 1:1 (ex.: User.perfil): mantém o eager loading original.
+                return queryset
+            elif model_field.is_relation and (len(partes) > 1 or isinstance(field, serializers.BaseSerializer)):
+                # 'categoria.nome' ou serializer aninhado: JOIN com a relação.
+                selects.add(partes[0])
+                only.add(partes[0])
+                if len(partes) > 1:
+                    only.add('__'.join(partes))
+            elif len(partes) == 1:
+                only.add(partes[0])
+            else:
+                return queryset
+
+        lookups = [
+            lookup for lookup in queryset._prefetch_related_lookups
+            if (lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup).split('__')[0] in prefetches
+        ]
+        queryset = queryset.select_related(None).prefetch_related(None).prefetch_related(*lookups)
+        if selects:
+            queryset = queryset.select_related(*selects)
+        return queryset.only(*only)
+
+
+class ImageDerivativesField(serializers.Field):
+    """
+    Somente leitura: URLs por tamanho dos derivados WebP de um ImageField (ver core.images).
+        {"original": ".../foto.jpg", "pequena": ".../ab12..._160.webp", ..., "pendente": false}
+    Enquanto os derivados não ficam prontos, cada tamanho aponta para o original.
+    """
+
+    def __init__(self, image_field, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+        self.image_field = image_field
+        # Colunas lidas, para o recorte de ?fields= (SparseFieldsetSerializerMixin.restrict_queryset).
+        self.model_columns = (image_field, derivatives_field_name(image_field))
+
+    def to_representation(self, instance):
+        request = self.context.get('request')
+        return derivative_urls(
+            getattr(instance, self.image_field),
+            getattr(instance, derivatives_field_name(self.image_field)),
+            build_url=request.build_absolute_uri if request is not None else None,
+        )
@@ -0,0 +1,23 @@
+# backend/core/signals.py
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from usuarios.models import Perfil
+
+from .authentication import user_state_cache
+
+User = get_user_model()
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_state_on_user_change(sender, instance, **kwargs):
+    """ Usuário alterado/desativado: a próxima requisição sem estado revalida as claims. """
+    user_state_cache.invalidate(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Perfil)
+def invalidate_user_state_on_perfil_change(sender, instance, **kwargs):
+    """ Papel ou estabelecimento alterados também invalidam o estado em cache. """
+    user_state_cache.invalidate(instance.user_id)
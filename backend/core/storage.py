@@ -0,0 +1,64 @@
+# backend/core/storage.py
+
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+# Nome já endereçado por conteúdo: começa com um SHA-256 em hexadecimal
+# (ex.: 'ab12...ef.jpg' ou os derivados 'ab12...ef_160.webp' de core.images).
+_CONTENT_ADDRESSED = re.compile(r'[0-9a-f]{64}([_.].*)?')
+
+
+def is_content_addressed(name):
+    """ O arquivo tem nome derivado do próprio conteúdo, portanto nunca muda (imutável). """
+    return bool(name) and bool(_CONTENT_ADDRESSED.fullmatch(os.path.basename(name)))
+
+
+class HashedFileSystemStorage(FileSystemStorage):
+    """
+    FileSystemStorage que grava cada upload sob o SHA-256 do conteúdo, mantendo o
+    diretório de upload_to e a extensão:
+        itens_cardapio/foto.JPG -> itens_cardapio/ab/ab12...ef.jpg
+    Conteúdo idêntico (de qualquer estabelecimento) vira um único arquivo, e um nome
+    nunca passa a apontar para outro conteúdo, então a URL pode ser cacheada para sempre
+    (ver core.views.serve_media). O conteúdo é sempre hasheado: um nome enviado pelo cliente
+    que apenas se pareça com um hash não é confiável; só é mantido se for o próprio digest.
+    Arquivos cujo nome deriva de outro conteúdo (derivados de core.images) usam save_derived.
+
+    Como um arquivo pode ser compartilhado por vários registros, não o apague ao
+    excluir/substituir um deles; a limpeza de órfãos precisa considerar todas as referências.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        return self.save_derived(self.hashed_name(name, content), content, max_length=max_length)
+
+    def save_derived(self, name, content, max_length=None):
+        """
+        Grava sob `name` sem hashear; uso interno, quando o nome já é determinado pelo conteúdo
+        de origem (ex.: derivados de core.images). Se o arquivo existir, é reaproveitado.
+        """
+        if self.exists(name):
+            # Mesmo conteúdo já armazenado: reaproveita o arquivo.
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    @staticmethod
+    def hashed_name(name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        if os.path.splitext(os.path.basename(name))[0] == digest:
+            # Já é o nome endereçado por este conteúdo (ex.: arquivo regravado).
+            return name.replace('\\', '/')
+        diretorio = os.path.dirname(name)
+        extensao = os.path.splitext(name)[1].lower()[:10]
+        return os.path.join(diretorio, digest[:2], f'{digest}{extensao}').replace('\\', '/')
@@ -0,0 +1,85 @@
+# backend/core/streams.py
+
+import inspect
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+
+from .authentication import StatelessTenantJWTAuthentication
+from .pubsub import get_broker
+
+
+async def authenticate_stream(request):
+    """
+    Autentica uma conexão de streaming (SSE) e retorna o TenantContext, ou None.
+    EventSource não permite cabeçalhos: o access token pode vir em ?token=.
+    Usa o modo sem estado, então conexões repetidas não consultam o banco.
+    """
+    raw_token = request.GET.get('token')
+    if not raw_token:
+        header = request.META.get('HTTP_AUTHORIZATION', '').split()
+        raw_token = header[1] if len(header) == 2 and header[0] == 'Bearer' else None
+    if not raw_token:
+        return None
+
+    authentication = StatelessTenantJWTAuthentication()
+    try:
+        validated_token = authentication.get_validated_token(raw_token.encode('utf-8'))
+        user = await sync_to_async(authentication.get_user)(validated_token)
+    except (InvalidToken, AuthenticationFailed, TokenError):
+        return None
+    return user.tenant
+
+
+async def event_stream_response(channel, snapshot=None, dedupe_key=None):
+    """
+    Resposta text/event-stream com as mensagens do canal do broker (ver core.pubsub).
+    `snapshot`, se informado, é uma função (síncrona ou assíncrona) cujo retorno é
+    enviado primeiro como evento 'snapshot'. Ela só é chamada depois de a assinatura do
+    canal existir, então nada publicado enquanto o snapshot é montado se perde; o que
+    ele já contém pode chegar de novo como evento '*.novo', que é descartado quando
+    `dados[dedupe_key]` coincide com o de um item do snapshot.
+    Linhas de comentário periódicas mantêm a conexão viva atrás de proxies.
+    Precisa ser servido via ASGI (uvicorn/daphne, ver karibu/asgi.py).
+    """
+    heartbeat = getattr(settings, 'STREAM_HEARTBEAT_SECONDS', 15)
+    assinatura = get_broker().subscribe(channel, timeout=heartbeat)
+    try:
+        itens = snapshot() if snapshot is not None else None
+        if inspect.isawaitable(itens):
+            itens = await itens
+    except BaseException:
+        assinatura.close()
+        raise
+    repetidos = {item[dedupe_key] for item in itens} if itens and dedupe_key else set()
+
+    async def frames():
+        try:
+            if snapshot is not None:
+                dados = json.dumps({'evento': 'snapshot', 'dados': itens}, cls=DjangoJSONEncoder, ensure_ascii=False)
+                yield f"data: {dados}\n\n"
+            async for message in assinatura:
+                if message is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                if repetidos:
+                    evento = json.loads(message)
+                    if evento['evento'].endswith('.novo'):
+                        chave = evento['dados'].get(dedupe_key)
+                        if chave in repetidos:
+                            # Cada item do snapshot só pode se repetir uma vez.
+                            repetidos.discard(chave)
+                            continue
+                yield f"data: {message}\n\n"
+        finally:
+            assinatura.close()
+
+    response = StreamingHttpResponse(frames(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Desliga o buffer do nginx para que cada evento saia imediatamente.
+    response['X-Accel-Buffering'] = 'no'
+    return response
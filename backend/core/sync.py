@@ -0,0 +1,75 @@
+# backend/core/sync.py
+
+import base64
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models.signals import post_delete
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from configuracao.models import Estabelecimento
+from .models import Tombstone
+
+
+def make_sync_token(moment):
+    """ Token opaco entregue ao cliente; na prática um instante codificado. """
+    return base64.urlsafe_b64encode(moment.isoformat().encode('ascii')).decode('ascii').rstrip('=')
+
+
+def parse_since(value):
+    """
+    Interpreta o parâmetro ?since=: aceita um token devolvido pela API ou um
+    timestamp ISO 8601. Retorna um datetime aware, ou None se o valor for inválido.
+    """
+    moment = None
+    try:
+        padded = value + '=' * (-len(value) % 4)
+        moment = parse_datetime(base64.urlsafe_b64decode(padded.encode('ascii')).decode('ascii'))
+    except (ValueError, UnicodeError):
+        pass
+    if moment is None:
+        try:
+            moment = parse_datetime(value)
+        except ValueError:
+            return None
+    if moment is not None and timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def next_sync_point():
+    """
+    Instante a partir do qual a próxima sincronização deve buscar alterações.
+    Recuamos SYNC_OVERLAP_SECONDS para cobrir transações gravadas com um
+    data_atualizacao anterior à consulta mas confirmadas depois dela; o cliente
+    pode receber uma linha repetida, nunca perder uma.
+    """
+    return timezone.now() - timedelta(seconds=getattr(settings, 'SYNC_OVERLAP_SECONDS', 5))
+
+
+def tombstone_retention_start():
+    """ Tombstones mais antigos que isso são descartados (ver purge_tombstones). """
+    return timezone.now() - timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+
+
+def track_deletions(model, key_field='pk'):
+    """
+    Registra um Tombstone a cada exclusão de `model`. `key_field` é o campo que a API
+    usa para identificar o objeto (ex.: 'celular' para Cliente).
+    """
+    label = model._meta.label_lower
+
+    def record_tombstone(sender, instance, origin=None, **kwargs):
+        # Exclusão em cascata do próprio estabelecimento: não há para quem sincronizar
+        # (e o tombstone apontaria para um estabelecimento que está sendo removido).
+        origin_model = getattr(origin, 'model', type(origin))
+        if origin_model is Estabelecimento:
+            return
+        Tombstone.objects.create(
+            estabelecimento_id=instance.estabelecimento_id,
+            modelo=label,
+            objeto_id=str(getattr(instance, key_field)),
+        )
+
+    post_delete.connect(record_tombstone, sender=model, weak=False, dispatch_uid=f'tombstone:{label}')
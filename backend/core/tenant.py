@@ -0,0 +1,97 @@
+# backend/core/tenant.py
+
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from usuarios.models import Perfil
+
+# Nome do atributo usado para guardar o contexto no HttpRequest subjacente.
+_TENANT_CACHE_ATTR = '_tenant_context'
+
+
+@dataclass(frozen=True)
+class TenantContext:
+    """
+    Contexto imutável do tenant da requisição (usuário -> perfil -> estabelecimento).
+    É resolvido uma única vez por requisição e consultado por permissões e mixins,
+    evitando que cada um percorra `request.user.perfil.estabelecimento` novamente.
+    """
+    user_id: Any = None
+    is_authenticated: bool = False
+    is_superuser: bool = False
+    papel: Optional[str] = None
+    estabelecimento_id: Any = None
+
+    @property
+    def has_estabelecimento(self):
+        return self.estabelecimento_id is not None
+
+    @property
+    def is_gestor(self):
+        return self.papel == Perfil.GESTOR
+
+    @property
+    def is_garcom(self):
+        return self.papel == Perfil.GARCOM
+
+    @property
+    def is_cozinheiro(self):
+        return self.papel == Perfil.COZINHEIRO
+
+    @property
+    def is_caixa(self):
+        return self.papel == Perfil.CAIXA
+
+
+ANONYMOUS_TENANT = TenantContext()
+
+
+def _get_cached_perfil(user):
+    """
+    Retorna o Perfil do usuário sem disparar consultas extras.
+    Se o perfil já veio via select_related (ver core.authentication), usa o cache;
+    caso contrário faz UMA consulta simples ao Perfil (só precisamos do id do estabelecimento).
+    """
+    related = type(user).perfil.related
+    if related.is_cached(user):
+        return related.get_cached_value(user)
+    return Perfil.objects.filter(user_id=user.pk).first()
+
+
+def build_tenant_context(user):
+    """ Monta o TenantContext a partir de um usuário já autenticado. """
+    if user is None or not user.is_authenticated:
+        return ANONYMOUS_TENANT
+
+    # Usuários montados a partir das claims do token (core.authentication.TenantTokenUser)
+    # já trazem o próprio contexto, sem nenhuma consulta.
+    tenant = getattr(user, 'tenant', None)
+    if isinstance(tenant, TenantContext):
+        return tenant
+
+    perfil = _get_cached_perfil(user)
+    return TenantContext(
+        user_id=user.pk,
+        is_authenticated=True,
+        is_superuser=user.is_superuser,
+        papel=perfil.papel if perfil else None,
+        estabelecimento_id=perfil.estabelecimento_id if perfil else None,
+    )
+
+
+def get_tenant(request):
+    """
+    Retorna o TenantContext da requisição, calculando-o apenas na primeira chamada.
+    Aceita tanto o Request do DRF quanto o HttpRequest do Django.
+    """
+    http_request = getattr(request, '_request', request)
+    user = request.user
+    cached = getattr(http_request, _TENANT_CACHE_ATTR, None)
+    # O cache é amarrado ao objeto de usuário: se a autenticação trocar o usuário
+    # (ex.: force_authenticate nos testes), o contexto é recalculado.
+    if cached is not None and cached[0] is user:
+        return cached[1]
+
+    tenant = build_tenant_context(user)
+    setattr(http_request, _TENANT_CACHE_ATTR, (user, tenant))
+    return tenant
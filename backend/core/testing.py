@@ -0,0 +1,51 @@
+# backend/core/testing.py
+
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from configuracao.models import AssinaturaEstabelecimento, Estabelecimento
+from usuarios.models import Perfil
+from usuarios.views import MyTokenObtainPairSerializer
+
+from .authentication import user_state_cache
+
+User = get_user_model()
+
+SENHA_TESTE = "senha-forte-123"
+
+
+class TenantAPITestCase(TestCase):
+    """
+    Base dos testes de API: um estabelecimento (`nome_estabelecimento`) com assinatura
+    ATIVA e um gestor ("gestor"), autenticado no APIClient em `self.client` com `self.token`.
+    Caches (Django e estado de usuário do JWT sem estado) são limpos em volta de cada teste.
+    Subclasses que criam mais dados chamam super().setUpTestData() primeiro.
+    """
+    nome_estabelecimento = "Karibu"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.estabelecimento = Estabelecimento.objects.create(nome=cls.nome_estabelecimento)
+        cls.assinatura = AssinaturaEstabelecimento.objects.create(
+            estabelecimento=cls.estabelecimento, data_ativacao=date.today(), estado='ATIVA'
+        )
+        cls.gestor = User.objects.create_user(username="gestor", password=SENHA_TESTE)
+        cls.perfil = Perfil.objects.create(user=cls.gestor, estabelecimento=cls.estabelecimento, papel=Perfil.GESTOR)
+
+    def setUp(self):
+        # Os dois caches sobrevivem ao rollback e as PKs se repetem entre testes: limpa
+        # antes e depois, para não vazar estado nem para testes que não usam esta base.
+        for limpar in (cache.clear, user_state_cache.clear):
+            limpar()
+            self.addCleanup(limpar)
+        self.client = APIClient()
+        self.authenticate(self.gestor)
+
+    def authenticate(self, user):
+        """ Troca o usuário autenticado no cliente por `user` (token emitido agora). """
+        self.token = MyTokenObtainPairSerializer.get_token(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
@@ -1,3 +1,439 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.client import encode_multipart
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from cardapio.models import Categoria, ItemCardapio
+from cardapio.serializers import ItemCardapioSerializer
+from cliente.models import Cliente
+from configuracao.models import Estabelecimento
+from mesa.models import Mesa
+from usuarios.models import Perfil
+
+from .idempotency import request_signature
+from .nplusone import NPlusOneError, detect_nplusone
+from .parsers import FastJSONParser
+from .renderers import FastJSONRenderer, msgpack
+from .storage import HashedFileSystemStorage
+from .testing import TenantAPITestCase
+from .views import serve_media
+from .tenant import get_tenant
+
+User = get_user_model()
+
+
+class TenantContextQueryCountTests(TenantAPITestCase):
+    """
+    Fixa o número de consultas por endpoint: a autenticação carrega User, Perfil e
+    Estabelecimento em um único JOIN e as permissões/mixins leem do TenantContext.
+    """
+    nome_estabelecimento = "Karibu Teste"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        categoria = Categoria.objects.create(estabelecimento=cls.estabelecimento, nome="Bebidas")
+        ItemCardapio.objects.create(estabelecimento=cls.estabelecimento, categoria=categoria, nome="Suco", preco="8.50")
+        Mesa.objects.create(estabelecimento=cls.estabelecimento, numero="1")
+        Cliente.objects.create(estabelecimento=cls.estabelecimento, celular="11999990000", nome_completo="Ana")
+
+    def assertEndpointQueries(self, url, num):
+        # Primeira requisição aquece o cache de estado do modo JWT sem estado.
+        self.client.get(url)
+        with self.assertNumQueries(num):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_categorias_list(self):
+        # auth sem estado (0) + ETag + COUNT + SELECT (JOIN estabelecimento) + prefetch dos itens
+        self.assertEndpointQueries('/api/cardapio/categorias/', 4)
+
+    def test_itens_list(self):
+        # auth sem estado (0) + ETag + COUNT + SELECT (JOIN categoria e estabelecimento)
+        self.assertEndpointQueries('/api/cardapio/itens/', 3)
+
+    def test_mesas_list(self):
+        # auth sem estado (0) + ETag + COUNT + SELECT (JOIN estabelecimento)
+        self.assertEndpointQueries('/api/mesa/', 3)
+
+    def test_mesas_list_compacto(self):
+        # auth sem estado (0) + ETag + COUNT + SELECT sem JOIN
+        self.assertEndpointQueries('/api/mesa/?compacto=1', 3)
+        mesa = self.client.get('/api/mesa/', {'compacto': '1'}).data['results'][0]
+        self.assertEqual(mesa['estabelecimento'], self.estabelecimento.id)
+
+    def test_estabelecimento_atual_is_cached(self):
+        self.client.get('/api/configuracao/estabelecimento-atual/')
+        # JWT sem estado + estado do usuário, assinatura e estabelecimento em cache.
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/configuracao/estabelecimento-atual/')
+        self.assertEqual(response.data['nome'], "Karibu Teste")
+
+    def test_clientes_list(self):
+        # auth (JOIN) + ETag + COUNT + SELECT
+        self.assertEndpointQueries('/api/clientes/', 4)
+
+    def test_usuarios_list(self):
+        # auth (JOIN) + ETag + COUNT + SELECT
+        self.assertEndpointQueries('/api/usuarios/users/', 4)
+
+    def test_sparse_fieldsets_trim_output_and_query(self):
+        url = '/api/cardapio/itens/?fields=id,nome,preco'
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(list(response.data['results'][0]), ['id', 'nome', 'preco'])
+        pagina = queries.captured_queries[-1]['sql']
+        self.assertNotIn('JOIN', pagina)
+        self.assertNotIn('descricao', pagina)
+
+        # Sem 'itens' não há prefetch: ETag + COUNT + SELECT
+        self.assertEndpointQueries('/api/cardapio/categorias/?omit=itens,estabelecimento_nome', 3)
+        categoria = self.client.get('/api/cardapio/categorias/', {'fields': 'nome,itens'}).data['results'][0]
+        self.assertEqual(categoria, {'nome': "Bebidas", 'itens': [ItemCardapio.objects.get().id]})
+
+        usuario = self.client.get('/api/usuarios/users/', {'omit': 'perfil,email'}).data['results'][0]
+        self.assertEqual(set(usuario), {'id', 'username', 'is_superuser'})
+
+        # Apenas nomes desconhecidos: sem recorte, em vez de objetos vazios.
+        item = self.client.get('/api/cardapio/itens/', {'fields': 'inexistente'}).data['results'][0]
+        self.assertIn('nome', item)
+
+    def test_conditional_get_returns_304_without_serializing(self):
+        response = self.client.get('/api/mesa/')
+        self.assertIn('ETag', response)
+        # Apenas o agregado MAX+COUNT; nenhuma paginação ou serialização.
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/mesa/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_conditional_get_detects_changes(self):
+        etag = self.client.get('/api/mesa/')['ETag']
+        Mesa.objects.create(estabelecimento=self.estabelecimento, numero="2")
+        response = self.client.get('/api/mesa/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_conditional_get_covers_related_data_and_deletions(self):
+        url = '/api/cardapio/itens/'
+        response = self.client.get(url)
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+        # Renomear a categoria muda 'categoria_nome' na listagem de itens.
+        Categoria.objects.filter(nome="Bebidas").update(nome="Sucos", data_atualizacao=timezone.now())
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['categoria_nome'], "Sucos")
+
+        etag = self.client.get('/api/cardapio/categorias/')['ETag']
+        ItemCardapio.objects.all().delete()
+        self.assertEqual(self.client.get('/api/cardapio/categorias/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_delta_sync_returns_changes_and_tombstones(self):
+        mesa = Mesa.objects.get(numero="1")
+        token = self.client.get('/api/mesa/')['X-Sync-Token']
+        self.assertEqual(self.client.delete(f'/api/mesa/{mesa.id}/').status_code, 204)
+        Mesa.objects.create(estabelecimento=self.estabelecimento, numero="2")
+
+        response = self.client.get('/api/mesa/', {'since': token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['deleted'], [str(mesa.id)])
+        self.assertEqual([m['numero'] for m in response.data['changed']], ["2"])
+        self.assertTrue(response.data['sync_token'])
+
+    def test_delta_sync_accepts_iso_timestamp(self):
+        response = self.client.get('/api/cardapio/itens/', {'since': '2999-01-01T00:00:00+00:00'})
+        self.assertEqual(response.data['changed'], [])
+        self.assertEqual(self.client.get('/api/cardapio/itens/', {'since': 'invalido'}).status_code, 400)
+
+    def test_metrics_endpoint_reports_route_histograms(self):
+        self.client.get('/api/mesa/')
+        with self.assertLogs('karibu.requests', 'INFO') as logs, self.settings(METRICS_LOG_SAMPLE_RATE=1):
+            self.client.get('/api/mesa/')
+        self.assertRegex(logs.output[0], r'rota=mesas-list status=200 .*consultas=3 ')
+
+        # Sem METRICS_TOKEN e fora do DEBUG o endpoint não existe.
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+        with self.settings(METRICS_TOKEN='segredo'):
+            # Outro cliente: o APIClient sobrescreveria o cabeçalho com o JWT.
+            texto = Client().get('/metrics', HTTP_AUTHORIZATION='Bearer segredo').content.decode()
+        self.assertIn('karibu_http_requests_total{method="GET",route="mesas-list",status="200"}', texto)
+        self.assertIn('karibu_db_queries_per_request_bucket{method="GET",route="mesas-list",le="3"}', texto)
+        self.assertIn('karibu_serializer_duration_seconds_count{method="GET",route="mesas-list"}', texto)
+        with self.settings(METRICS_TOKEN='segredo'):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+
+    def test_tenant_context_is_resolved_once(self):
+        request = self.client.get('/api/mesa/').wsgi_request
+        tenant = get_tenant(request)
+        self.assertIs(tenant, get_tenant(request))
+        self.assertEqual(tenant.estabelecimento_id, self.estabelecimento.id)
+        self.assertTrue(tenant.is_gestor)
+
+
+class StatelessJWTAuthenticationTests(TenantAPITestCase):
+    """ Modo sem estado: claims assinadas valem até o estado real do usuário divergir. """
+    nome_estabelecimento = "Karibu Sem Estado"
+
+    def test_changed_role_invalidates_token(self):
+        self.assertEqual(self.client.get('/api/mesa/').status_code, 200)
+        self.perfil.papel = Perfil.GARCOM
+        self.perfil.save()
+        self.assertEqual(self.client.get('/api/mesa/').status_code, 401)
+
+    def test_inactive_user_is_rejected(self):
+        self.gestor.is_active = False
+        self.gestor.save()
+        self.assertEqual(self.client.get('/api/cardapio/itens/').status_code, 401)
+
+    def test_password_change_revokes_token(self):
+        # O simplejwt não recarrega as referências já importadas de api_settings com override_settings.
+        with mock.patch.object(jwt_settings, 'CHECK_REVOKE_TOKEN', True):
+            self.authenticate(self.gestor)
+            self.assertEqual(self.client.get('/api/mesa/').status_code, 200)
+
+            self.gestor.set_password("outra-senha-forte-456")
+            self.gestor.save()
+            response = self.client.get('/api/mesa/')
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response.data['code'], 'password_changed')
+
+    def test_me_loads_real_user(self):
+        response = self.client.get('/api/usuarios/users/me/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['username'], "gestor")
+
+
+class KeysetPaginationTests(TenantAPITestCase):
+    """ Paginação por cursor: páginas sem OFFSET, sem repetição nem perda de linhas. """
+    nome_estabelecimento = "Karibu Paginação"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Nomes repetidos forçam o desempate pela PK.
+        Cliente.objects.bulk_create(
+            Cliente(estabelecimento=cls.estabelecimento, celular=f"1199{i:07d}", nome_completo=f"Cliente {i % 7}")
+            for i in range(95)
+        )
+
+    def test_walks_all_pages_forward_and_back(self):
+        url, vistos, paginas = '/api/clientes/?page_size=20', [], []
+        while url:
+            data = self.client.get(url).data
+            paginas.append(data)
+            vistos += [c['celular'] for c in data['results']]
+            url = data['next']
+        self.assertEqual(len(vistos), 95)
+        self.assertEqual(len(set(vistos)), 95)
+        self.assertEqual(paginas[0]['count'], 95)
+
+        anterior = self.client.get(paginas[-1]['previous']).data
+        self.assertEqual(anterior['results'], paginas[-2]['results'])
+
+    def test_tampered_cursor_is_404(self):
+        def cursor(payload):
+            return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+        for payload in (
+            {'v': ["Cliente 1", 1]},                    # sem 'r'
+            {'v': ["Cliente 1", "não é pk"], 'r': False},
+            {'v': ["Cliente 1", {'a': 1}], 'r': False},
+            {'v': "Cliente 1", 'r': False},
+            {'v': ["Cliente 1", 1], 'r': "sim"},
+            ["Cliente 1", 1],
+        ):
+            response = self.client.get('/api/clientes/', {'cursor': cursor(payload)})
+            self.assertEqual(response.status_code, 404, payload)
+        self.assertEqual(self.client.get('/api/clientes/', {'cursor': 'lixo!'}).status_code, 404)
+
+    def test_streaming_export(self):
+        response = self.client.get('/api/clientes/', {'stream': '1'})
+        self.assertTrue(response.streaming)
+        dados = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(dados), 95)
+
+        response = self.client.get('/api/clientes/', {'stream': 'ndjson'})
+        linhas = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(linhas), 95)
+        self.assertEqual(json.loads(linhas[0])['celular'], dados[0]['celular'])
+
+    def test_count_can_be_skipped(self):
+        self.client.get('/api/clientes/')  # aquece o cache da assinatura
+        with self.assertNumQueries(3):  # auth + ETag + página (sem COUNT)
+            data = self.client.get('/api/clientes/', {'count': '0', 'page_size': 500}).data
+        self.assertNotIn('count', data)
+        self.assertEqual(len(data['results']), 95)
+
+
+class FastJSONRendererTests(TestCase):
+    """ O renderer com orjson produz os mesmos bytes que o do DRF (exceto NaN, ver docstring). """
+
+    def test_matches_drf_output(self):
+        dados = {
+            'id': uuid.uuid4(),
+            'preco': Decimal("12.50"),
+            'quando': timezone.now(),
+            'nome': "Pão de queijo\u2028linha\u2029parágrafo",
+            'lista': [1, None, True],
+            'grande': 2 ** 70,
+        }
+        self.assertEqual(FastJSONRenderer().render(dados), JSONRenderer().render(dados))
+
+    def test_nan_is_rendered_as_null(self):
+        self.assertEqual(FastJSONRenderer().render({'valor': float('nan')}), b'{"valor":null}')
+        self.assertEqual(FastJSONParser().parse(io.BytesIO(b'{"a": [1, 2]}')), {'a': [1, 2]})
+
+
+@skipUnless(msgpack, "pacote opcional msgpack não instalado")
+class MessagePackTests(TenantAPITestCase):
+    """ Accept/Content-Type application/msgpack: mesmos dados da resposta JSON, sem JSON no caminho. """
+    nome_estabelecimento = "Karibu MessagePack"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        categoria = Categoria.objects.create(estabelecimento=cls.estabelecimento, nome="Bebidas")
+        ItemCardapio.objects.create(estabelecimento=cls.estabelecimento, categoria=categoria, nome="Suco", preco="8.50")
+
+    def test_list_and_write_round_trip(self):
+        resposta_json = self.client.get('/api/cardapio/itens/')
+        # Decimal (preco) e datetimes: o orjson produz os mesmos bytes que o JSONRenderer do DRF.
+        self.assertEqual(resposta_json.content, JSONRenderer().render(resposta_json.data))
+
+        resposta = self.client.get('/api/cardapio/itens/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(resposta['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(resposta.content), json.loads(resposta_json.content))
+
+        corpo = msgpack.packb({'numero': "12", 'capacidade': 4})
+        resposta = self.client.post('/api/mesa/', corpo, content_type='application/msgpack', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(resposta.status_code, 201, resposta.content)
+        criada = msgpack.unpackb(resposta.content)
+        self.assertEqual((criada['numero'], criada['capacidade']), ("12", 4))
+        self.assertTrue(Mesa.objects.filter(pk=criada['id'], estabelecimento=self.estabelecimento).exists())
+
+        with override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=16):
+            grande = msgpack.packb({'numero': "13", 'descricao': "x" * 100})
+            self.assertEqual(self.client.post('/api/mesa/', grande, content_type='application/msgpack').status_code, 400)
+
+
+class IdempotencySignatureTests(TestCase):
+    """ A assinatura de um upload multipart independe do boundary, mas não do conteúdo. """
+
+    def assinatura(self, boundary, conteudo):
+        corpo = encode_multipart(boundary, {
+            'nome': "Moqueca", 'imagem': SimpleUploadedFile("foto.jpg", conteudo, content_type='image/jpeg'),
+        })
+        django_request = RequestFactory().post(
+            '/api/cardapio/itens/', corpo, content_type=f'multipart/form-data; boundary={boundary}'
+        )
+        return request_signature(Request(django_request, parsers=[MultiPartParser()]))
+
+    def test_multipart_signature(self):
+        self.assertEqual(self.assinatura('primeiro', b'abc'), self.assinatura('segundo', b'abc'))
+        self.assertNotEqual(self.assinatura('primeiro', b'abc'), self.assinatura('primeiro', b'abd'))
+
+
+class HashedStorageTests(TestCase):
+    """ Uploads endereçados por conteúdo: deduplicados e servidos como imutáveis. """
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.storage = HashedFileSystemStorage(location=self.media_root)
+
+    def test_identical_uploads_share_one_file(self):
+        nome = self.storage.save('itens_cardapio/moqueca.JPG', ContentFile(b'mesmos bytes'))
+        self.assertRegex(nome, r'^itens_cardapio/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$')
+        self.assertEqual(self.storage.save('itens_cardapio/outro.jpg', ContentFile(b'mesmos bytes')), nome)
+        self.assertEqual(len(os.listdir(os.path.dirname(self.storage.path(nome)))), 1)
+        self.assertNotEqual(self.storage.save('itens_cardapio/moqueca.jpg', ContentFile(b'outros')), nome)
+
+    def test_hex_looking_client_name_is_still_hashed(self):
+        nome_cliente = f"itens_cardapio/{'a' * 64}.jpg"
+        primeiro = self.storage.save(nome_cliente, ContentFile(b'foto original'))
+        segundo = self.storage.save(nome_cliente, ContentFile(b'foto editada'))
+        self.assertNotEqual(primeiro, segundo)
+        with self.storage.open(segundo) as arquivo:
+            self.assertEqual(arquivo.read(), b'foto editada')
+        # Regravar sob o próprio nome endereçado mantém o nome.
+        self.assertEqual(self.storage.save(primeiro, ContentFile(b'foto original')), primeiro)
+
+    def test_serve_media_headers(self):
+        nome = self.storage.save('clientes/fotos/ana.png', ContentFile(b'png'))
+        request = RequestFactory().get(f'/media/{nome}')
+        with override_settings(MEDIA_ROOT=self.media_root):
+            response = serve_media(request, nome)
+            self.assertIn('immutable', response['Cache-Control'])
+            self.assertEqual(b''.join(response.streaming_content), b'png')
+
+            with override_settings(MEDIA_SENDFILE_HEADER='X-Accel-Redirect'):
+                response = serve_media(request, nome)
+                self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{nome}')
+                self.assertEqual(response.content, b'')
+                self.assertEqual(response['Content-Type'], 'image/png')
+
+
+class NPlusOneDetectorTests(TestCase):
+    """ Consultas repetidas por linha são apontadas com o campo de serializer que as disparou. """
+
+    @classmethod
+    def setUpTestData(cls):
+        estabelecimento = Estabelecimento.objects.create(nome="Karibu N+1")
+        for i in range(6):
+            categoria = Categoria.objects.create(estabelecimento=estabelecimento, nome=f"Categoria {i}")
+            ItemCardapio.objects.create(estabelecimento=estabelecimento, categoria=categoria, nome=f"Item {i}", preco="1.00")
+
+    def test_flags_lazy_relation_per_row(self):
+        with self.assertRaisesMessage(NPlusOneError, "campo ItemCardapioSerializer.categoria_nome"):
+            with detect_nplusone('listagem'):
+                ItemCardapioSerializer(ItemCardapio.objects.all(), many=True).data
+
+        with detect_nplusone('listagem') as detector:
+            ItemCardapioSerializer(ItemCardapioSerializer.setup_eager_loading(ItemCardapio.objects.all()), many=True).data
+        self.assertEqual(detector.violations(), [])
+
+
+class SeedAndBenchmarkCommandTests(TestCase):
+    """ seed_tenants gera dados coerentes com as regras dos endpoints; benchmark_api os percorre sem erros. """
+
+    def test_seed_then_benchmark_in_process(self):
+        call_command('seed_tenants', '2', '--clientes', '5', '--mesas', '3', '--categorias', '2',
+                     '--itens-por-categoria', '3', stdout=io.StringIO())
+        self.assertEqual(Estabelecimento.objects.filter(nome__startswith='bench-').count(), 2)
+        self.assertEqual(ItemCardapio.objects.count(), 12)
+        self.assertEqual(Cliente.objects.count(), User.objects.filter(username__regex=r'^\d+$').count())
+
+        saida = io.StringIO()
+        call_command('benchmark_api', '--operacoes', '3', '--operacoes-login', '1', '--aquecimento', '0', stdout=saida)
+        resultado = json.loads(saida.getvalue())
+        self.assertEqual(set(resultado['cenarios']), {
+            'login', 'cardapio_itens', 'cardapio_categorias', 'mesas', 'cliente_detalhe', 'usuarios',
+        })
+        for cenario in resultado['cenarios'].values():
+            for resumo in cenario['requisicoes'].values():
+                self.assertEqual(resumo['erros'], 0)
+                self.assertLessEqual(resumo['p50_ms'], resumo['p99_ms'])
+                self.assertGreater(resumo['consultas_por_requisicao'], 0)
+        self.assertEqual(len(resultado['cenarios']['usuarios']['requisicoes']), 4)
+        # O CRUD apaga os usuários que cria.
+        self.assertFalse(User.objects.filter(username__contains='-tmp-').exists())
@@ -1,3 +1,68 @@
-from django.shortcuts import render
+# backend/core/views.py
 
-# Create your views here.
+import mimetypes
+import os
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
+from django.views.static import serve
+
+from .metrics import render_metrics
+from .storage import is_content_addressed
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serve um arquivo de MEDIA_ROOT com cabeçalhos de cache longos. Nomes endereçados por
+    conteúdo (core.storage) nunca mudam: 'Cache-Control: public, max-age=<1 ano>, immutable'.
+    Os demais (uploads antigos) recebem MEDIA_CACHE_MAX_AGE.
+
+    Com MEDIA_SENDFILE_HEADER definido, o worker Python não lê o arquivo: responde só com
+    'X-Accel-Redirect' (nginx, sob MEDIA_SENDFILE_PREFIX) ou 'X-Sendfile' (caminho absoluto)
+    e o servidor web envia os bytes. Sem ele, usa django.views.static.serve (desenvolvimento).
+    """
+    header = getattr(settings, 'MEDIA_SENDFILE_HEADER', None)
+    if header:
+        caminho = default_storage.path(path)  # SuspiciousFileOperation (400) se sair de MEDIA_ROOT
+        if not os.path.isfile(caminho):
+            raise Http404("Arquivo não encontrado.")
+        content_type, encoding = mimetypes.guess_type(caminho)
+        response = HttpResponse(content_type=content_type or 'application/octet-stream')
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if header == 'X-Accel-Redirect':
+            prefixo = getattr(settings, 'MEDIA_SENDFILE_PREFIX', '/protected-media/').rstrip('/')
+            response[header] = f'{prefixo}/{quote(path)}'
+        else:
+            response[header] = caminho
+    else:
+        response = serve(request, path, document_root=settings.MEDIA_ROOT)
+
+    if is_content_addressed(path):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'MEDIA_CACHE_MAX_AGE', 60 * 60))
+    return response
+
+
+@require_safe
+def metrics(request):
+    """
+    Métricas do processo no formato texto do Prometheus (ver core.metrics).
+    Exige 'Authorization: Bearer <METRICS_TOKEN>'; sem METRICS_TOKEN, só responde com DEBUG.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if not token:
+        if not settings.DEBUG:
+            raise Http404
+    elif not constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Os fluxos em tempo real (Server-Sent Events) da cozinha e das chamadas precisam deste ponto de
+entrada, pois mantêm a conexão aberta sem ocupar uma thread:
+    uvicorn karibu.asgi:application --workers 4
 """
 
 import os
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os # Importar o módulo os para caminhos
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -34,6 +35,9 @@ CORS_ALLOWED_ORIGINS = [
     # "http://127.0.0.1:8080", # Se preferir usar 127.0.0.1
     # Adicione aqui os domínios de produção quando for fazer deploy
 ]
+# Tablets reenviam escritas com o cabeçalho Idempotency-Key (ver core.mixins.IdempotencyMixin).
+from corsheaders.defaults import default_headers
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
 
 # Application definition
 
@@ -61,11 +65,17 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Latência, consultas SQL, serialização e tamanho por rota (ver core.metrics e /metrics)
+    'core.metrics.MetricsMiddleware',
+    # Detector de N+1, opt-in via NPLUSONE_DETECTOR (ver core.nplusone)
+    'core.nplusone.NPlusOneMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware', # Adicionar CorsMiddleware AQUI
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Bloqueia tokens de estabelecimentos com assinatura cancelada/suspensa/expirada
+    'configuracao.middleware.SubscriptionMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -102,6 +112,29 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Em produção, aponte para um backend compartilhado entre os workers (ex.: Redis/Memcached).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'karibu-default',
+    }
+}
+
+# Snapshot do cardápio público (ver cardapio.snapshot): alias do cache e tempo de vida
+# (segundos) da versão e dos blobs; alterações invalidam antes disso. Sempre finito.
+MENU_SNAPSHOT_CACHE_ALIAS = 'default'
+MENU_SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+
+# Estado da assinatura de cada estabelecimento (ver configuracao.assinatura), consultado no
+# login e pelo SubscriptionMiddleware. Invalidado por sinal; o TTL cobre alterações em massa.
+SUBSCRIPTION_CACHE_ALIAS = 'default'
+SUBSCRIPTION_CACHE_TTL = 10 * 60
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -143,24 +176,136 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles') # Para produção
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media') # Onde as imagens serão armazenadas
 
+# Uploads são gravados sob o hash do conteúdo (core.storage.HashedFileSystemStorage):
+# arquivos idênticos são deduplicados e cada URL aponta sempre para o mesmo conteúdo.
+STORAGES = {
+    'default': {'BACKEND': 'core.storage.HashedFileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+# Entrega da mídia (ver core.views.serve_media): URLs por hash recebem 'immutable' com
+# validade de um ano; as demais, MEDIA_CACHE_MAX_AGE segundos. Em produção defina
+# MEDIA_SENDFILE_HEADER = 'X-Accel-Redirect' (nginx, com uma location 'internal' em
+# MEDIA_SENDFILE_PREFIX apontando para MEDIA_ROOT) ou 'X-Sendfile' (Apache/lighttpd),
+# para que o servidor web envie os bytes em vez dos workers Python.
+MEDIA_CACHE_MAX_AGE = 60 * 60
+MEDIA_SENDFILE_HEADER = os.environ.get('MEDIA_SENDFILE_HEADER') or None
+MEDIA_SENDFILE_PREFIX = '/protected-media/'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# Renderers/parsers: JSON via orjson (core.renderers) e, se o pacote opcional 'msgpack'
+# estiver instalado, MessagePack para clientes com 'Accept: application/msgpack'.
+from importlib.util import find_spec
+
+_RENDERER_CLASSES = ['core.renderers.FastJSONRenderer', 'rest_framework.renderers.BrowsableAPIRenderer']
+_PARSER_CLASSES = [
+    'core.parsers.FastJSONParser',
+    'rest_framework.parsers.FormParser',
+    'rest_framework.parsers.MultiPartParser',
+]
+if find_spec('msgpack'):
+    _RENDERER_CLASSES.append('core.renderers.MessagePackRenderer')
+    _PARSER_CLASSES.append('core.parsers.MessagePackParser')
+
 # Django REST Framework settings
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': _RENDERER_CLASSES,
+    'DEFAULT_PARSER_CLASSES': _PARSER_CLASSES,
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Carrega User + Perfil + Estabelecimento em uma única consulta (ver core.tenant)
+        'core.authentication.TenantJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'core.permissions.IsAuthenticatedAndBelongsToEstablishment', # <-- Essa é a linha importante que adicionamos!
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # Paginação por cursor (keyset): ?page_size=<n> até KEYSET_PAGINATION_MAX_PAGE_SIZE, ?count=0 omite o COUNT
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
     'PAGE_SIZE': 10
 }
 
+KEYSET_PAGINATION_MAX_PAGE_SIZE = 200
+
+# Tempo máximo (segundos) que o modo JWT sem estado confia no estado de usuário em cache
+# antes de revalidá-lo no banco (ver core.authentication.StatelessTenantJWTAuthentication).
+TENANT_CLAIMS_CACHE_TTL = 60
+
+# Sincronização incremental (?since=, ver core.sync): sobreposição de segurança entre
+# sincronizações e por quanto tempo os registros de exclusão (Tombstones) são mantidos.
+SYNC_OVERLAP_SECONDS = 5
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+
+# Cabeçalho Idempotency-Key (ver core.mixins.IdempotencyMixin): por quanto tempo a resposta
+# é repetida para reenvios e após quantos segundos uma requisição sem resposta é considerada
+# abandonada. Chaves expiradas são removidas com `manage.py purge_idempotency_keys`.
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+
+# Eventos em tempo real (SSE, ver core.pubsub e core.streams). Com vários workers, use
+# 'core.pubsub.RedisBroker' (pacote opcional 'redis') e informe PUBSUB_REDIS_URL.
+PUBSUB_BACKEND = 'core.pubsub.InProcessBroker'
+PUBSUB_REDIS_URL = os.environ.get('PUBSUB_REDIS_URL', 'redis://localhost:6379/0')
+# Espera máxima entre tentativas de reconectar a assinatura do RedisBroker.
+PUBSUB_RECONNECT_MAX_SECONDS = 30
+STREAM_HEARTBEAT_SECONDS = 15
+
+# Long-poll do quadro de mesas (GET /api/mesa/board/?versao=&aguardar=, ver mesa.views):
+# espera máxima e intervalo de consulta ao cache. A espera é assíncrona; sob WSGI cada
+# tablet aguardando ainda prende um worker/thread pelo tempo todo, então sirva via ASGI.
+MESA_BOARD_LONG_POLL_MAX = 25
+MESA_BOARD_POLL_INTERVAL = 0.5
+
+# Chamadas de garçom (ver chamada.registry): toques repetidos da mesma mesa dentro da janela
+# são agrupados; chamadas não atendidas são descartadas após CHAMADA_TTL_SECONDS. Ficam no
+# cache 'default', que precisa ser compartilhado (Redis/Memcached) com vários workers.
+# A rota pública é limitada por IP e estabelecimento a CHAMADA_PUBLICA_THROTTLE_RATE.
+CHAMADA_COALESCE_SECONDS = 60
+CHAMADA_TTL_SECONDS = 30 * 60
+CHAMADA_PUBLICA_THROTTLE_RATE = '30/min'
+
+# Miniaturas WebP das imagens enviadas (ver core.images): lado máximo em pixels por tamanho,
+# qualidade e threads do pool de geração. Com IMAGE_DERIVATIVES_ASYNC = False os derivados
+# são gerados logo após o commit, dentro da própria requisição. Imagens com mais de
+# IMAGE_MAX_PIXELS pixels não são decodificadas (a API continua servindo o original).
+IMAGE_DERIVATIVE_SIZES = {'pequena': 160, 'media': 480, 'grande': 1024}
+IMAGE_DERIVATIVE_QUALITY = 80
+IMAGE_MAX_PIXELS = 40_000_000
+IMAGE_DERIVATIVE_WORKERS = 2
+IMAGE_DERIVATIVES_ASYNC = True
+
+# Métricas por requisição (ver core.metrics): expostas em /metrics (protegido por
+# METRICS_TOKEN; sem ele, só com DEBUG) e registradas no logger 'karibu.requests' para uma amostra
+# das requisições e para todas as mais lentas que METRICS_SLOW_REQUEST_MS.
+METRICS_ENABLED = True
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+METRICS_LOG_SAMPLE_RATE = 0.01
+METRICS_SLOW_REQUEST_MS = 500
+
+# Detector de N+1 (ver core.nplusone): a mesma forma de SELECT repetida NPLUSONE_THRESHOLD
+# vezes numa requisição. 'raise' falha a requisição (padrão em `manage.py test`), 'log' só
+# avisa (staging: NPLUSONE_DETECTOR=log no ambiente), None desliga. Regexes em
+# NPLUSONE_IGNORE_PATTERNS liberam consultas repetidas de propósito.
+TESTING = sys.argv[1:2] == ['test']
+NPLUSONE_DETECTOR = os.environ.get('NPLUSONE_DETECTOR') or ('raise' if TESTING else None)
+NPLUSONE_THRESHOLD = 5
+NPLUSONE_IGNORE_PATTERNS = []
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'root': {'handlers': ['console'], 'level': 'WARNING'},
+    'loggers': {
+        'karibu': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 # Simple JWT settings (optional, you can customize token lifetimes)
 from datetime import timedelta
 
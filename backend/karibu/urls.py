@@ -2,15 +2,17 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
     TokenRefreshView,
     TokenVerifyView,
 )
+from core.views import metrics
+from usuarios.views import MyTokenObtainPairView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     # URLs para autenticação e obtenção/renovação de tokens JWT
-    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    # View customizada: valida a assinatura do estabelecimento e inclui as claims do tenant no token
+    path('api/token/', MyTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
     
@@ -25,12 +27,24 @@ urlpatterns = [
     
     # !!! LINHA ADICIONADA PARA INCLUIR AS URLs DO APP CLIENTE !!!
     path('api/clientes/', include('cliente.urls')), 
+    path('api/pedidos/', include('pedido.urls')),
+    path('api/chamadas/', include('chamada.urls')),
+
+    # Métricas no formato do Prometheus (ver core.metrics)
+    path('metrics', metrics, name='metrics'),
 ]
 
-# Configuração para servir arquivos de mídia (fotos) durante o desenvolvimento
+# Arquivos de mídia (fotos) com cabeçalhos de cache: servidos pelo Django em desenvolvimento
+# e, em produção, delegados ao servidor web via MEDIA_SENDFILE_HEADER (ver core.views.serve_media).
+import re
 from django.conf import settings
 from django.conf.urls.static import static
+from django.urls import re_path
+from core.views import serve_media
 
+if settings.DEBUG or getattr(settings, 'MEDIA_SENDFILE_HEADER', None):
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media, name='media'),
+    ]
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class MesaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'mesa'
+
+    def ready(self):
+        from core.sync import track_deletions
+        from .models import Mesa
+
+        # Exclusões de mesas geram Tombstones para a sincronização incremental (?since=).
+        track_deletions(Mesa)
+
+        # Alterações de mesas incrementam a versão do quadro do salão (ver mesa.board).
+        from . import signals  # noqa: F401
@@ -0,0 +1,92 @@
+# backend/mesa/board.py
+
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Mesa
+
+# Quadro de mesas do salão por estabelecimento. A versão é um contador no cache
+# incrementado a cada alteração de mesa; o quadro montado é guardado sob a própria
+# versão, então clientes com a versão atual não geram nenhuma consulta ao banco.
+_VERSION_KEY = 'mesa:board:{estabelecimento_id}:versao'
+_BOARD_KEY = 'mesa:board:{estabelecimento_id}:{versao}'
+
+# Ordem das colunas de cada mesa no array compacto.
+CAMPOS = ['id', 'numero', 'capacidade', 'status']
+
+
+def _get_cache():
+    return caches[getattr(settings, 'MESA_BOARD_CACHE_ALIAS', 'default')]
+
+
+def get_board_version(estabelecimento_id):
+    cache = _get_cache()
+    version_key = _VERSION_KEY.format(estabelecimento_id=estabelecimento_id)
+    versao = cache.get(version_key)
+    if versao is None:
+        # Começa pelo relógio: se o contador for descartado, a nova versão continua maior que as anteriores.
+        cache.add(version_key, time.time_ns(), timeout=None)
+        versao = cache.get(version_key)
+    return versao
+
+
+def bump_board_version(estabelecimento_id):
+    """ Marca o quadro do estabelecimento como alterado (a versão só cresce). """
+    cache = _get_cache()
+    version_key = _VERSION_KEY.format(estabelecimento_id=estabelecimento_id)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.add(version_key, time.time_ns(), timeout=None)
+
+
+def build_board(estabelecimento_id, versao):
+    """ Todas as mesas em UMA consulta (values_list), com contagens e capacidades por status. """
+    mesas = list(
+        Mesa.objects.filter(estabelecimento_id=estabelecimento_id).order_by('numero').values_list(*CAMPOS)
+    )
+    contagem = {status: 0 for status, _ in Mesa.STATUS_CHOICES}
+    capacidade = {status: 0 for status, _ in Mesa.STATUS_CHOICES}
+    for _, _, lugares, status in mesas:
+        contagem[status] = contagem.get(status, 0) + 1
+        capacidade[status] = capacidade.get(status, 0) + lugares
+
+    return {
+        'versao': versao,
+        # O estabelecimento vai uma única vez, no envelope, e não em cada mesa.
+        'estabelecimento': estabelecimento_id,
+        'campos': CAMPOS,
+        'mesas': [list(mesa) for mesa in mesas],
+        'contagem': contagem,
+        'capacidade': {'total': sum(capacidade.values()), **capacidade},
+    }
+
+
+def get_board(estabelecimento_id):
+    cache = _get_cache()
+    versao = get_board_version(estabelecimento_id)
+    board_key = _BOARD_KEY.format(estabelecimento_id=estabelecimento_id, versao=versao)
+    board = cache.get(board_key)
+    if board is None:
+        board = build_board(estabelecimento_id, versao)
+        cache.set(board_key, board, timeout=getattr(settings, 'MESA_BOARD_TIMEOUT', 60 * 60))
+    return board
+
+
+async def wait_for_change(estabelecimento_id, versao, timeout):
+    """
+    Long-poll: aguarda até `timeout` segundos a versão mudar, consultando só o cache.
+    Assíncrono (asyncio.sleep): sob ASGI a espera não prende um worker nem uma thread.
+    Retorna a versão atual (igual a `versao` se nada mudou).
+    """
+    intervalo = getattr(settings, 'MESA_BOARD_POLL_INTERVAL', 0.5)
+    version_key = _VERSION_KEY.format(estabelecimento_id=estabelecimento_id)
+    limite = time.monotonic() + timeout
+    atual = await _get_cache().aget(version_key)
+    while atual == versao and time.monotonic() < limite:
+        await asyncio.sleep(intervalo)
+        atual = await _get_cache().aget(version_key)
+    return atual
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mesa', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mesa',
+            index=models.Index(fields=['estabelecimento', 'data_atualizacao'], name='mesa_mesa_estabel_dae688_idx'),
+        ),
+    ]
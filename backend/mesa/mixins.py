@@ -1,6 +1,7 @@
 # backend/mesas/mixins.py (CÓDIGO COMPLETO - GARANTA QUE ESTÁ ASSIM)
 
 from rest_framework.exceptions import PermissionDenied
+from core.tenant import get_tenant
 
 class MesaEstablishmentMixin:
     """
@@ -8,17 +9,19 @@ class MesaEstablishmentMixin:
     Garante que as operações de listagem de Mesa sejam vinculadas ao estabelecimento do usuário autenticado.
     """
     def get_queryset(self):
-        if not self.request.user.is_authenticated:
+        tenant = get_tenant(self.request)
+
+        if not tenant.is_authenticated:
             raise PermissionDenied("Usuário não autenticado.")
 
-        if self.request.user.is_superuser:
+        if tenant.is_superuser:
             return super().get_queryset()
 
-        if not hasattr(self.request.user, 'perfil') or not self.request.user.perfil.estabelecimento:
+        if not tenant.has_estabelecimento:
             raise PermissionDenied("Seu perfil de usuário não está vinculado a um estabelecimento.")
 
         # Filtra as mesas para mostrar apenas as do estabelecimento do usuário logado.
-        return super().get_queryset().filter(estabelecimento=self.request.user.perfil.estabelecimento)
+        return super().get_queryset().filter(estabelecimento_id=tenant.estabelecimento_id)
 
     # REMOVA qualquer perform_create, perform_update, perform_destroy que estava aqui.
     # Essas lógicas agora estarão na classe de permissão ou no perform_create do ViewSet.
\ No newline at end of file
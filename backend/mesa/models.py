@@ -4,11 +4,16 @@ from django.db import models
 from configuracao.models import Estabelecimento # Importa o modelo Estabelecimento
 
 class Mesa(models.Model):
+    LIVRE = 'LIVRE'
+    OCUPADA = 'OCUPADA'
+    RESERVADA = 'RESERVADA'
+    MANUTENCAO = 'MANUTENCAO'
+
     STATUS_CHOICES = [
-        ('LIVRE', 'Livre'),
-        ('OCUPADA', 'Ocupada'),
-        ('RESERVADA', 'Reservada'),
-        ('MANUTENCAO', 'Em Manutenção'),
+        (LIVRE, 'Livre'),
+        (OCUPADA, 'Ocupada'),
+        (RESERVADA, 'Reservada'),
+        (MANUTENCAO, 'Em Manutenção'),
     ]
 
     estabelecimento = models.ForeignKey(
@@ -26,7 +31,7 @@ class Mesa(models.Model):
     status = models.CharField(
         max_length=15,
         choices=STATUS_CHOICES,
-        default='LIVRE',
+        default=LIVRE,
         verbose_name='Status da Mesa'
     )
     descricao = models.TextField(
@@ -43,6 +48,8 @@ class Mesa(models.Model):
         # Garante que não haja duas mesas com o mesmo número/identificador no mesmo estabelecimento
         unique_together = (('numero', 'estabelecimento'),)
         ordering = ['numero']
+        # Sincronização incremental e GET condicional filtram por estabelecimento + data_atualizacao
+        indexes = [models.Index(fields=['estabelecimento', 'data_atualizacao'])]
 
     def __str__(self):
         return f"Mesa {self.numero} ({self.estabelecimento.nome})"
@@ -51,7 +58,7 @@ class Mesa(models.Model):
         from django.core.exceptions import ValidationError
         # Validação extra para garantir unicidade do número da mesa por estabelecimento,
         # se o unique_together não for suficiente ou para mensagens mais claras.
-        if self.estabelecimento:
+        if self.estabelecimento_id:
             query = Mesa.objects.filter(numero=self.numero, estabelecimento=self.estabelecimento)
             if self.pk: # Se estiver atualizando uma mesa existente
                 query = query.exclude(pk=self.pk)
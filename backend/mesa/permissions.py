@@ -1,6 +1,7 @@
 # backend/mesas/permissions.py (CÓDIGO COMPLETO - ATUALIZADO PARA BLOQUEAR VISUALIZAÇÃO)
 from rest_framework import permissions
 from core.permissions import IsAuthenticatedAndBelongsToEstablishment
+from core.tenant import get_tenant
 
 class IsGestorForMesaOperations(IsAuthenticatedAndBelongsToEstablishment):
     """
@@ -16,14 +17,16 @@ class IsGestorForMesaOperations(IsAuthenticatedAndBelongsToEstablishment):
         if not super().has_permission(request, view):
             return False
 
+        tenant = get_tenant(request)
+
         # Superusuários (admins) sempre têm permissão total.
-        if request.user.is_superuser:
+        if tenant.is_superuser:
             return True
 
         # Para todas as operações (leitura e escrita), exige que seja um Gestor.
         # REMOVIDA a condição 'if request.method in permissions.SAFE_METHODS:'
         # Agora, qualquer método exige ser gestor ou superusuário.
-        if hasattr(request.user, 'perfil') and request.user.perfil and request.user.perfil.is_gestor:
+        if tenant.is_gestor:
             return True
 
         # Nega se não for superusuário e não for gestor.
@@ -35,16 +38,18 @@ class IsGestorForMesaOperations(IsAuthenticatedAndBelongsToEstablishment):
         if not super().has_object_permission(request, view, obj):
             return False
 
+        tenant = get_tenant(request)
+
         # Superusuários sempre têm permissão total sobre qualquer objeto.
-        if request.user.is_superuser:
+        if tenant.is_superuser:
             return True
 
         # Para todas as operações (leitura e escrita) no objeto específico,
         # exige que o usuário seja um Gestor E que o objeto (mesa) pertença
         # ao mesmo estabelecimento do Gestor logado.
         # REMOVIDA a condição 'if request.method in permissions.SAFE_METHODS:'
-        if hasattr(request.user, 'perfil') and request.user.perfil and request.user.perfil.is_gestor:
-            if obj.estabelecimento == request.user.perfil.estabelecimento:
+        if tenant.is_gestor:
+            if obj.estabelecimento_id == tenant.estabelecimento_id:
                 return True
 
         # Nega se não atender às condições acima.
@@ -1,13 +1,32 @@
 # backend/mesa/serializers.py
 
 from rest_framework import serializers
+from core.serializers import SparseFieldsetSerializerMixin, TimedSerializerMixin
 from .models import Mesa
 from configuracao.serializers import EstabelecimentoSerializer # Importa o Serializer de Estabelecimento
 
-class MesaSerializer(serializers.ModelSerializer):
+class MesaSerializer(TimedSerializerMixin, SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     # O campo 'estabelecimento' será read-only, pois será definido/filtrado automaticamente pelo mixin.
     estabelecimento = EstabelecimentoSerializer(read_only=True)
 
+    # Campos lidos no modo compacto (ver setup_eager_loading).
+    COMPACT_ONLY = ['id', 'estabelecimento', 'numero', 'capacidade', 'status', 'descricao', 'data_criacao', 'data_atualizacao']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Modo compacto (?compacto=1, ver MesaViewSet): só o ID do estabelecimento em cada mesa;
+        # os dados completos ficam em /api/configuracao/estabelecimento-atual/.
+        if self.context.get('compacto') and 'estabelecimento' in self.fields:
+            self.fields['estabelecimento'] = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    @staticmethod
+    def setup_eager_loading(queryset, compacto=False):
+        if compacto:
+            # Sem JOIN: o ID já está na própria tabela de mesas.
+            return queryset.only(*MesaSerializer.COMPACT_ONLY)
+        # Evita uma consulta por mesa para o estabelecimento aninhado.
+        return queryset.select_related('estabelecimento')
+
     class Meta:
         model = Mesa
         fields = [
@@ -0,0 +1,17 @@
+# backend/mesa/signals.py
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .board import bump_board_version
+from .models import Mesa
+
+
+@receiver([post_save, post_delete], sender=Mesa)
+def bump_board_on_mesa_change(sender, instance, **kwargs):
+    # Só após o commit: um long-poll acordado antes dele montaria o quadro com dados não
+    # confirmados e o guardaria sob a versão nova.
+    transaction.on_commit(partial(bump_board_version, instance.estabelecimento_id))
@@ -1,3 +1,70 @@
-from django.test import TestCase
+import threading
+import time
 
-# Create your tests here.
+from django.test import override_settings
+
+from core.testing import TenantAPITestCase
+
+from .board import bump_board_version
+from .models import Mesa
+
+
+class MesaBoardTests(TenantAPITestCase):
+    """ Quadro do salão: uma consulta para montar, nenhuma enquanto a versão não muda. """
+    nome_estabelecimento = "Karibu Salão"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Mesa.objects.bulk_create([
+            Mesa(estabelecimento=cls.estabelecimento, numero=f"{i:03d}", capacidade=4,
+                 status=Mesa.OCUPADA if i % 3 == 0 else Mesa.LIVRE)
+            for i in range(120)
+        ])
+
+    def setUp(self):
+        super().setUp()
+        self.url = '/api/mesa/board/'
+
+    def test_board_is_compact_and_cached_by_version(self):
+        # Aquece o cache de estado do JWT sem estado e o da assinatura; descarta só o quadro.
+        self.client.get(self.url)
+        bump_board_version(self.estabelecimento.id)
+        with self.assertNumQueries(1):
+            data = self.client.get(self.url).data
+        self.assertEqual(len(data['mesas']), 120)
+        self.assertEqual(data['campos'], ['id', 'numero', 'capacidade', 'status'])
+        self.assertEqual(data['contagem']['OCUPADA'], 40)
+        self.assertEqual(data['capacidade']['total'], 480)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {'versao': data['versao']})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_change_bumps_version(self):
+        versao = self.client.get(self.url).data['versao']
+        mesa = Mesa.objects.get(numero="001")
+        with self.captureOnCommitCallbacks(execute=True):
+            mesa.status = Mesa.MANUTENCAO
+            mesa.save()
+            # Antes do commit a versão não muda.
+            self.assertEqual(self.client.get(self.url, {'versao': versao}).status_code, 304)
+
+        data = self.client.get(self.url, {'versao': versao, 'aguardar': 1}).data
+        self.assertGreater(data['versao'], versao)
+        self.assertEqual(data['contagem']['MANUTENCAO'], 1)
+
+    @override_settings(MESA_BOARD_POLL_INTERVAL=0.02)
+    def test_long_poll_waits_for_bump(self):
+        versao = self.client.get(self.url).data['versao']
+        inicio = time.monotonic()
+        self.assertEqual(self.client.get(self.url, {'versao': versao, 'aguardar': 0.1}).status_code, 304)
+        self.assertGreaterEqual(time.monotonic() - inicio, 0.1)
+
+        threading.Timer(0.1, bump_board_version, args=[self.estabelecimento.id]).start()
+        inicio = time.monotonic()
+        response = self.client.get(self.url, {'versao': versao, 'aguardar': 10})
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(response.data['versao'], versao)
+        self.assertLess(time.monotonic() - inicio, 5)
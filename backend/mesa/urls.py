@@ -2,12 +2,14 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import MesaViewSet
+from .views import MesaViewSet, board_long_poll
 
 router = DefaultRouter()
 # Altere r'clientes' para r'' (string vazia) para ter URLs limpas
 router.register(r'', MesaViewSet, basename='mesas') # Registra o ViewSet para a rota 'mesas'
 
 urlpatterns = [
+    # Antes do router: a espera do long-poll do quadro é assíncrona (ver board_long_poll).
+    path('board/', board_long_poll, name='mesas-board'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,13 +1,48 @@
 # backend/mesas/views.py (CÓDIGO COMPLETO - ATUALIZADO)
 
-from rest_framework import viewsets
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import ProtectedError
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied, ValidationError
+from .board import get_board, get_board_version, wait_for_change
 from .models import Mesa
 from .serializers import MesaSerializer
 from .mixins import MesaEstablishmentMixin # Importa o mixin de filtragem
 from .permissions import IsGestorForMesaOperations # Importa a NOVA permissão específica
+from core.authentication import StatelessTenantJWTAuthentication
+from core.mixins import ConditionalGetMixin, DeltaSyncMixin, IdempotencyMixin, SparseFieldsetMixin
+from core.streams import authenticate_stream
+from core.tenant import get_tenant
 
-class MesaViewSet(MesaEstablishmentMixin, viewsets.ModelViewSet):
+def board_client_version(request):
+    """ Versão do quadro que o cliente já tem: ?versao= ou If-None-Match (None se ausente). """
+    versao = request.GET.get('versao')
+    etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    if versao is None and etags:
+        versao = etags[0].removeprefix('W/').strip('"')
+    try:
+        return int(versao) if versao is not None else None
+    except ValueError:
+        raise ValidationError({"versao": "Versão inválida."})
+
+
+def board_wait_seconds(request):
+    """ ?aguardar=<s>, limitado a MESA_BOARD_LONG_POLL_MAX (0 se ausente). """
+    if 'aguardar' not in request.GET:
+        return 0
+    try:
+        aguardar = float(request.GET['aguardar'])
+    except ValueError:
+        raise ValidationError({"aguardar": "Informe o tempo de espera em segundos."})
+    return max(min(aguardar, getattr(settings, 'MESA_BOARD_LONG_POLL_MAX', 25)), 0)
+
+
+class MesaViewSet(IdempotencyMixin, SparseFieldsetMixin, ConditionalGetMixin, DeltaSyncMixin, MesaEstablishmentMixin, viewsets.ModelViewSet):
     """
     ViewSet para a gestão de Mesas.
     Hereda de MesaEstablishmentMixin para filtrar as mesas por estabelecimento (GET).
@@ -16,21 +51,95 @@ class MesaViewSet(MesaEstablishmentMixin, viewsets.ModelViewSet):
     queryset = Mesa.objects.all()
     serializer_class = MesaSerializer
     permission_classes = [IsGestorForMesaOperations] # <-- Use a nova permissão aqui!
+    # Endpoint de leitura muito acessado: autentica pelas claims do token, sem consultar o usuário.
+    authentication_classes = [StatelessTenantJWTAuthentication]
+    # O estabelecimento aninhado entra no ETag.
+    conditional_related_fields = ('estabelecimento',)
+
+    def is_compacto(self):
+        return self.request.query_params.get('compacto', '').lower() in ('1', 'true', 'sim')
+
+    def get_queryset(self):
+        return MesaSerializer.setup_eager_loading(super().get_queryset(), compacto=self.is_compacto())
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['compacto'] = self.is_compacto()
+        return context
 
     # Sobrescreve perform_create para garantir que o estabelecimento seja definido corretamente.
     # A verificação de permissão (se o usuário é Gestor) já foi feita por IsGestorForMesaOperations.
     def perform_create(self, serializer):
-        if not self.request.user.is_authenticated:
+        tenant = get_tenant(self.request)
+
+        if not tenant.is_authenticated:
             raise PermissionDenied("Usuário não autenticado para criar.")
         
         # A permissão IsGestorForMesaOperations já garantiu que o perfil e estabelecimento existem.
         # Caso por algum motivo interno ainda falhe, esta validação extra ajuda.
-        if not hasattr(self.request.user, 'perfil') or not self.request.user.perfil.estabelecimento:
+        if not tenant.has_estabelecimento:
             raise ValidationError({"detail": "Seu perfil de usuário não está vinculado a um estabelecimento."})
         
         # O modelo Mesa tem o campo 'estabelecimento' diretamente.
-        serializer.save(estabelecimento=self.request.user.perfil.estabelecimento)
+        serializer.save(estabelecimento_id=tenant.estabelecimento_id)
+
+    @action(detail=False, methods=['get'])
+    def board(self, request):
+        """
+        Quadro do salão: todas as mesas em arrays compactos ([id, numero, capacidade, status],
+        ver 'campos'), contagens e capacidades por status e a 'versao' do quadro, que só cresce.
+        - ?versao=<v>: se o quadro não mudou, responde 304 sem corpo (também via If-None-Match);
+        - ?versao=<v>&aguardar=<s>: long-poll, espera até <s> segundos por uma mudança
+          (a espera acontece antes, na view assíncrona board_long_poll).
+        Enquanto a versão não muda, o quadro sai do cache sem consultar o banco.
+        """
+        tenant = get_tenant(request)
+        if not tenant.has_estabelecimento:
+            raise ValidationError({"detail": "Seu perfil de usuário não está vinculado a um estabelecimento."})
+        estabelecimento_id = tenant.estabelecimento_id
+
+        versao_cliente = board_client_version(request)
+        board_wait_seconds(request)  # só valida; a espera já aconteceu em board_long_poll
+
+        versao = get_board_version(estabelecimento_id)
+        if versao_cliente == versao:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(get_board(estabelecimento_id))
+            versao = response.data['versao']
+        response['ETag'] = quote_etag(str(versao))
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
 
-    # Não é necessário sobrescrever perform_update e perform_destroy a menos que haja
+    def perform_destroy(self, instance):
+        # Mesas com pedidos registrados não podem ser excluídas (Pedido.mesa é PROTECT).
+        try:
+            instance.delete()
+        except ProtectedError:
+            raise ValidationError({"detail": "Esta mesa possui pedidos registrados e não pode ser excluída."})
+
+    # Não é necessário sobrescrever perform_update a menos que haja
     # lógica adicional complexa. A permissão IsGestorForMesaOperations e o get_queryset
-    # já lidam com a autorização e o filtro de objeto.
\ No newline at end of file
+    # já lidam com a autorização e o filtro de objeto.
+
+_board_view = MesaViewSet.as_view({'get': 'board'})
+
+
+async def board_long_poll(request):
+    """
+    GET /api/mesa/board/: antes da action board do MesaViewSet, faz a espera do long-poll
+    (?versao=<v>&aguardar=<s>) de forma assíncrona, consultando só o cache. Sob ASGI, os
+    tablets aguardando não ocupam workers nem threads; sob WSGI a espera ainda prende o
+    worker até MESA_BOARD_LONG_POLL_MAX, então sirva este endpoint via ASGI (karibu/asgi.py).
+    Autenticação, permissões e a resposta (200/304) ficam com a action.
+    """
+    if request.method == 'GET':
+        try:
+            versao_cliente, aguardar = board_client_version(request), board_wait_seconds(request)
+        except ValidationError:
+            versao_cliente, aguardar = None, 0  # a action responde com o erro de validação
+        if versao_cliente is not None and aguardar:
+            tenant = await authenticate_stream(request)
+            if tenant is not None and tenant.has_estabelecimento:
+                await wait_for_change(tenant.estabelecimento_id, versao_cliente, aguardar)
+    return await sync_to_async(_board_view)(request)
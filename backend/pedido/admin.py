@@ -1,3 +1,22 @@
+# backend/pedido/admin.py
+
 from django.contrib import admin
+from .models import ItemPedido, Pedido
+
+
+class ItemPedidoInline(admin.TabularInline):
+    model = ItemPedido
+    extra = 0
+    raw_id_fields = ('item_cardapio',)
+
+
+class PedidoAdmin(admin.ModelAdmin):
+    list_display = ('id', 'mesa', 'status', 'total', 'estabelecimento', 'data_criacao')
+    list_filter = ('status', 'estabelecimento')
+    raw_id_fields = ('mesa', 'cliente')
+    inlines = [ItemPedidoInline]
+    # O status só deve mudar pela API (pedido.services.alterar_status).
+    readonly_fields = ('status', 'versao', 'total')
+
 
-# Register your models here.
+admin.site.register(Pedido, PedidoAdmin)
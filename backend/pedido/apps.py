@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class PedidoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pedido'
+
+    def ready(self):
+        from core.sync import track_deletions
+        from .models import Pedido
+
+        # Exclusões de pedidos (pelo admin) geram Tombstones para a sincronização incremental (?since=).
+        track_deletions(Pedido)
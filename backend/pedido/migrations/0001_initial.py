@@ -0,0 +1,65 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:20
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('configuracao', '0002_assinaturaestabelecimento'),
+        ('cliente', '0003_cliente_cliente_cli_estabel_fda871_idx'),
+        ('mesa', '0002_mesa_mesa_mesa_estabel_dae688_idx'),
+        ('cardapio', '0003_categoria_cardapio_ca_estabel_6174a9_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Pedido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('ABERTO', 'Aberto'), ('EM_PREPARO', 'Em Preparo'), ('PRONTO', 'Pronto'), ('ENTREGUE', 'Entregue'), ('PAGO', 'Pago')], default='ABERTO', max_length=15, verbose_name='Status do Pedido')),
+                ('versao', models.PositiveIntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('observacao', models.TextField(blank=True, null=True)),
+                ('data_criacao', models.DateTimeField(auto_now_add=True)),
+                ('data_atualizacao', models.DateTimeField(auto_now=True)),
+                ('cliente', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pedidos', to='cliente.cliente', verbose_name='Cliente')),
+                ('estabelecimento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pedidos', to='configuracao.estabelecimento', verbose_name='Estabelecimento')),
+                ('mesa', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='pedidos', to='mesa.mesa', verbose_name='Mesa')),
+            ],
+            options={
+                'verbose_name': 'Pedido',
+                'verbose_name_plural': 'Pedidos',
+                'ordering': ['-data_criacao'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ItemPedido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=150)),
+                ('preco_unitario', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('quantidade', models.PositiveIntegerField(default=1)),
+                ('observacao', models.CharField(blank=True, max_length=255, null=True)),
+                ('item_cardapio', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='itens_pedido', to='cardapio.itemcardapio', verbose_name='Item do Cardápio')),
+                ('pedido', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='itens', to='pedido.pedido', verbose_name='Pedido')),
+            ],
+            options={
+                'verbose_name': 'Item do Pedido',
+                'verbose_name_plural': 'Itens do Pedido',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['estabelecimento', 'data_atualizacao'], name='pedido_pedi_estabel_115969_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['estabelecimento', 'status'], name='pedido_pedi_estabel_af8a60_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configuracao', '0002_assinaturaestabelecimento'),
+        ('pedido', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketCozinha',
+            fields=[
+                ('pedido', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ticket', serialize=False, to='pedido.pedido', verbose_name='Pedido')),
+                ('mesa_numero', models.CharField(max_length=50)),
+                ('status', models.CharField(choices=[('ABERTO', 'Aberto'), ('EM_PREPARO', 'Em Preparo'), ('PRONTO', 'Pronto'), ('ENTREGUE', 'Entregue'), ('PAGO', 'Pago')], default='ABERTO', max_length=15)),
+                ('itens', models.JSONField(default=list)),
+                ('data_criacao', models.DateTimeField(auto_now_add=True)),
+                ('data_atualizacao', models.DateTimeField(auto_now=True)),
+                ('estabelecimento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tickets_cozinha', to='configuracao.estabelecimento', verbose_name='Estabelecimento')),
+            ],
+            options={
+                'verbose_name': 'Ticket da Cozinha',
+                'verbose_name_plural': 'Tickets da Cozinha',
+                'ordering': ['data_criacao'],
+                'indexes': [models.Index(fields=['estabelecimento', 'status'], name='pedido_tick_estabel_26f5a7_idx')],
+            },
+        ),
+    ]
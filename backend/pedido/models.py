@@ -1,3 +1,161 @@
+# backend/pedido/models.py
+
+from decimal import Decimal
+
 from django.db import models
+from configuracao.models import Estabelecimento
+from cardapio.models import ItemCardapio
+from cliente.models import Cliente
+from mesa.models import Mesa
+
+
+class Pedido(models.Model):
+    ABERTO = 'ABERTO'
+    EM_PREPARO = 'EM_PREPARO'
+    PRONTO = 'PRONTO'
+    ENTREGUE = 'ENTREGUE'
+    PAGO = 'PAGO'
+
+    STATUS_CHOICES = [
+        (ABERTO, 'Aberto'),
+        (EM_PREPARO, 'Em Preparo'),
+        (PRONTO, 'Pronto'),
+        (ENTREGUE, 'Entregue'),
+        (PAGO, 'Pago'),
+    ]
+
+    # Máquina de estados: cada status só pode seguir para o próximo da lista.
+    # As transições são aplicadas exclusivamente por pedido.services.alterar_status.
+    PROXIMO_STATUS = {
+        ABERTO: EM_PREPARO,
+        EM_PREPARO: PRONTO,
+        PRONTO: ENTREGUE,
+        ENTREGUE: PAGO,
+    }
+    STATUS_EM_ANDAMENTO = [ABERTO, EM_PREPARO, PRONTO, ENTREGUE]
+
+    estabelecimento = models.ForeignKey(
+        Estabelecimento,
+        on_delete=models.CASCADE,
+        related_name='pedidos',
+        verbose_name='Estabelecimento'
+    )
+    mesa = models.ForeignKey(
+        Mesa,
+        on_delete=models.PROTECT,
+        related_name='pedidos',
+        verbose_name='Mesa'
+    )
+    cliente = models.ForeignKey(
+        Cliente,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='pedidos',
+        verbose_name='Cliente'
+    )
+    status = models.CharField(max_length=15, choices=STATUS_CHOICES, default=ABERTO, verbose_name='Status do Pedido')
+    # Controle de concorrência otimista: incrementada a cada alteração do pedido.
+    versao = models.PositiveIntegerField(default=0)
+    # Soma dos itens, mantida junto com eles para que a listagem não precise agregar.
+    total = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    observacao = models.TextField(blank=True, null=True)
+    data_criacao = models.DateTimeField(auto_now_add=True)
+    data_atualizacao = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Pedido"
+        verbose_name_plural = "Pedidos"
+        ordering = ['-data_criacao']
+        indexes = [
+            # Sincronização incremental e GET condicional filtram por estabelecimento + data_atualizacao
+            models.Index(fields=['estabelecimento', 'data_atualizacao']),
+            # Fila da cozinha / pedidos em andamento por status
+            models.Index(fields=['estabelecimento', 'status']),
+        ]
+
+    def __str__(self):
+        return f"Pedido #{self.pk} - Mesa {self.mesa_id} ({self.get_status_display()})"
+
+
+class ItemPedido(models.Model):
+    pedido = models.ForeignKey(
+        Pedido,
+        on_delete=models.CASCADE,
+        related_name='itens',
+        verbose_name='Pedido'
+    )
+    # Mantido só como referência: nome e preço são copiados no momento do pedido,
+    # então alterar ou remover o item do cardápio não muda pedidos já feitos.
+    item_cardapio = models.ForeignKey(
+        ItemCardapio,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='itens_pedido',
+        verbose_name='Item do Cardápio'
+    )
+    nome = models.CharField(max_length=150)
+    preco_unitario = models.DecimalField(max_digits=10, decimal_places=2)
+    quantidade = models.PositiveIntegerField(default=1)
+    observacao = models.CharField(max_length=255, blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Item do Pedido"
+        verbose_name_plural = "Itens do Pedido"
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.quantidade}x {self.nome}"
+
+    @property
+    def subtotal(self):
+        return self.preco_unitario * self.quantidade
+
+
+class TicketCozinha(models.Model):
+    """
+    Registro mínimo de um pedido para as telas da cozinha: só o que é exibido,
+    já desnormalizado (número da mesa, itens), para que a fila seja montada sem JOINs.
+    Mantido por pedido.services junto com o próprio pedido; cada alteração é publicada
+    no canal 'cozinha:<estabelecimento>' (ver pedido.views.cozinha_eventos).
+    """
+    STATUS_NA_FILA = [Pedido.ABERTO, Pedido.EM_PREPARO, Pedido.PRONTO]
+
+    pedido = models.OneToOneField(
+        Pedido,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ticket',
+        verbose_name='Pedido'
+    )
+    estabelecimento = models.ForeignKey(
+        Estabelecimento,
+        on_delete=models.CASCADE,
+        related_name='tickets_cozinha',
+        verbose_name='Estabelecimento'
+    )
+    mesa_numero = models.CharField(max_length=50)
+    status = models.CharField(max_length=15, choices=Pedido.STATUS_CHOICES, default=Pedido.ABERTO)
+    # [{"nome": ..., "quantidade": ..., "observacao": ...}, ...]
+    itens = models.JSONField(default=list)
+    data_criacao = models.DateTimeField(auto_now_add=True)
+    data_atualizacao = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Ticket da Cozinha"
+        verbose_name_plural = "Tickets da Cozinha"
+        ordering = ['data_criacao']
+        indexes = [models.Index(fields=['estabelecimento', 'status'])]
+
+    def __str__(self):
+        return f"Ticket do pedido #{self.pedido_id} - Mesa {self.mesa_numero}"
 
-# Create your models here.
+    def as_event(self):
+        return {
+            'pedido': self.pedido_id,
+            'mesa': self.mesa_numero,
+            'status': self.status,
+            'itens': self.itens,
+            'data_criacao': self.data_criacao,
+        }
@@ -0,0 +1,56 @@
+# backend/pedido/serializers.py
+
+from rest_framework import serializers
+from core.serializers import TimedSerializerMixin
+from .models import ItemPedido, Pedido
+
+
+class ItemPedidoSerializer(serializers.ModelSerializer):
+    subtotal = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = ItemPedido
+        fields = ['id', 'item_cardapio', 'nome', 'preco_unitario', 'quantidade', 'observacao', 'subtotal']
+        # Nome e preço são copiados do cardápio no momento do pedido (ver pedido.services).
+        read_only_fields = ['nome', 'preco_unitario']
+
+
+class PedidoSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """ Leitura do pedido; a escrita passa por pedido.services (ver PedidoViewSet). """
+    itens = ItemPedidoSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Pedido
+        fields = [
+            'id', 'estabelecimento', 'mesa', 'cliente', 'status', 'versao', 'total',
+            'observacao', 'itens', 'data_criacao', 'data_atualizacao'
+        ]
+        read_only_fields = fields
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        # Os itens já trazem nome e preço: nenhum JOIN com o cardápio na leitura.
+        return queryset.prefetch_related('itens')
+
+
+class NovoItemPedidoSerializer(serializers.Serializer):
+    item_cardapio = serializers.IntegerField()
+    quantidade = serializers.IntegerField(min_value=1, default=1)
+    observacao = serializers.CharField(max_length=255, required=False, allow_blank=True, allow_null=True)
+
+
+class NovoPedidoSerializer(serializers.Serializer):
+    mesa = serializers.IntegerField()
+    cliente = serializers.UUIDField(required=False, allow_null=True)
+    observacao = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    itens = NovoItemPedidoSerializer(many=True, allow_empty=False)
+
+
+class AdicionarItensSerializer(serializers.Serializer):
+    itens = NovoItemPedidoSerializer(many=True, allow_empty=False)
+
+
+class AlterarStatusSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=Pedido.STATUS_CHOICES)
+    # Opcional: versão lida pelo cliente; se o pedido mudou desde então a resposta é 409.
+    versao = serializers.IntegerField(required=False, min_value=0)
@@ -0,0 +1,177 @@
+# backend/pedido/services.py
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from cardapio.models import ItemCardapio
+from core.pubsub import publish
+from mesa.board import bump_board_version
+from mesa.models import Mesa
+from .models import ItemPedido, Pedido, TicketCozinha
+
+
+class PedidoConflito(APIException):
+    """ O pedido foi alterado por outra pessoa desde que o cliente o leu. """
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "O pedido foi alterado por outro usuário. Atualize e tente novamente."
+    default_code = 'pedido_conflito'
+
+
+def canal_cozinha(estabelecimento_id):
+    return f'cozinha:{estabelecimento_id}'
+
+
+def _publicar_na_cozinha(estabelecimento_id, evento, dados):
+    # Só depois do commit: as telas nunca veem um pedido que acabou desfeito.
+    transaction.on_commit(lambda: publish(canal_cozinha(estabelecimento_id), evento, dados))
+
+
+def _itens_do_ticket(itens_pedido):
+    return [
+        {'nome': item.nome, 'quantidade': item.quantidade, 'observacao': item.observacao}
+        for item in itens_pedido
+    ]
+
+
+def _montar_itens(estabelecimento_id, itens):
+    """
+    Converte [{'item_cardapio': id, 'quantidade': n, 'observacao': ...}] em ItemPedido
+    (ainda não salvos), copiando nome e preço do cardápio. Uma consulta para o lote todo.
+    """
+    ids = {item['item_cardapio'] for item in itens}
+    cardapio = ItemCardapio.objects.filter(
+        estabelecimento_id=estabelecimento_id, disponivel=True, pk__in=ids
+    ).only('id', 'nome', 'preco').in_bulk()
+
+    faltando = sorted(ids - cardapio.keys())
+    if faltando:
+        raise ValidationError({"itens": f"Itens indisponíveis ou inexistentes no cardápio: {faltando}"})
+
+    return [
+        ItemPedido(
+            item_cardapio_id=item['item_cardapio'],
+            nome=cardapio[item['item_cardapio']].nome,
+            preco_unitario=cardapio[item['item_cardapio']].preco,
+            quantidade=item.get('quantidade', 1),
+            observacao=item.get('observacao'),
+        )
+        for item in itens
+    ]
+
+
+def abrir_pedido(estabelecimento_id, mesa_id, itens, cliente_id=None, observacao=None):
+    """
+    Abre um pedido para a mesa com os itens informados e marca a mesa como OCUPADA,
+    tudo na mesma transação. A mesa fica bloqueada (select_for_update) até o commit,
+    de modo que dois garçons abrindo pedidos na mesma mesa são serializados.
+    """
+    with transaction.atomic():
+        mesa = Mesa.objects.select_for_update().filter(
+            pk=mesa_id, estabelecimento_id=estabelecimento_id
+        ).only('id', 'numero', 'status').first()
+        if mesa is None:
+            raise ValidationError({"mesa": "Mesa não encontrada neste estabelecimento."})
+        if mesa.status == Mesa.MANUTENCAO:
+            raise ValidationError({"mesa": "Esta mesa está em manutenção."})
+
+        itens_pedido = _montar_itens(estabelecimento_id, itens)
+        pedido = Pedido.objects.create(
+            estabelecimento_id=estabelecimento_id,
+            mesa_id=mesa.pk,
+            cliente_id=cliente_id,
+            observacao=observacao,
+            total=sum((item.subtotal for item in itens_pedido), start=0),
+        )
+        for item in itens_pedido:
+            item.pedido = pedido
+        ItemPedido.objects.bulk_create(itens_pedido)
+        ticket = TicketCozinha.objects.create(
+            pedido=pedido, estabelecimento_id=estabelecimento_id,
+            mesa_numero=mesa.numero, itens=_itens_do_ticket(itens_pedido),
+        )
+        _publicar_na_cozinha(estabelecimento_id, 'ticket.novo', ticket.as_event())
+
+        if mesa.status != Mesa.OCUPADA:
+            # update() evita o full_clean() de Mesa.save(); data_atualizacao mantém ETag/?since= corretos.
+            Mesa.objects.filter(pk=mesa.pk).update(status=Mesa.OCUPADA, data_atualizacao=timezone.now())
+            # update() não dispara sinais: o quadro do salão é avisado aqui.
+            transaction.on_commit(lambda: bump_board_version(estabelecimento_id))
+    return pedido
+
+
+def adicionar_itens(pedido_id, estabelecimento_id, itens):
+    """ Acrescenta itens a um pedido ainda ABERTO, atualizando o total na mesma transação. """
+    with transaction.atomic():
+        pedido = Pedido.objects.select_for_update().filter(
+            pk=pedido_id, estabelecimento_id=estabelecimento_id
+        ).first()
+        if pedido is None:
+            raise ValidationError({"pedido": "Pedido não encontrado neste estabelecimento."})
+        if pedido.status != Pedido.ABERTO:
+            raise ValidationError({"status": "Só é possível adicionar itens a pedidos abertos."})
+
+        itens_pedido = _montar_itens(estabelecimento_id, itens)
+        for item in itens_pedido:
+            item.pedido = pedido
+        ItemPedido.objects.bulk_create(itens_pedido)
+
+        pedido.total += sum((item.subtotal for item in itens_pedido), start=0)
+        pedido.versao += 1
+        pedido.save(update_fields=['total', 'versao', 'data_atualizacao'])
+
+        # O pedido já está bloqueado, o que serializa também as alterações do ticket.
+        ticket = TicketCozinha.objects.get(pedido_id=pedido.pk)
+        ticket.itens = ticket.itens + _itens_do_ticket(itens_pedido)
+        ticket.save(update_fields=['itens', 'data_atualizacao'])
+        _publicar_na_cozinha(estabelecimento_id, 'ticket.atualizado', ticket.as_event())
+    return pedido
+
+
+def alterar_status(pedido_id, estabelecimento_id, novo_status, versao=None):
+    """
+    Único ponto onde o status de um pedido muda. A transição é um UPDATE condicional
+    (WHERE status = <anterior> [AND versao = <versao>]): se outro usuário alterou o
+    pedido antes, nenhuma linha é afetada e levantamos PedidoConflito, sem bloqueios.
+    Ao ser PAGO, a mesa volta a LIVRE se não tiver outros pedidos em andamento.
+    """
+    anteriores = [atual for atual, proximo in Pedido.PROXIMO_STATUS.items() if proximo == novo_status]
+    if not anteriores:
+        raise ValidationError({"status": f"Transição para '{novo_status}' não permitida."})
+
+    filtro = {'pk': pedido_id, 'estabelecimento_id': estabelecimento_id, 'status': anteriores[0]}
+    if versao is not None:
+        filtro['versao'] = versao
+
+    with transaction.atomic():
+        alterados = Pedido.objects.filter(**filtro).update(
+            status=novo_status, versao=F('versao') + 1, data_atualizacao=timezone.now()
+        )
+        pedido = Pedido.objects.filter(pk=pedido_id, estabelecimento_id=estabelecimento_id).first()
+        if pedido is None:
+            raise ValidationError({"pedido": "Pedido não encontrado neste estabelecimento."})
+        if not alterados:
+            if versao is None and pedido.status != novo_status:
+                raise ValidationError({
+                    "status": f"Transição de '{pedido.status}' para '{novo_status}' não permitida."
+                })
+            raise PedidoConflito()
+
+        TicketCozinha.objects.filter(pedido_id=pedido.pk).update(status=novo_status, data_atualizacao=timezone.now())
+        _publicar_na_cozinha(estabelecimento_id, 'ticket.status', {
+            'pedido': pedido.pk, 'status': novo_status, 'versao': pedido.versao,
+        })
+
+        if novo_status == Pedido.PAGO:
+            # Mesmo lock de abrir_pedido: um pedido novo nesta mesa, ainda não commitado,
+            # termina antes da verificação abaixo (ou espera por ela), nunca no meio.
+            mesa = Mesa.objects.select_for_update().only('id', 'status').get(pk=pedido.mesa_id)
+            em_andamento = Pedido.objects.filter(
+                mesa_id=mesa.pk, status__in=Pedido.STATUS_EM_ANDAMENTO
+            ).exists()
+            if not em_andamento and mesa.status == Mesa.OCUPADA:
+                Mesa.objects.filter(pk=mesa.pk).update(status=Mesa.LIVRE, data_atualizacao=timezone.now())
+                transaction.on_commit(lambda: bump_board_version(estabelecimento_id))
+    return pedido
@@ -1,3 +1,171 @@
+import asyncio
+import json
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from cardapio.models import Categoria, ItemCardapio
+from configuracao.models import AssinaturaEstabelecimento, Estabelecimento
+from core.models import ChaveIdempotencia
+from core.pubsub import get_broker
+from core.streams import event_stream_response
+from mesa.models import Mesa
+from usuarios.models import Perfil
+from usuarios.views import MyTokenObtainPairSerializer
+
+from .models import Pedido, TicketCozinha
+from .services import canal_cozinha
+
+User = get_user_model()
+
+
+class PedidoTests(TestCase):
+    """ Abertura atômica, preços copiados do cardápio e máquina de estados. """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.estabelecimento = Estabelecimento.objects.create(nome="Karibu Pedidos")
+        AssinaturaEstabelecimento.objects.create(estabelecimento=cls.estabelecimento, data_ativacao=date.today(), estado='ATIVA')
+        cls.garcom = User.objects.create_user(username="garcom", password="senha-forte-123")
+        Perfil.objects.create(user=cls.garcom, estabelecimento=cls.estabelecimento, papel=Perfil.GARCOM)
+        categoria = Categoria.objects.create(estabelecimento=cls.estabelecimento, nome="Pratos")
+        cls.prato = ItemCardapio.objects.create(
+            estabelecimento=cls.estabelecimento, categoria=categoria, nome="Moqueca", preco=Decimal("50.00")
+        )
+        cls.mesa = Mesa.objects.create(estabelecimento=cls.estabelecimento, numero="7")
+
+    def setUp(self):
+        self.client = APIClient()
+        token = MyTokenObtainPairSerializer.get_token(self.garcom).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def abrir(self):
+        response = self.client.post('/api/pedidos/', {
+            'mesa': self.mesa.id, 'itens': [{'item_cardapio': self.prato.id, 'quantidade': 2}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.data
+
+    def test_open_order_snapshots_price_and_occupies_table(self):
+        pedido = self.abrir()
+        self.assertEqual(pedido['total'], "100.00")
+        self.mesa.refresh_from_db()
+        self.assertEqual(self.mesa.status, 'OCUPADA')
+
+        # Mudar o cardápio não altera o pedido já feito.
+        ItemCardapio.objects.filter(pk=self.prato.pk).update(preco=Decimal("80.00"))
+        itens = self.client.get(f"/api/pedidos/{pedido['id']}/").data['itens']
+        self.assertEqual(itens[0]['preco_unitario'], "50.00")
+
+    def test_status_machine_and_optimistic_version(self):
+        pedido = self.abrir()
+        url = f"/api/pedidos/{pedido['id']}/status/"
+
+        self.assertEqual(self.client.post(url, {'status': Pedido.PRONTO}).status_code, 400)
+        response = self.client.post(url, {'status': Pedido.EM_PREPARO, 'versao': pedido['versao']})
+        self.assertEqual(response.data['status'], Pedido.EM_PREPARO)
+        # Versão antiga: outro usuário já alterou o pedido.
+        self.assertEqual(self.client.post(url, {'status': Pedido.PRONTO, 'versao': pedido['versao']}).status_code, 409)
+
+        for novo_status in (Pedido.PRONTO, Pedido.ENTREGUE, Pedido.PAGO):
+            self.assertEqual(self.client.post(url, {'status': novo_status}).status_code, 200)
+        self.mesa.refresh_from_db()
+        self.assertEqual(self.mesa.status, 'LIVRE')
+
+    def test_paying_one_order_keeps_table_occupied_while_another_is_open(self):
+        primeiro = self.abrir()
+        self.abrir()
+        url = f"/api/pedidos/{primeiro['id']}/status/"
+        for novo_status in (Pedido.EM_PREPARO, Pedido.PRONTO, Pedido.ENTREGUE, Pedido.PAGO):
+            self.assertEqual(self.client.post(url, {'status': novo_status}).status_code, 200)
+        self.mesa.refresh_from_db()
+        self.assertEqual(self.mesa.status, Mesa.OCUPADA)
+
+    def test_idempotency_key_replays_response(self):
+        dados = {'mesa': self.mesa.id, 'itens': [{'item_cardapio': self.prato.id}]}
+        primeira = self.client.post('/api/pedidos/', dados, format='json', HTTP_IDEMPOTENCY_KEY='tablet-1-0001')
+        self.assertEqual(primeira.status_code, 201)
+
+        # Reenvio: uma consulta pela chave, nenhuma escrita.
+        with self.assertNumQueries(2):  # autenticação + chave de idempotência
+            segunda = self.client.post('/api/pedidos/', dados, format='json', HTTP_IDEMPOTENCY_KEY='tablet-1-0001')
+        self.assertEqual(segunda.status_code, 201)
+        self.assertEqual(segunda['Idempotent-Replayed'], 'true')
+        self.assertEqual(segunda.data['id'], primeira.data['id'])
+        self.assertEqual(Pedido.objects.count(), 1)
+
+        outra = self.client.post('/api/pedidos/', {**dados, 'observacao': "sem sal"}, format='json',
+                                 HTTP_IDEMPOTENCY_KEY='tablet-1-0001')
+        self.assertEqual(outra.status_code, 422)
+
+    def test_unhandled_error_releases_idempotency_key(self):
+        dados = {'mesa': self.mesa.id, 'itens': [{'item_cardapio': self.prato.id}]}
+        with mock.patch('pedido.services.abrir_pedido', side_effect=RuntimeError("falha")):
+            with self.assertRaises(RuntimeError):
+                self.client.post('/api/pedidos/', dados, format='json', HTTP_IDEMPOTENCY_KEY='tablet-1-0002')
+        self.assertFalse(ChaveIdempotencia.objects.filter(chave='tablet-1-0002').exists())
+
+        response = self.client.post('/api/pedidos/', dados, format='json', HTTP_IDEMPOTENCY_KEY='tablet-1-0002')
+        self.assertEqual(response.status_code, 201)
+
+
+    def test_kitchen_ticket_is_written_and_published_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            pedido = self.abrir()
+        self.assertEqual(TicketCozinha.objects.get(pk=pedido['id']).mesa_numero, "7")
+
+        async def receber():
+            eventos = get_broker().subscribe(canal_cozinha(self.estabelecimento.id), timeout=1)
+            for callback in callbacks:
+                callback()
+            mensagem = await eventos.__anext__()
+            await eventos.aclose()
+            return json.loads(mensagem)
+
+        mensagem = asyncio.run(receber())
+        self.assertEqual(mensagem['evento'], 'ticket.novo')
+        self.assertEqual(mensagem['dados']['itens'], [{'nome': "Moqueca", 'quantidade': 2, 'observacao': None}])
+
+    def test_kitchen_stream_keeps_events_published_while_snapshot_is_taken(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            na_fila = self.abrir()
+        outra_mesa = Mesa.objects.create(estabelecimento=self.estabelecimento, numero="8")
+        with self.captureOnCommitCallbacks() as callbacks_depois:
+            response = self.client.post('/api/pedidos/', {
+                'mesa': outra_mesa.id, 'itens': [{'item_cardapio': self.prato.id, 'quantidade': 1}],
+            }, format='json')
+        depois = response.data
+        snapshot = [TicketCozinha.objects.get(pk=na_fila['id']).as_event()]
+        canal = canal_cozinha(self.estabelecimento.id)
+
+        def fila_atual():
+            # Ambos os tickets são publicados entre a assinatura e a leitura da fila; só o
+            # primeiro já estava no banco quando ela foi lida.
+            for callback in [*callbacks, *callbacks_depois]:
+                callback()
+            return snapshot
+
+        async def receber():
+            response = await event_stream_response(canal, snapshot=fila_atual, dedupe_key='pedido')
+            frames = response.streaming_content
+            recebidos = [await frames.__anext__(), await frames.__anext__()]
+            await frames.aclose()
+            return [json.loads(frame.decode('utf-8')[len('data: '):]) for frame in recebidos]
+
+        primeiro, segundo = asyncio.run(receber())
+        self.assertEqual(primeiro['evento'], 'snapshot')
+        self.assertEqual([ticket['pedido'] for ticket in primeiro['dados']], [na_fila['id']])
+        self.assertEqual(segundo['evento'], 'ticket.novo')
+        self.assertEqual(segundo['dados']['pedido'], depois['id'])
+
+    async def test_kitchen_stream_requires_kitchen_role(self):
+        url = f'/api/pedidos/cozinha/{self.estabelecimento.id}/eventos/'
+        self.assertEqual((await self.async_client.get(url)).status_code, 401)
 
-# Create your tests here.
+        token = MyTokenObtainPairSerializer.get_token(self.garcom).access_token
+        response = await self.async_client.get(url, {'token': str(token)})
+        self.assertEqual(response.status_code, 403)
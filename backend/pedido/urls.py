@@ -0,0 +1,14 @@
+# backend/pedido/urls.py
+
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import PedidoViewSet, cozinha_eventos
+
+router = DefaultRouter()
+router.register(r'', PedidoViewSet, basename='pedidos')
+
+urlpatterns = [
+    # Fluxo SSE da cozinha (requer ASGI, ver karibu/asgi.py)
+    path('cozinha/<uuid:estabelecimento_id>/eventos/', cozinha_eventos, name='cozinha-eventos'),
+    path('', include(router.urls)),
+]
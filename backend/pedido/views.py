@@ -1,3 +1,111 @@
-from django.shortcuts import render
+# backend/pedido/views.py
 
-# Create your views here.
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.response import Response
+
+from cliente.models import Cliente
+from core.mixins import ConditionalGetMixin, DeltaSyncMixin, IdempotencyMixin
+from core.permissions import IsAuthenticatedAndBelongsToEstablishment
+from core.streams import authenticate_stream, event_stream_response
+from core.tenant import get_tenant
+from . import services
+from .models import Pedido, TicketCozinha
+from .serializers import AdicionarItensSerializer, AlterarStatusSerializer, NovoPedidoSerializer, PedidoSerializer
+
+
+class PedidoViewSet(IdempotencyMixin, ConditionalGetMixin, DeltaSyncMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                    viewsets.GenericViewSet):
+    """
+    Pedidos do estabelecimento do usuário logado.
+    - POST /api/pedidos/                    abre um pedido (e ocupa a mesa);
+    - POST /api/pedidos/<id>/itens/         acrescenta itens a um pedido aberto;
+    - POST /api/pedidos/<id>/status/        avança o status (aberto -> em preparo -> pronto -> entregue -> pago).
+    Toda escrita passa por pedido.services, onde ficam as regras de transição e concorrência.
+    """
+    queryset = Pedido.objects.all()
+    serializer_class = PedidoSerializer
+    permission_classes = [IsAuthenticatedAndBelongsToEstablishment]
+
+    def get_queryset(self):
+        tenant = get_tenant(self.request)
+
+        if not tenant.is_authenticated:
+            raise PermissionDenied("Usuário não autenticado.")
+
+        queryset = super().get_queryset()
+        if not tenant.is_superuser:
+            queryset = queryset.filter(estabelecimento_id=tenant.estabelecimento_id)
+        return PedidoSerializer.setup_eager_loading(queryset)
+
+    def _estabelecimento_id(self):
+        tenant = get_tenant(self.request)
+        if not tenant.has_estabelecimento:
+            raise ValidationError({"detail": "Seu perfil de usuário não está vinculado a um estabelecimento."})
+        return tenant.estabelecimento_id
+
+    def _resposta(self, pedido, status_code=status.HTTP_200_OK):
+        pedido = self.get_queryset().get(pk=pedido.pk)
+        return Response(PedidoSerializer(pedido, context=self.get_serializer_context()).data, status=status_code)
+
+    def create(self, request, *args, **kwargs):
+        estabelecimento_id = self._estabelecimento_id()
+        serializer = NovoPedidoSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        dados = serializer.validated_data
+
+        cliente_id = dados.get('cliente')
+        if cliente_id and not Cliente.objects.filter(pk=cliente_id, estabelecimento_id=estabelecimento_id).exists():
+            raise ValidationError({"cliente": "Cliente não encontrado neste estabelecimento."})
+
+        pedido = services.abrir_pedido(
+            estabelecimento_id, dados['mesa'], dados['itens'],
+            cliente_id=cliente_id, observacao=dados.get('observacao'),
+        )
+        return self._resposta(pedido, status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def itens(self, request, pk=None):
+        serializer = AdicionarItensSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pedido = services.adicionar_itens(pk, self._estabelecimento_id(), serializer.validated_data['itens'])
+        return self._resposta(pedido)
+
+    @action(detail=True, methods=['post'], url_path='status')
+    def alterar_status(self, request, pk=None):
+        serializer = AlterarStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pedido = services.alterar_status(
+            pk, self._estabelecimento_id(),
+            serializer.validated_data['status'], versao=serializer.validated_data.get('versao'),
+        )
+        return self._resposta(pedido)
+
+
+async def cozinha_eventos(request, estabelecimento_id):
+    """
+    Fila da cozinha em tempo real (Server-Sent Events), para cozinheiros e gestores:
+        GET /api/pedidos/cozinha/<estabelecimento_id>/eventos/?token=<access token>
+    Envia primeiro um 'snapshot' com os tickets na fila (uma consulta por conexão) e
+    depois os eventos 'ticket.novo', 'ticket.atualizado' e 'ticket.status' publicados por
+    pedido.services. As telas conectadas não geram consultas ao banco por evento.
+    """
+    tenant = await authenticate_stream(request)
+    if tenant is None:
+        return JsonResponse({"detail": "Token de acesso inválido ou ausente."}, status=401)
+    if not tenant.is_superuser and (
+        tenant.estabelecimento_id != estabelecimento_id or not (tenant.is_cozinheiro or tenant.is_gestor)
+    ):
+        return JsonResponse({"detail": "Apenas a cozinha e os gestores deste estabelecimento podem acompanhar a fila."}, status=403)
+
+    @sync_to_async
+    def fila_atual():
+        tickets = TicketCozinha.objects.filter(
+            estabelecimento_id=estabelecimento_id, status__in=TicketCozinha.STATUS_NA_FILA
+        )
+        return [ticket.as_event() for ticket in tickets]
+
+    return await event_stream_response(services.canal_cozinha(estabelecimento_id), snapshot=fila_atual, dedupe_key='pedido')
@@ -1,6 +1,7 @@
 # backend/usuarios/permissions.py (CORRIGIDO)
 
 from rest_framework import permissions
+from core.tenant import get_tenant
 
 class IsManagerOrSuperuser(permissions.BasePermission):
     """
@@ -10,9 +11,10 @@ class IsManagerOrSuperuser(permissions.BasePermission):
     message = "Você não tem permissão para realizar esta ação."
 
     def has_permission(self, request, view):
-        if request.user and request.user.is_superuser:
+        tenant = get_tenant(request)
+        if tenant.is_superuser:
             return True
-        if request.user and hasattr(request.user, 'perfil') and request.user.perfil.is_gestor:
+        if tenant.is_gestor:
             return True
         return False
 
@@ -27,17 +29,18 @@ class IsSelfOrManagerOrSuperuser(permissions.BasePermission):
     message = "Você não tem permissão para realizar esta ação neste usuário."
 
     def has_object_permission(self, request, view, obj):
-        if request.user and request.user.is_superuser:
+        tenant = get_tenant(request)
+        if tenant.is_superuser:
             return True
         
         # Usuário pode editar/ver seu próprio perfil
-        if obj == request.user:
+        if tenant.is_authenticated and obj.pk == tenant.user_id:
             return True
 
         # Gerentes (is_gestor) podem editar usuários do seu próprio estabelecimento
-        if request.user and hasattr(request.user, 'perfil') and request.user.perfil.is_gestor:
+        if tenant.is_gestor:
             # Se o usuário acessado (obj) tem um perfil e pertence ao mesmo estabelecimento do gerente
-            if hasattr(obj, 'perfil') and obj.perfil and obj.perfil.estabelecimento == request.user.perfil.estabelecimento:
+            if hasattr(obj, 'perfil') and obj.perfil and obj.perfil.estabelecimento_id == tenant.estabelecimento_id:
                 return True
         
         return False
@@ -52,21 +55,23 @@ class IsSuperuserOrCreateUserInOwnEstablishment(permissions.BasePermission):
     message = "Você não tem permissão para realizar esta ação."
 
     def has_permission(self, request, view):
+        tenant = get_tenant(request)
+
         # 1. Superusuários sempre têm permissão total
-        if request.user.is_superuser:
+        if tenant.is_superuser:
             return True
 
         # 2. Usuários não autenticados não têm permissão para nada
-        if not request.user.is_authenticated:
+        if not tenant.is_authenticated:
             return False
 
         # 3. Gerentes (is_gestor) autenticados (que não são superusuários)
-        if hasattr(request.user, 'perfil') and request.user.perfil and request.user.perfil.is_gestor:
+        if tenant.is_gestor:
             # Para ações de criação (POST):
             # Apenas verifica se o gerente tem um estabelecimento. O ViewSet se encarregará
             # de vincular o usuário ao estabelecimento CORRETO do gerente.
             if view.action == 'create':
-                return request.user.perfil.estabelecimento is not None
+                return tenant.has_estabelecimento
             
             # Para ações de leitura ou atualização (PUT/PATCH) será tratado em has_object_permission
             return True # Permite que has_object_permission seja chamado
@@ -74,24 +79,26 @@ class IsSuperuserOrCreateUserInOwnEstablishment(permissions.BasePermission):
         return False # Nega para outros papéis ou usuários sem perfil/estabelecimento
 
     def has_object_permission(self, request, view, obj):
+        tenant = get_tenant(request)
+
         # 1. Superusuários sempre têm permissão total sobre qualquer objeto
-        if request.user.is_superuser:
+        if tenant.is_superuser:
             return True
 
         # 2. Usuários não autenticados não têm permissão para objetos
-        if not request.user.is_authenticated:
+        if not tenant.is_authenticated:
             return False
 
         # 3. Gerentes (is_gestor) autenticados (que não são superusuários):
-        if hasattr(request.user, 'perfil') and request.user.perfil and request.user.perfil.estabelecimento:
-            gestor_establishment_id = request.user.perfil.estabelecimento.id if request.user.perfil.estabelecimento else None
+        if tenant.has_estabelecimento:
+            gestor_establishment_id = tenant.estabelecimento_id
             
             # Permite o acesso se o objeto (usuário) for o próprio gestor
-            if obj == request.user:
+            if obj.pk == tenant.user_id:
                 return True
             
             # Permite o acesso se o objeto (usuário) pertence ao mesmo estabelecimento do gestor
-            if hasattr(obj, 'perfil') and obj.perfil and obj.perfil.estabelecimento:
-                return obj.perfil.estabelecimento.id == gestor_establishment_id
+            if hasattr(obj, 'perfil') and obj.perfil and obj.perfil.estabelecimento_id:
+                return obj.perfil.estabelecimento_id == gestor_establishment_id
         
         return False # Nega para outros casos
\ No newline at end of file
@@ -1,9 +1,13 @@
 # backend/usuarios/serializers.py
+import logging
+
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from core.serializers import SparseFieldsetSerializerMixin, TimedSerializerMixin
 from .models import Perfil, Estabelecimento
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 class EstabelecimentoSerializer(serializers.ModelSerializer):
     class Meta:
@@ -37,7 +41,7 @@ class PerfilSerializer(serializers.ModelSerializer):
     # Ele chama o método 'get_estabelecimento_nome' automaticamente.
     estabelecimento_nome = serializers.SerializerMethodField('get_estabelecimento_nome')
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     # O PerfilSerializer aninhado cuidará da validação e serialização do perfil
     perfil = PerfilSerializer()
 
@@ -61,65 +65,33 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
     def update(self, instance, validated_data):
-        # --- INÍCIO DEBUG ---
-        print("\n--- DEBUG UserSerializer.update ---")
-        print(f"Instance ID: {instance.id}, Username (antes): {instance.username}, Email (antes): {instance.email}")
-        print(f"Validated Data (dados recebidos para validação): {validated_data}")
-        # --- FIM DEBUG ---
-
         # Popa os dados do perfil e da senha. O .pop garante que eles não fiquem em validated_data para o User
         perfil_data = validated_data.pop('perfil', {})
         password = validated_data.pop('password', None)
 
-        # --- INÍCIO DEBUG ---
-        print(f"Perfil Data (depois do pop): {perfil_data}")
-        print(f"Password (depois do pop): {'<present>' if password else '<not present>'}")
-        print(f"Validated Data (após pops de perfil/password): {validated_data}")
-        # --- FIM DEBUG ---
-
         # Atualiza campos do modelo User (username e email)
         instance.username = validated_data.get('username', instance.username)
         instance.email = validated_data.get('email', instance.email)
 
-        # --- INÍCIO DEBUG ---
-        print(f"User fields (para salvar): username={instance.username}, email={instance.email}")
-        # --- FIM DEBUG ---
-
         if password:
             instance.set_password(password) # Define a nova senha
-            # --- INÍCIO DEBUG ---
-            print("Senha foi atualizada.")
-            # --- FIM DEBUG ---
         instance.save() # Salva as alterações no modelo User
-        # --- INÍCIO DEBUG ---
-        print("Instância do User salva.")
-        # --- FIM DEBUG ---
 
         # Atualiza campos do modelo Perfil associado ao usuário
         perfil_instance = instance.perfil
-        # --- INÍCIO DEBUG ---
-        print(f"Perfil atual (antes da atualização): Estabelecimento ID={perfil_instance.estabelecimento.id if perfil_instance.estabelecimento else 'None'}, Papel={perfil_instance.papel}")
-        # --- FIM DEBUG ---
 
         # Pega os novos valores para estabelecimento e papel do perfil_data.
         # O PrimaryKeyRelatedField já converteu o UUID em um objeto Estabelecimento aqui.
         new_estabelecimento = perfil_data.get('estabelecimento', perfil_instance.estabelecimento)
         new_papel = perfil_data.get('papel', perfil_instance.papel)
 
-        # --- INÍCIO DEBUG ---
-        if new_estabelecimento:
-            print(f"Novo Estabelecimento (ID): {new_estabelecimento.id if hasattr(new_estabelecimento, 'id') else new_estabelecimento}")
-        else:
-            print("Novo Estabelecimento: None")
-        print(f"Novo Papel: {new_papel}")
-        # --- FIM DEBUG ---
-
         perfil_instance.estabelecimento = new_estabelecimento
         perfil_instance.papel = new_papel
         perfil_instance.save() # Salva as alterações no modelo Perfil
-        # --- INÍCIO DEBUG ---
-        print("Instância do Perfil salva.")
-        print("--- FIM DEBUG UserSerializer.update ---\n")
-        # --- FIM DEBUG ---
 
+        # Sem valores (a senha chega em texto puro): apenas o que mudou.
+        logger.debug(
+            "usuario_serializer_update usuario_id=%s senha_alterada=%s perfil=%s",
+            instance.pk, bool(password), ','.join(sorted(perfil_data)) or '-',
+        )
         return instance # Retorna a instância User atualizada
\ No newline at end of file
@@ -1,24 +1,28 @@
 # backend/usuarios/views.py
 
+import logging
+
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
 from .models import Perfil # Importe Perfil
-from configuracao.models import Estabelecimento, AssinaturaEstabelecimento # Importe AssinaturaEstabelecimento
+from configuracao.models import Estabelecimento
+from configuracao.assinatura import get_subscription_state, subscription_denial
 from .serializers import UserSerializer, PerfilSerializer, EstabelecimentoSerializer # Importe todos os serializers
 from .permissions import IsManagerOrSuperuser, IsSelfOrManagerOrSuperuser, IsSuperuserOrCreateUserInOwnEstablishment
-from core.mixins import EstablishmentFilteredViewSet
+from core.mixins import ConditionalGetMixin, EstablishmentFilteredViewSet, IdempotencyMixin, SparseFieldsetMixin, StreamingListMixin
+from core.tenant import get_tenant
 # Importações para o TokenObtainPairView customizado
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from datetime import date # Importar datetime.date para comparar datas
 
 # >>> ESTA É A LINHA QUE PRECISA SER ADICIONADA <<<
 from rest_framework import serializers 
 # >>> FIM DA ADIÇÃO <<<
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     """
@@ -29,6 +33,10 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     def get_token(cls, user):
         token = super().get_token(user)
 
+        # Claims usadas pelo modo sem estado (core.authentication.StatelessTenantJWTAuthentication)
+        token['username'] = user.username
+        token['is_staff'] = user.is_staff
+
         if hasattr(user, 'perfil'):
             token['role'] = user.perfil.papel
             if user.perfil.estabelecimento:
@@ -46,29 +54,14 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
 
         if hasattr(user, 'perfil') and user.perfil.estabelecimento:
             estabelecimento = user.perfil.estabelecimento
-            
-            assinatura = AssinaturaEstabelecimento.objects.filter(
-                estabelecimento=estabelecimento
-            ).exclude(
-                estado='FINALIZADA'
-            ).order_by('-data_ativacao').first()
-
-            if not assinatura:
-                raise serializers.ValidationError(
-                    {"detail": "Nenhuma assinatura ativa encontrada para este estabelecimento. Contate o suporte."}
-                )
 
-            if assinatura.estado == 'CANCELADA' or assinatura.estado == 'SUSPENSA':
-                raise serializers.ValidationError(
-                    {"detail": f"A assinatura do estabelecimento '{estabelecimento.nome}' está {assinatura.get_estado_display().lower()}. Acesso negado. Contate o suporte."}
-                )
-            
-            if assinatura.data_desativacao and assinatura.data_desativacao < date.today():
-                raise serializers.ValidationError(
-                    {"detail": f"A assinatura do estabelecimento '{estabelecimento.nome}' expirou em {assinatura.data_desativacao.strftime('%d/%m/%Y')}. Acesso negado. Contate o suporte."}
-                )
-            
-            data['subscription_status'] = assinatura.estado
+            # Estado da assinatura vigente a partir do cache (ver configuracao.assinatura).
+            assinatura = get_subscription_state(estabelecimento.id)
+            motivo = subscription_denial(assinatura)
+            if motivo:
+                raise serializers.ValidationError({"detail": motivo})
+
+            data['subscription_status'] = assinatura['estado']
             data['establishment_id'] = str(estabelecimento.id)
             data['is_superuser'] = user.is_superuser
             data['user_role'] = user.perfil.papel
@@ -87,9 +80,13 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
 class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
 
-class UsuarioViewSet(EstablishmentFilteredViewSet, viewsets.ModelViewSet):
+class UsuarioViewSet(IdempotencyMixin, SparseFieldsetMixin, ConditionalGetMixin, StreamingListMixin, EstablishmentFilteredViewSet, viewsets.ModelViewSet):
     """ ViewSet para o modelo User (padrão do Django). ... """
     serializer_class = UserSerializer
+    # O User padrão não tem data_atualizacao; o Perfil é salvo junto em toda atualização via API.
+    conditional_timestamp_field = 'perfil__data_atualizacao'
+    # estabelecimento_obj/estabelecimento_nome do perfil entram no ETag.
+    conditional_related_fields = ('perfil__estabelecimento',)
 
     def get_permissions(self):
         """ Instancia e retorna a lista de permissões que esta view requer. """
@@ -104,42 +101,21 @@ class UsuarioViewSet(EstablishmentFilteredViewSet, viewsets.ModelViewSet):
         return [permission() for permission in self.permission_classes]
 
     def get_queryset(self):
-        if self.request.user.is_superuser:
+        tenant = get_tenant(self.request)
+        if tenant.is_superuser:
             return User.objects.all().select_related('perfil__estabelecimento')
-        if hasattr(self.request.user, 'perfil') and self.request.user.perfil.is_gestor:
-            return User.objects.filter(perfil__estabelecimento=self.request.user.perfil.estabelecimento).select_related('perfil__estabelecimento')
+        if tenant.is_gestor:
+            return User.objects.filter(perfil__estabelecimento_id=tenant.estabelecimento_id).select_related('perfil__estabelecimento')
         return User.objects.none()
 
-    def update(self, request, *args, **kwargs):
-        print("\n--- DEBUG UsuarioViewSet.update: Método update da ViewSet chamado! ---")
-        print(f"Request data (dados recebidos na ViewSet): {request.data}")
-        print(f"User making request: {request.user.username} (ID: {request.user.id})")
-        partial = kwargs.pop('partial', False)
-        instance = self.get_object()
-        serializer = self.get_serializer(instance, data=request.data, partial=partial)
-        print(f"--- DEBUG UsuarioViewSet.update: Chamando serializer.is_valid() ---")
-        if serializer.is_valid(raise_exception=True):
-            print(f"--- DEBUG UsuarioViewSet.update: serializer.is_valid() retornou TRUE. Validated data: {serializer.validated_data}")
-            self.perform_update(serializer)
-            print(f"--- DEBUG UsuarioViewSet.update: perform_update concluído. ---")
-            response = Response(serializer.data)
-        else:
-            print(f"--- DEBUG UsuarioViewSet.update: serializer.is_valid() retornou FALSE. Erros: {serializer.errors}")
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        print(f"--- DEBUG UsuarioViewSet.update: Response status: {response.status_code} ---")
-        print(f"Response data (após atualização): {response.data}")
-        print("--- FIM DEBUG UsuarioViewSet.update ---\n")
-        return response
-
     def perform_update(self, serializer):
-        print("\n--- DEBUG UsuarioViewSet.perform_update: Método perform_update da ViewSet chamado! ---")
-        print(f"Serializer instance: {serializer.instance.username} (ID: {serializer.instance.id})")
-        print(f"Serializer validated_data: {serializer.validated_data}")
         serializer.save()
-        print("--- DEBUG UsuarioViewSet.perform_update: serializer.save() invocado! ---")
-        print(f"Serializer instance APÓS SAVE: {serializer.instance.username} (ID: {serializer.instance.id})")
-        print(f"Perfil do usuário APÓS SAVE: Estabelecimento ID={serializer.instance.perfil.estabelecimento.id if serializer.instance.perfil.estabelecimento else 'None'}, Papel={serializer.instance.perfil.papel}")
-        print("--- FIM DEBUG UsuarioViewSet.perform_update ---\n")
+        perfil = serializer.instance.perfil
+        logger.debug(
+            "usuario_atualizado usuario_id=%s por=%s campos=%s estabelecimento_id=%s papel=%s",
+            serializer.instance.pk, self.request.user.pk, ','.join(sorted(serializer.validated_data)),
+            perfil.estabelecimento_id, perfil.papel,
+        )
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def me(self, request):
@@ -149,7 +125,7 @@ class UsuarioViewSet(EstablishmentFilteredViewSet, viewsets.ModelViewSet):
         serializer = self.get_serializer(request.user)
         return Response(serializer.data)
 
-class PerfilViewSet(EstablishmentFilteredViewSet, viewsets.ModelViewSet):
+class PerfilViewSet(IdempotencyMixin, EstablishmentFilteredViewSet, viewsets.ModelViewSet):
     """ ViewSet para o modelo Perfil. """
     queryset = Perfil.objects.all().select_related('user', 'estabelecimento')
     serializer_class = PerfilSerializer
@@ -181,10 +157,9 @@ class EstabelecimentoViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """ Filtra o queryset de estabelecimentos baseado no papel do usuário. """
-        if self.request.user.is_superuser:
+        tenant = get_tenant(self.request)
+        if tenant.is_superuser:
             return Estabelecimento.objects.all()
-        if self.request.user.is_authenticated and \
-           hasattr(self.request.user, 'perfil') and \
-           self.request.user.perfil.estabelecimento:
-            return Estabelecimento.objects.filter(id=self.request.user.perfil.estabelecimento.id)
+        if tenant.is_authenticated and tenant.has_estabelecimento:
+            return Estabelecimento.objects.filter(id=tenant.estabelecimento_id)
         return Estabelecimento.objects.none()
\ No newline at end of file